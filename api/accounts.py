@@ -2,8 +2,12 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import Account
 from database import db
+from cache import bump_generation
 from sqlalchemy import desc
+from sqlalchemy.orm.exc import StaleDataError
 from decimal import Decimal
+from datetime import datetime
+import ledger
 
 accounts_bp = Blueprint('accounts', __name__)
 
@@ -90,6 +94,9 @@ def create_account():
         )
         
         db.session.add(account)
+        # 递增数据版本号，使缓存失效
+        bump_generation(user_id)
+        
         db.session.commit()
         
         return jsonify({
@@ -123,6 +130,46 @@ def get_account(account_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@accounts_bp.route('/<int:account_id>/balance-history', methods=['GET'])
+@jwt_required()
+def get_balance_history(account_id):
+    """获取账户余额走势：区间期初、期末余额及每个有收支的日期的日终余额"""
+    try:
+        user_id = int(get_jwt_identity())
+        
+        account = Account.query.filter_by(
+            id=account_id,
+            user_id=user_id
+        ).first()
+        
+        if not account:
+            return jsonify({'error': '账户不存在'}), 404
+        
+        # 日期区间，均可省略；start_date 与 end_date 相同时即为该日的余额
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        try:
+            start_date = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+            end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+        except ValueError:
+            return jsonify({'error': '日期格式错误，请使用 YYYY-MM-DD'}), 400
+        
+        if start_date and end_date and start_date > end_date:
+            return jsonify({'error': '开始日期不能晚于结束日期'}), 400
+        
+        history = ledger.balance_history(account, start_date, end_date)
+        
+        return jsonify({
+            'account_id': account.id,
+            'start_date': start_date.isoformat() if start_date else None,
+            'end_date': end_date.isoformat() if end_date else None,
+            'current_balance': float(account.balance or 0),
+            **history
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @accounts_bp.route('/<int:account_id>', methods=['PUT'])
 @jwt_required()
 def update_account(account_id):
@@ -168,6 +215,9 @@ def update_account(account_id):
         if 'is_active' in data:
             account.is_active = data['is_active']
         
+        # 递增数据版本号，使缓存失效
+        bump_generation(user_id)
+        
         db.session.commit()
         
         return jsonify({
@@ -175,6 +225,9 @@ def update_account(account_id):
             'account': account.to_dict()
         }), 200
         
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({'error': '账户已被其他操作修改，请刷新后重试'}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -201,6 +254,9 @@ def delete_account(account_id):
             }), 400
         
         db.session.delete(account)
+        # 递增数据版本号，使缓存失效
+        bump_generation(int(user_id))
+        
         db.session.commit()
         
         return jsonify({'message': '账户删除成功'}), 200
@@ -2,6 +2,8 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from models import User
 from database import db
+from cache import bump_generation
+import taxonomy
 from datetime import timedelta
 
 auth_bp = Blueprint('auth', __name__)
@@ -34,6 +36,11 @@ def register():
         user.set_password(data['password'])
         
         db.session.add(user)
+        db.session.flush()
+        
+        # 新用户直接带有默认分类，与用户在同一事务中提交
+        taxonomy.add_default_categories([user.id])
+        
         db.session.commit()
         
         return jsonify({
@@ -128,6 +135,9 @@ def update_profile():
                 return jsonify({'error': '邮箱已被使用'}), 400
             user.email = data['email']
         
+        # 递增数据版本号，使缓存失效
+        bump_generation(user_id)
+        
         db.session.commit()
         
         return jsonify({
@@ -0,0 +1,78 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from database import db
+
+batch_bp = Blueprint('batch', __name__)
+
+# 单次批量请求最多包含的子请求数
+MAX_BATCH_REQUESTS = 10
+
+def _query_string(query, params):
+    """合并路径中的查询串和 params（值为列表时作为同名多值参数）"""
+    pairs = parse_qsl(query, keep_blank_values=True)
+    for key, value in params.items():
+        values = value if isinstance(value, list) else [value]
+        pairs.extend((key, '' if item is None else item) for item in values)
+    return urlencode(pairs)
+
+def _dispatch(path, params, headers):
+    """在同一应用上下文中执行一个子请求，返回 (状态码, 响应体)"""
+    if not isinstance(path, str):
+        return 400, {'error': '不支持的请求路径'}
+    parts = urlsplit(path)
+    if not parts.path.startswith('/api/') or parts.path.rstrip('/') == request.path.rstrip('/'):
+        return 400, {'error': '不支持的请求路径'}
+    if not isinstance(params, dict):
+        return 400, {'error': 'params 必须是对象'}
+
+    try:
+        # 共用数据库会话
+        with current_app.test_request_context(
+            parts.path, method='GET', query_string=_query_string(parts.query, params), headers=headers
+        ):
+            response = current_app.full_dispatch_request()
+    except Exception as e:
+        # 单个子请求出错不影响其他子请求
+        db.session.rollback()
+        return 500, {'error': str(e)}
+
+    try:
+        if response.is_json:
+            return response.status_code, response.get_json(silent=True)
+        # 文件下载、流式导出等非 JSON 接口不能合并到批量响应中
+        if response.status_code < 400:
+            return 400, {'error': '该接口不返回 JSON，不支持批量请求'}
+        return response.status_code, {'error': response.status}
+    finally:
+        response.close()
+
+@batch_bp.route('', methods=['POST'])
+@jwt_required()
+def batch_requests():
+    """批量执行多个 GET 接口，在一次请求内依次返回各自的结果"""
+    try:
+        data = request.get_json() or {}
+        sub_requests = data.get('requests')
+
+        if not isinstance(sub_requests, list) or len(sub_requests) == 0:
+            return jsonify({'error': 'requests 必须是非空列表'}), 400
+
+        if len(sub_requests) > MAX_BATCH_REQUESTS:
+            return jsonify({'error': f'单次最多包含 {MAX_BATCH_REQUESTS} 个请求'}), 400
+
+        # 子请求沿用当前请求的认证信息
+        headers = {'Authorization': request.headers.get('Authorization', '')}
+
+        responses = []
+        for item in sub_requests:
+            if not isinstance(item, dict):
+                item = {}
+            path = item.get('path') or ''
+            status, body = _dispatch(path, item.get('params') or {}, headers)
+            responses.append({'path': path, 'status': status, 'body': body})
+
+        return jsonify({'responses': responses}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -2,6 +2,8 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import Category
 from database import db
+from cache import bump_generation
+import taxonomy
 from sqlalchemy import desc
 
 categories_bp = Blueprint('categories', __name__)
@@ -67,6 +69,12 @@ def create_category():
         )
         
         db.session.add(category)
+        # 关联已使用该分类值的收支记录
+        db.session.flush()
+        taxonomy.link_categories(user_id, category.value)
+        # 递增数据版本号，使缓存失效
+        bump_generation(user_id)
+        
         db.session.commit()
         
         return jsonify({
@@ -106,8 +114,12 @@ def update_category(category_id):
                 return jsonify({'error': '分类值已存在'}), 400
         
         # 更新字段
-        if 'value' in data:
+        if 'value' in data and data['value'] != category.value:
+            # 分类值变更后按新值重新关联收支记录
             category.value = data['value']
+            taxonomy.unlink_category(category.id)
+            db.session.flush()
+            taxonomy.link_categories(user_id, category.value)
         if 'label' in data:
             category.label = data['label']
         if 'category_type' in data:
@@ -117,6 +129,9 @@ def update_category(category_id):
         if 'is_active' in data:
             category.is_active = data['is_active']
         
+        # 递增数据版本号，使缓存失效
+        bump_generation(user_id)
+        
         db.session.commit()
         
         return jsonify({
@@ -148,7 +163,7 @@ def delete_category(category_id):
         from models import Expense
         expense_count = Expense.query.filter_by(
             user_id=user_id,
-            category=category.value
+            category_id=category.id
         ).count()
         
         if expense_count > 0:
@@ -157,6 +172,9 @@ def delete_category(category_id):
             }), 400
         
         db.session.delete(category)
+        # 递增数据版本号，使缓存失效
+        bump_generation(user_id)
+        
         db.session.commit()
         
         return jsonify({'message': '分类删除成功'}), 200
@@ -172,44 +190,18 @@ def init_default_categories():
     try:
         user_id = int(get_jwt_identity())
         
-        # 检查用户是否已有分类
-        existing_count = Category.query.filter_by(user_id=user_id).count()
-        if existing_count > 0:
+        # 一条 INSERT ... SELECT 写入全部默认分类，已有分类时不插入
+        inserted = taxonomy.add_default_categories([user_id])
+        if not inserted:
             return jsonify({'error': '用户已有分类，无需初始化'}), 400
         
-        # 默认分类列表
-        default_categories = [
-            {'value': 'food', 'label': '餐饮', 'category_type': 'expense', 'sort_order': 1},
-            {'value': 'transport', 'label': '交通', 'category_type': 'expense', 'sort_order': 2},
-            {'value': 'shopping', 'label': '购物', 'category_type': 'expense', 'sort_order': 3},
-            {'value': 'entertainment', 'label': '娱乐', 'category_type': 'expense', 'sort_order': 4},
-            {'value': 'healthcare', 'label': '医疗', 'category_type': 'expense', 'sort_order': 5},
-            {'value': 'education', 'label': '教育', 'category_type': 'expense', 'sort_order': 6},
-            {'value': 'housing', 'label': '住房', 'category_type': 'expense', 'sort_order': 7},
-            {'value': 'utilities', 'label': '水电费', 'category_type': 'expense', 'sort_order': 8},
-            {'value': 'communication', 'label': '通讯', 'category_type': 'expense', 'sort_order': 9},
-            {'value': 'insurance', 'label': '保险', 'category_type': 'expense', 'sort_order': 10},
-            {'value': 'investment', 'label': '投资', 'category_type': 'both', 'sort_order': 11},
-            {'value': 'salary', 'label': '工资', 'category_type': 'income', 'sort_order': 12},
-            {'value': 'bonus', 'label': '奖金', 'category_type': 'income', 'sort_order': 13},
-            {'value': 'other', 'label': '其他', 'category_type': 'both', 'sort_order': 14}
-        ]
-        
-        # 批量创建分类
-        for cat_data in default_categories:
-            category = Category(
-                user_id=user_id,
-                value=cat_data['value'],
-                label=cat_data['label'],
-                category_type=cat_data['category_type'],
-                sort_order=cat_data['sort_order']
-            )
-            db.session.add(category)
+        # 递增数据版本号，使缓存失效
+        bump_generation(user_id)
         
         db.session.commit()
         
         return jsonify({
-            'message': f'成功初始化 {len(default_categories)} 个默认分类'
+            'message': f'成功初始化 {inserted} 个默认分类'
         }), 201
         
     except Exception as e:
@@ -1,13 +1,111 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from werkzeug.datastructures import MultiDict
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import Expense, Account
+from models import Expense, Account, Category
 from database import db
-from sqlalchemy import desc, and_, or_
+from cache import bump_generation
+import rollups
+import ledger
+import fulltext
+import taxonomy
+import jobs
+from money import yuan, parse_amount
+from api.pagination import keyset_paginate, get_per_page, CursorError
+from api.serializers import expense_rows_query, expense_row_dict
+from sqlalchemy import desc, and_, or_, insert, select
 from datetime import datetime, date
 from decimal import Decimal
+from collections import defaultdict
+import csv
+import io
+import json
+import os
+import shutil
 
 expenses_bp = Blueprint('expenses', __name__)
 
+# 批量导入每批处理的行数
+BULK_CHUNK_SIZE = 500
+# 批量导入错误报告最多返回的条数
+BULK_MAX_ERRORS = 1000
+# 导出时每批从数据库读取的行数
+EXPORT_BATCH_SIZE = 1000
+# 导出的字段
+EXPORT_COLUMNS = [
+    ('id', Expense.id),
+    ('expense_date', Expense.expense_date),
+    ('expense_type', Expense.expense_type),
+    ('amount', yuan(Expense.amount)),
+    ('category', Expense.category),
+    ('subcategory', Expense.subcategory),
+    ('description', Expense.description),
+    ('account_id', Expense.account_id),
+    ('account_name', Account.name),
+    ('tags', Expense.tags),
+    ('is_reimbursable', Expense.is_reimbursable),
+    ('reimbursement_id', Expense.reimbursement_id),
+    ('created_at', Expense.created_at)
+]
+
+def _expense_filters(user_id, args, include_search=True):
+    """根据查询参数构建收支记录的筛选条件，参数格式错误时抛出 ValueError"""
+    conditions = [Expense.user_id == user_id]
+    
+    category = args.get('category')
+    category_id = args.get('category_id', type=int)
+    tags = taxonomy.parse_tags(args.getlist('tag'))
+    expense_type = args.get('type')
+    account_id = args.get('account_id', type=int)
+    start_date = args.get('start_date')
+    end_date = args.get('end_date')
+    search = args.get('search')
+    
+    if category:
+        conditions.append(Expense.category == category)
+    
+    if category_id:
+        conditions.append(Expense.category_id == category_id)
+    
+    # 可传入多个 tag 参数，须同时带有这些标签
+    for tag in tags:
+        conditions.append(taxonomy.tag_condition(user_id, tag))
+    
+    if expense_type:
+        conditions.append(Expense.expense_type == expense_type)
+    
+    if account_id:
+        conditions.append(Expense.account_id == account_id)
+    
+    if start_date:
+        try:
+            start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError('开始日期格式错误，请使用 YYYY-MM-DD')
+        conditions.append(Expense.expense_date >= start_date_obj)
+    
+    if end_date:
+        try:
+            end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError('结束日期格式错误，请使用 YYYY-MM-DD')
+        conditions.append(Expense.expense_date <= end_date_obj)
+    
+    if search and include_search:
+        # 优先使用全文索引，索引不可用时回退到 LIKE
+        matched = fulltext.match_subquery('expenses_fts', search)
+        if matched is not None:
+            conditions.append(Expense.id.in_(select(matched.c.id)))
+        else:
+            conditions.append(
+                or_(
+                    Expense.description.contains(search),
+                    Expense.category.contains(search),
+                    Expense.subcategory.contains(search)
+                )
+            )
+    
+    return conditions
+
 @expenses_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_expenses():
@@ -17,70 +115,47 @@ def get_expenses():
         
         # 获取查询参数
         page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
-        category = request.args.get('category')
-        expense_type = request.args.get('type')
-        account_id = request.args.get('account_id', type=int)
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
+        try:
+            per_page = get_per_page(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        cursor = request.args.get('cursor')  # 传入 cursor 参数（可为空）即启用游标分页
+        with_total = request.args.get('with_total', 'false').lower() == 'true'
         search = request.args.get('search')
         
-        # 构建查询
-        query = Expense.query.filter_by(user_id=user_id)
-        
-        if category:
-            query = query.filter_by(category=category)
+        # 关键词检索：页码分页时按全文索引相关度排序
+        ranked = fulltext.match_subquery('expenses_fts', search) if search and cursor is None else None
         
-        if expense_type:
-            query = query.filter_by(expense_type=expense_type)
-        
-        if account_id:
-            query = query.filter_by(account_id=account_id)
+        try:
+            conditions = _expense_filters(user_id, request.args, include_search=ranked is None)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        if start_date:
-            try:
-                start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
-                query = query.filter(Expense.expense_date >= start_date_obj)
-            except ValueError:
-                return jsonify({'error': '开始日期格式错误，请使用 YYYY-MM-DD'}), 400
+        # 构建查询（只查询列表所需的列并连接账户，不构造 ORM 对象）
+        query = expense_rows_query(db.session).filter(*conditions)
+        if ranked is not None:
+            query = query.join(ranked, ranked.c.id == Expense.id)
         
-        if end_date:
+        # 游标分页：按 (日期, 创建时间, ID) 定位，不统计总数
+        if cursor is not None:
             try:
-                end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
-                query = query.filter(Expense.expense_date <= end_date_obj)
-            except ValueError:
-                return jsonify({'error': '结束日期格式错误，请使用 YYYY-MM-DD'}), 400
-        
-        if search:
-            query = query.filter(
-                or_(
-                    Expense.description.contains(search),
-                    Expense.category.contains(search),
-                    Expense.subcategory.contains(search)
+                items, pagination_info = keyset_paginate(
+                    query,
+                    [Expense.expense_date, Expense.created_at, Expense.id],
+                    cursor, per_page, with_total=with_total
                 )
+            except CursorError as e:
+                return jsonify({'error': str(e)}), 400
+        else:
+            # 排序和分页
+            if ranked is not None:
+                query = query.order_by(ranked.c.rank)
+            query = query.order_by(desc(Expense.expense_date), desc(Expense.created_at))
+            pagination = query.paginate(
+                page=page, per_page=per_page, error_out=False
             )
-        
-        # 排序和分页
-        query = query.order_by(desc(Expense.expense_date), desc(Expense.created_at))
-        pagination = query.paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-        
-        expenses = []
-        for expense in pagination.items:
-            expense_dict = expense.to_dict()
-            # 添加账户信息
-            if expense.account:
-                expense_dict['account'] = {
-                    'id': expense.account.id,
-                    'name': expense.account.name,
-                    'account_type': expense.account.account_type
-                }
-            expenses.append(expense_dict)
-        
-        return jsonify({
-            'expenses': expenses,
-            'pagination': {
+            items = pagination.items
+            pagination_info = {
                 'page': page,
                 'per_page': per_page,
                 'total': pagination.total,
@@ -88,6 +163,12 @@ def get_expenses():
                 'has_next': pagination.has_next,
                 'has_prev': pagination.has_prev
             }
+        
+        expenses = [expense_row_dict(row) for row in items]
+        
+        return jsonify({
+            'expenses': expenses,
+            'pagination': pagination_info
         }), 200
         
     except Exception as e:
@@ -107,22 +188,20 @@ def create_expense():
             if not data.get(field):
                 return jsonify({'error': f'{field} 是必填字段'}), 400
         
-        # 验证账户是否存在且属于当前用户
-        account = Account.query.filter_by(
+        # 验证账户是否存在且属于当前用户（只查询ID，不加载账户对象）
+        account_exists = db.session.query(Account.id).filter_by(
             id=data['account_id'],
             user_id=user_id
         ).first()
         
-        if not account:
+        if not account_exists:
             return jsonify({'error': '账户不存在'}), 404
         
         # 验证金额
         try:
-            amount = Decimal(str(data['amount']))
-            if amount <= 0:
-                return jsonify({'error': '金额必须大于0'}), 400
-        except (ValueError, TypeError):
-            return jsonify({'error': '金额格式错误'}), 400
+            amount = parse_amount(data['amount'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # 处理日期
         expense_date = date.today()
@@ -132,28 +211,40 @@ def create_expense():
             except ValueError:
                 return jsonify({'error': '日期格式错误，请使用 YYYY-MM-DD'}), 400
         
+        tags = taxonomy.parse_tags(data.get('tags'))
+        
         # 创建支出记录
         expense = Expense(
             user_id=user_id,
             account_id=data['account_id'],
             amount=amount,
             category=data['category'],
+            category_id=taxonomy.category_id_for(user_id, data['category']),
             subcategory=data.get('subcategory', ''),
             description=data.get('description', ''),
             expense_date=expense_date,
             expense_type=data.get('expense_type', 'expense'),
-            tags=','.join(data.get('tags', [])) if data.get('tags') else '',
+            tags=','.join(tags),
             receipt_url=data.get('receipt_url', ''),
             is_reimbursable=data.get('is_reimbursable', False)
         )
         
         db.session.add(expense)
         
-        # 更新账户余额
-        if expense.expense_type == 'expense':
-            account.balance -= amount
-        else:  # income
-            account.balance += amount
+        # 写入标签关联（需要记录ID）
+        if tags:
+            db.session.flush()
+            taxonomy.set_expense_tags(user_id, expense.id, tags)
+        
+        # 更新账户余额（数据库端原子更新）
+        Account.adjust_balance(expense.account_id, Expense.balance_delta(expense.expense_type, amount))
+        
+        # 计入统计汇总和余额台账
+        rollups.add_expense(expense)
+        ledger.apply(rollups.snapshot(expense), 1)
+        
+        # 递增数据版本号，使缓存失效
+        bump_generation(user_id)
         
         db.session.commit()
         
@@ -166,6 +257,364 @@ def create_expense():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _iter_csv_rows(stream):
+    """逐行读取 CSV 请求体，首行为表头"""
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    for row in reader:
+        yield row
+
+def _iter_ndjson_rows(stream):
+    """逐行读取 NDJSON 请求体，每行一个 JSON 对象"""
+    for line in io.TextIOWrapper(stream, encoding='utf-8-sig'):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield ValueError('JSON 格式错误')
+
+def _parse_bulk_row(row, user_id, account_ids, today):
+    """校验并转换一行导入数据，校验失败时抛出 ValueError"""
+    if isinstance(row, Exception):
+        raise row
+    if not isinstance(row, dict):
+        raise ValueError('每行必须是一个对象')
+
+    for field in ['account_id', 'amount', 'category']:
+        if not row.get(field):
+            raise ValueError(f'{field} 是必填字段')
+
+    try:
+        account_id = int(row['account_id'])
+    except (TypeError, ValueError):
+        raise ValueError('账户ID格式错误')
+    if account_id not in account_ids:
+        raise ValueError('账户不存在')
+
+    amount = parse_amount(row['amount'])
+
+    expense_date = today
+    if row.get('expense_date'):
+        try:
+            expense_date = datetime.strptime(str(row['expense_date']), '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError('日期格式错误，请使用 YYYY-MM-DD')
+
+    expense_type = row.get('expense_type') or 'expense'
+    if expense_type not in ('expense', 'income'):
+        raise ValueError('收支类型必须是 expense 或 income')
+
+    tags = taxonomy.parse_tags(row.get('tags'))
+
+    is_reimbursable = row.get('is_reimbursable', False)
+    if isinstance(is_reimbursable, str):
+        is_reimbursable = is_reimbursable.strip().lower() in ('1', 'true', 'yes', 'y', '是')
+
+    now = datetime.utcnow()
+    return {
+        'user_id': user_id,
+        'account_id': account_id,
+        'amount': amount,
+        'category': str(row['category']),
+        'subcategory': row.get('subcategory') or '',
+        'description': row.get('description') or '',
+        'expense_date': expense_date,
+        'expense_type': expense_type,
+        'tags': ','.join(tags),
+        'receipt_url': row.get('receipt_url') or '',
+        'is_reimbursable': bool(is_reimbursable),
+        'created_at': now,
+        'updated_at': now
+    }
+
+IMPORT_READERS = {
+    'csv': _iter_csv_rows,
+    'ndjson': _iter_ndjson_rows
+}
+
+def _import_rows(user_id, rows, state=None, checkpoint=None):
+    """
+    逐批导入已解析的行，返回 state：已处理的行号 row、imported、failed 及 errors。
+    传入上次保存的 state 时跳过已处理的行（后台任务重试时从断点继续）；
+    每批写入后调用 checkpoint(state)，后台任务在其中提交事务，同步导入时由调用方统一提交
+    """
+    state = state or {'row': 0, 'imported': 0, 'failed': 0, 'errors': []}
+    
+    # 当前用户的账户和分类，只查询一次
+    account_ids = {
+        account_id for (account_id,) in
+        db.session.query(Account.id).filter_by(user_id=user_id).all()
+    }
+    category_ids = {
+        value: category_id for value, category_id in
+        db.session.query(Category.value, Category.id).filter_by(user_id=user_id).all()
+    }
+    
+    today = date.today()
+    balance_deltas = defaultdict(Decimal)
+    chunk = []
+    
+    def flush_chunk():
+        # 每批一次 executemany 插入，并合并计入统计汇总
+        for values in chunk:
+            values['category_id'] = category_ids.get(values['category'])
+        expense_ids = db.session.execute(
+            insert(Expense).returning(Expense.id, sort_by_parameter_order=True), chunk
+        ).scalars().all()
+        # 每批一次查询（或创建）标签，一次写入关联
+        names = {values['tags']: taxonomy.parse_tags(values['tags']) for values in chunk if values['tags']}
+        tag_ids = taxonomy.tag_ids_for(user_id, {name for tags in names.values() for name in tags})
+        taxonomy.link_tags([
+            (expense_id, tag_ids[name])
+            for expense_id, values in zip(expense_ids, chunk) if values['tags']
+            for name in names[values['tags']]
+        ])
+        snapshots = [rollups.snapshot_values(values) for values in chunk]
+        rollups.add_snapshots(snapshots)
+        ledger.add_snapshots(snapshots)
+        # 每批每个账户只更新一次余额，与记录一起提交
+        for account_id, delta in balance_deltas.items():
+            Account.adjust_balance(account_id, delta)
+        # 递增数据版本号，使缓存失效
+        bump_generation(user_id)
+        balance_deltas.clear()
+        chunk.clear()
+    
+    for row_number, row in enumerate(rows, start=1):
+        if row_number <= state['row']:
+            continue
+        state['row'] = row_number
+        
+        try:
+            values = _parse_bulk_row(row, user_id, account_ids, today)
+        except ValueError as e:
+            state['failed'] += 1
+            if len(state['errors']) < BULK_MAX_ERRORS:
+                state['errors'].append({'row': row_number, 'error': str(e)})
+            continue
+        
+        chunk.append(values)
+        balance_deltas[values['account_id']] += Expense.balance_delta(
+            values['expense_type'], values['amount']
+        )
+        state['imported'] += 1
+        
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            flush_chunk()
+            if checkpoint:
+                checkpoint(state)
+    
+    if chunk:
+        flush_chunk()
+    
+    return state
+
+def _import_message(state):
+    return f"成功导入 {state['imported']} 条记录" + (f"，{state['failed']} 条失败" if state['failed'] else '')
+
+@expenses_bp.route('/bulk', methods=['POST'])
+@jwt_required()
+def bulk_import_expenses():
+    """批量导入收支记录（流式解析 CSV 或 NDJSON），async=true 时保存文件后交由后台任务导入"""
+    try:
+        user_id = int(get_jwt_identity())
+        
+        # 根据 format 参数或 Content-Type 判断格式
+        import_format = request.args.get('format')
+        if not import_format:
+            import_format = 'csv' if request.mimetype in ('text/csv', 'application/csv') else 'ndjson'
+        if import_format not in IMPORT_READERS:
+            return jsonify({'error': '导入格式必须是 csv 或 ndjson'}), 400
+        
+        if request.args.get('async', 'false').lower() == 'true':
+            job = jobs.enqueue(user_id, 'import_expenses', {'format': import_format})
+            db.session.flush()
+            with open(jobs.job_path(job.id, '.upload'), 'wb') as f:
+                shutil.copyfileobj(request.stream, f)
+            db.session.commit()
+            return jsonify({
+                'message': '导入任务已提交',
+                'job': job.to_dict()
+            }), 202
+        
+        state = _import_rows(user_id, IMPORT_READERS[import_format](request.stream))
+        
+        db.session.commit()
+        
+        return jsonify({
+            'message': _import_message(state),
+            'imported': state['imported'],
+            'failed': state['failed'],
+            'errors': state['errors']
+        }), 201 if state['imported'] else 400
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@jobs.job_handler('import_expenses', submit=False)
+def _import_expenses_job(ctx):
+    """后台导入上传的文件，每批提交一次并保存断点"""
+    path = ctx.path('.upload')
+    state = ctx.state
+    if not state.get('done'):
+        size = os.path.getsize(path) or 1
+        with open(path, 'rb') as stream:
+            def checkpoint(state):
+                ctx.checkpoint(stream.tell() * 100 / size, f"已处理 {state['row']} 行", state)
+            
+            state = _import_rows(ctx.user_id, IMPORT_READERS[ctx.params['format']](stream), state or None, checkpoint)
+        # 全部写入后先提交，再删除上传的文件
+        state['done'] = True
+        ctx.checkpoint(99, _import_message(state), state)
+        os.remove(path)
+    
+    return {
+        'message': _import_message(state),
+        'imported': state['imported'],
+        'failed': state['failed'],
+        'errors': state['errors']
+    }
+
+def _export_value(value):
+    """导出字段转换为 JSON 可序列化的值"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+def _export_csv(batches, names):
+    """按批生成 CSV 文本"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # 写入 BOM，便于 Excel 正确识别中文
+    buffer.write('\ufeff')
+    writer.writerow(names)
+    for rows in batches:
+        writer.writerows([[_export_value(value) for value in row] for row in rows])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    yield buffer.getvalue()
+
+def _export_ndjson(batches, names):
+    """按批生成 NDJSON，每行一条记录"""
+    for rows in batches:
+        yield ''.join(
+            json.dumps(dict(zip(names, map(_export_value, row))), ensure_ascii=False) + '\n'
+            for row in rows
+        )
+
+def _export_columnar(batches, names):
+    """按批生成列式 JSON：{"columns": [...], "batches": [{"列名": [值...]}, ...]}"""
+    yield json.dumps({'columns': names}, ensure_ascii=False)[:-1] + ', "batches": ['
+    first = True
+    for rows in batches:
+        columns = {name: [_export_value(value) for value in values] for name, values in zip(names, zip(*rows))}
+        yield ('' if first else ', ') + json.dumps(columns, ensure_ascii=False)
+        first = False
+    yield ']}'
+
+EXPORT_FORMATS = {
+    'csv': (_export_csv, 'text/csv', 'csv'),
+    'ndjson': (_export_ndjson, 'application/x-ndjson', 'ndjson'),
+    'columnar': (_export_columnar, 'application/json', 'json')
+}
+
+@expenses_bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_expenses():
+    """流式导出收支记录（csv、ndjson 或列式 json），支持与列表相同的筛选参数"""
+    try:
+        user_id = int(get_jwt_identity())
+        
+        export_format = request.args.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f'导出格式必须是: {", ".join(EXPORT_FORMATS)}'}), 400
+        writer, mimetype, extension = EXPORT_FORMATS[export_format]
+        
+        try:
+            conditions = _expense_filters(user_id, request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # 只查询需要的列，不构造 ORM 对象
+        names = [name for name, _ in EXPORT_COLUMNS]
+        stmt = select(*[column for _, column in EXPORT_COLUMNS]).join(
+            Account, Account.id == Expense.account_id
+        ).where(*conditions).order_by(
+            desc(Expense.expense_date), desc(Expense.created_at), desc(Expense.id)
+        ).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        
+        def generate():
+            # 服务端游标按批读取，内存占用与总行数无关
+            result = db.session.execute(stmt)
+            try:
+                yield from writer(result.partitions(), names)
+            finally:
+                result.close()
+        
+        filename = f'expenses-{date.today().strftime("%Y%m%d")}.{extension}'
+        return Response(
+            stream_with_context(generate()),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _validate_export_job(user_id, params):
+    """导出任务参数：format 及与列表相同的筛选参数 filters（如 {"tag": ["出差"], "start_date": "2024-01-01"}）"""
+    if params.get('format', 'csv') not in EXPORT_FORMATS:
+        raise ValueError(f'导出格式必须是: {", ".join(EXPORT_FORMATS)}')
+    if not isinstance(params.get('filters') or {}, dict):
+        raise ValueError('filters 必须是对象')
+    _expense_filters(user_id, MultiDict(params.get('filters') or {}))
+
+@jobs.job_handler('export_expenses', validate=_validate_export_job)
+def _export_expenses_job(ctx):
+    """后台导出到文件，完成后通过 GET /api/jobs/<id>/download 下载"""
+    export_format = ctx.params.get('format', 'csv')
+    writer, _, extension = EXPORT_FORMATS[export_format]
+    conditions = _expense_filters(ctx.user_id, MultiDict(ctx.params.get('filters') or {}))
+    total = db.session.query(Expense.id).filter(*conditions).count()
+    
+    names = [name for name, _ in EXPORT_COLUMNS]
+    query = db.session.query(*[column for _, column in EXPORT_COLUMNS]).join(
+        Account, Account.id == Expense.account_id
+    ).filter(*conditions)
+    
+    def batches():
+        # 按游标分批查询，每批之间报告进度（不在提交时保持打开的读游标）
+        cursor = ''
+        exported = 0
+        while True:
+            rows, pagination = keyset_paginate(
+                query, [Expense.expense_date, Expense.created_at, Expense.id], cursor, EXPORT_BATCH_SIZE
+            )
+            yield rows
+            exported += len(rows)
+            if not pagination['has_next']:
+                return
+            ctx.checkpoint(exported * 100 / (total or 1), f'已导出 {exported} / {total} 条')
+            cursor = pagination['next_cursor']
+    
+    path = ctx.path('.' + extension)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for text in writer(batches(), names):
+            f.write(text)
+    
+    return {
+        'rows': total,
+        'size': os.path.getsize(path),
+        'filename': f'expenses-{date.today().strftime("%Y%m%d")}.{extension}',
+        'file': os.path.basename(path),
+        'mimetype': EXPORT_FORMATS[export_format][1]
+    }
+
 @expenses_bp.route('/<int:expense_id>', methods=['GET'])
 @jwt_required()
 def get_expense(expense_id):
@@ -181,14 +630,8 @@ def get_expense(expense_id):
         if not expense:
             return jsonify({'error': '记录不存在'}), 404
         
-        expense_dict = expense.to_dict()
         # 添加账户信息
-        if expense.account:
-            expense_dict['account'] = {
-                'id': expense.account.id,
-                'name': expense.account.name,
-                'account_type': expense.account.account_type
-            }
+        expense_dict = expense.to_dict(include_account=True)
         
         return jsonify({
             'expense': expense_dict
@@ -213,14 +656,12 @@ def update_expense(expense_id):
             return jsonify({'error': '记录不存在'}), 404
         
         data = request.get_json()
-        old_amount = expense.amount
-        old_type = expense.expense_type
-        old_account = expense.account
+        old_snapshot = rollups.snapshot(expense)
         
         # 更新字段
         if 'account_id' in data:
             # 验证新账户
-            new_account = Account.query.filter_by(
+            new_account = db.session.query(Account.id).filter_by(
                 id=data['account_id'],
                 user_id=user_id
             ).first()
@@ -230,15 +671,13 @@ def update_expense(expense_id):
         
         if 'amount' in data:
             try:
-                amount = Decimal(str(data['amount']))
-                if amount <= 0:
-                    return jsonify({'error': '金额必须大于0'}), 400
-                expense.amount = amount
-            except (ValueError, TypeError):
-                return jsonify({'error': '金额格式错误'}), 400
+                expense.amount = parse_amount(data['amount'])
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
         
         if 'category' in data:
             expense.category = data['category']
+            expense.category_id = taxonomy.category_id_for(user_id, data['category'])
         
         if 'subcategory' in data:
             expense.subcategory = data['subcategory']
@@ -256,7 +695,9 @@ def update_expense(expense_id):
             expense.expense_type = data['expense_type']
         
         if 'tags' in data:
-            expense.tags = ','.join(data['tags']) if data['tags'] else ''
+            tags = taxonomy.parse_tags(data['tags'])
+            expense.tags = ','.join(tags)
+            taxonomy.set_expense_tags(user_id, expense.id, tags)
         
         if 'receipt_url' in data:
             expense.receipt_url = data['receipt_url']
@@ -264,19 +705,23 @@ def update_expense(expense_id):
         if 'is_reimbursable' in data:
             expense.is_reimbursable = data['is_reimbursable']
         
-        # 更新账户余额
-        # 先撤销原来的影响
-        if old_type == 'expense':
-            old_account.balance += old_amount
+        # 更新账户余额：撤销原来的影响，再应用新的影响
+        old_delta = Expense.balance_delta(old_snapshot['expense_type'], old_snapshot['amount'])
+        new_delta = Expense.balance_delta(expense.expense_type, expense.amount)
+        if old_snapshot['account_id'] == expense.account_id:
+            Account.adjust_balance(expense.account_id, new_delta - old_delta)
         else:
-            old_account.balance -= old_amount
+            Account.adjust_balance(old_snapshot['account_id'], -old_delta)
+            Account.adjust_balance(expense.account_id, new_delta)
         
-        # 应用新的影响
-        current_account = expense.account
-        if expense.expense_type == 'expense':
-            current_account.balance -= expense.amount
-        else:
-            current_account.balance += expense.amount
+        # 更新统计汇总和余额台账
+        rollups.apply(old_snapshot, -1)
+        rollups.add_expense(expense)
+        ledger.apply(old_snapshot, -1)
+        ledger.apply(rollups.snapshot(expense), 1)
+        
+        # 递增数据版本号，使缓存失效
+        bump_generation(user_id)
         
         db.session.commit()
         
@@ -305,13 +750,17 @@ def delete_expense(expense_id):
             return jsonify({'error': '记录不存在'}), 404
         
         # 恢复账户余额
-        account = expense.account
-        if expense.expense_type == 'expense':
-            account.balance += expense.amount
-        else:
-            account.balance -= expense.amount
+        Account.adjust_balance(expense.account_id, -Expense.balance_delta(expense.expense_type, expense.amount))
+        
+        # 移出统计汇总和余额台账
+        rollups.remove_expense(expense)
+        ledger.apply(rollups.snapshot(expense), -1)
         
+        taxonomy.clear_expense_tags(expense.id)
         db.session.delete(expense)
+        # 递增数据版本号，使缓存失效
+        bump_generation(user_id)
+        
         db.session.commit()
         
         return jsonify({'message': '记录删除成功'}), 200
@@ -337,20 +786,7 @@ def get_categories():
         # 如果用户没有分类，返回默认分类
         if not categories:
             default_categories = [
-                {'value': 'food', 'label': '餐饮'},
-                {'value': 'transport', 'label': '交通'},
-                {'value': 'shopping', 'label': '购物'},
-                {'value': 'entertainment', 'label': '娱乐'},
-                {'value': 'healthcare', 'label': '医疗'},
-                {'value': 'education', 'label': '教育'},
-                {'value': 'housing', 'label': '住房'},
-                {'value': 'utilities', 'label': '水电费'},
-                {'value': 'communication', 'label': '通讯'},
-                {'value': 'insurance', 'label': '保险'},
-                {'value': 'investment', 'label': '投资'},
-                {'value': 'salary', 'label': '工资'},
-                {'value': 'bonus', 'label': '奖金'},
-                {'value': 'other', 'label': '其他'}
+                {'value': value, 'label': label} for value, label, _ in taxonomy.DEFAULT_CATEGORIES
             ]
             return jsonify({'categories': default_categories}), 200
         
@@ -0,0 +1,195 @@
+from flask import Blueprint, request, jsonify, send_file
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import Job
+from database import db
+from datetime import datetime
+import os
+import jobs
+import conditional
+
+jobs_bp = Blueprint('jobs', __name__)
+# 任务状态由 worker 更新，不递增用户数据版本，轮询时不能按版本号返回 304
+conditional.exempt(jobs_bp)
+
+# 任务列表最多返回的条数
+JOB_LIST_LIMIT = 50
+
+def _get_user_job(job_id, user_id):
+    return Job.query.filter_by(id=job_id, user_id=user_id).first()
+
+@jobs_bp.route('/', methods=['GET'])
+@jwt_required()
+def get_jobs():
+    """获取当前用户最近的任务"""
+    try:
+        user_id = int(get_jwt_identity())
+        
+        query = Job.query.filter_by(user_id=user_id)
+        status = request.args.get('status')
+        if status:
+            query = query.filter_by(status=status)
+        job_type = request.args.get('type')
+        if job_type:
+            query = query.filter_by(job_type=job_type)
+        
+        job_list = query.order_by(Job.created_at.desc(), Job.id.desc()).limit(JOB_LIST_LIMIT).all()
+        
+        return jsonify({
+            'jobs': [job.to_dict() for job in job_list]
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@jobs_bp.route('/types', methods=['GET'])
+@jwt_required()
+def get_job_types():
+    """可通过本接口提交的任务类型"""
+    return jsonify({
+        'types': [
+            {'value': job_type, 'description': (entry['handler'].__doc__ or '').strip()}
+            for job_type, entry in jobs.JOB_HANDLERS.items() if entry['submit']
+        ]
+    }), 200
+
+@jobs_bp.route('/', methods=['POST'])
+@jwt_required()
+def create_job():
+    """提交任务"""
+    try:
+        user_id = int(get_jwt_identity())
+        data = request.get_json() or {}
+        
+        job_type = data.get('type')
+        if not job_type:
+            return jsonify({'error': 'type 是必填字段'}), 400
+        
+        entry = jobs.JOB_HANDLERS.get(job_type)
+        if entry is None or not entry['submit']:
+            return jsonify({'error': f'不支持的任务类型: {job_type}'}), 400
+        
+        params = data.get('params') or {}
+        if not isinstance(params, dict):
+            return jsonify({'error': 'params 必须是对象'}), 400
+        if entry['validate']:
+            try:
+                entry['validate'](user_id, params)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        
+        job = jobs.enqueue(user_id, job_type, params)
+        db.session.commit()
+        
+        return jsonify({
+            'message': '任务已提交',
+            'job': job.to_dict()
+        }), 202
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@jobs_bp.route('/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    """获取任务状态和进度"""
+    try:
+        user_id = int(get_jwt_identity())
+        
+        job = _get_user_job(job_id, user_id)
+        if not job:
+            return jsonify({'error': '任务不存在'}), 404
+        
+        return jsonify({'job': job.to_dict()}), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@jobs_bp.route('/<int:job_id>/cancel', methods=['POST'])
+@jwt_required()
+def cancel_job(job_id):
+    """取消尚未开始执行的任务"""
+    try:
+        user_id = int(get_jwt_identity())
+        
+        # 条件更新，避免与 worker 领取任务冲突
+        updated = Job.query.filter_by(id=job_id, user_id=user_id, status='pending').update({
+            'status': 'cancelled',
+            'message': '已取消',
+            'finished_at': datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+        
+        if not updated:
+            job = _get_user_job(job_id, user_id)
+            if not job:
+                return jsonify({'error': '任务不存在'}), 404
+            return jsonify({'error': '只能取消等待执行的任务'}), 400
+        
+        return jsonify({
+            'message': '任务已取消',
+            'job': _get_user_job(job_id, user_id).to_dict()
+        }), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@jobs_bp.route('/<int:job_id>/retry', methods=['POST'])
+@jwt_required()
+def retry_job(job_id):
+    """重新执行失败或已取消的任务（保留断点，从上次提交的进度继续）"""
+    try:
+        user_id = int(get_jwt_identity())
+        
+        job = _get_user_job(job_id, user_id)
+        if not job:
+            return jsonify({'error': '任务不存在'}), 404
+        
+        if job.status not in ('failed', 'cancelled'):
+            return jsonify({'error': '只能重试失败或已取消的任务'}), 400
+        
+        job.status = 'pending'
+        job.attempts = 0
+        job.run_after = datetime.utcnow()
+        job.finished_at = None
+        job.message = '等待重试'
+        db.session.commit()
+        
+        return jsonify({
+            'message': '任务已重新提交',
+            'job': job.to_dict()
+        }), 202
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@jobs_bp.route('/<int:job_id>/download', methods=['GET'])
+@jwt_required()
+def download_job_file(job_id):
+    """下载任务生成的文件（如导出结果）"""
+    try:
+        user_id = int(get_jwt_identity())
+        
+        job = _get_user_job(job_id, user_id)
+        if not job:
+            return jsonify({'error': '任务不存在'}), 404
+        
+        result = job.to_dict()['result'] or {}
+        if job.status != 'succeeded' or not result.get('file'):
+            return jsonify({'error': '任务没有可下载的文件'}), 404
+        
+        path = os.path.join(jobs.job_dir(), os.path.basename(result['file']))
+        if not os.path.exists(path):
+            return jsonify({'error': '文件已过期清理'}), 404
+        
+        return send_file(
+            path,
+            mimetype=result.get('mimetype'),
+            as_attachment=True,
+            download_name=result.get('filename') or result['file']
+        )
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,90 @@
+"""
+游标（keyset）分页工具
+游标为排序列取值的 base64 编码，翻页时按排序列比较定位，无需 COUNT(*) 和 OFFSET 扫描
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from sqlalchemy import tuple_, literal
+
+
+# 列表接口每页最多返回的条数
+MAX_PER_PAGE = 100
+
+
+class CursorError(ValueError):
+    """游标格式错误"""
+
+
+def get_per_page(args, default=20):
+    """读取 per_page 参数：小于 1 时抛出 ValueError，超过 MAX_PER_PAGE 时按上限处理"""
+    per_page = args.get('per_page', default, type=int)
+    if per_page < 1:
+        raise ValueError('per_page 必须大于 0')
+    return min(per_page, MAX_PER_PAGE)
+
+
+def encode_cursor(values):
+    """将排序列取值编码为不透明的游标字符串"""
+    payload = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """解码游标，按排序列的类型还原取值"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw.decode('utf-8'))
+        if not isinstance(payload, list) or len(payload) != len(columns):
+            raise CursorError('游标格式错误')
+
+        values = []
+        for column, value in zip(columns, payload):
+            python_type = column.type.python_type
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif python_type is date:
+                value = date.fromisoformat(value)
+            elif python_type is int:
+                value = int(value)
+            values.append(value)
+        return values
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise CursorError('游标格式错误') from e
+
+
+def keyset_paginate(query, columns, cursor, per_page, with_total=False):
+    """
+    按 columns 倒序进行游标分页
+    columns 需能唯一确定一行（最后一列通常为主键），cursor 为空时从第一页开始
+    返回 (items, pagination)
+    """
+    if per_page < 1:
+        raise ValueError('per_page 必须大于 0')
+
+    total = query.order_by(None).count() if with_total else None
+
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        bound = [literal(value, type_=column.type) for column, value in zip(columns, values)]
+        query = query.filter(tuple_(*columns) < tuple_(*bound))
+
+    rows = query.order_by(*[column.desc() for column in columns]).limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    items = rows[:per_page]
+
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+
+    pagination = {
+        'per_page': per_page,
+        'next_cursor': next_cursor,
+        'has_next': has_next
+    }
+    if with_total:
+        pagination['total'] = total
+    return items, pagination
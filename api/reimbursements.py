@@ -2,7 +2,13 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import Reimbursement, Expense
 from database import db
-from sqlalchemy import desc, and_
+from cache import bump_generation
+import fulltext
+from money import parse_amount
+from api.pagination import keyset_paginate, get_per_page, CursorError
+from api.serializers import reimbursement_rows_query, reimbursement_row_dict
+from sqlalchemy import desc, and_, select
+from sqlalchemy.orm import joinedload, selectinload
 from datetime import datetime, date
 
 reimbursements_bp = Blueprint('reimbursements', __name__)
@@ -16,17 +22,22 @@ def get_reimbursements():
         
         # 获取查询参数
         page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        try:
+            per_page = get_per_page(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         status = request.args.get('status')
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         search = request.args.get('search')
+        cursor = request.args.get('cursor')  # 传入 cursor 参数（可为空）即启用游标分页
+        with_total = request.args.get('with_total', 'false').lower() == 'true'
         
-        # 构建查询
-        query = Reimbursement.query.filter_by(user_id=user_id)
+        # 构建查询（只查询列表所需的列，不构造 ORM 对象）
+        query = reimbursement_rows_query(db.session).filter(Reimbursement.user_id == user_id)
         
         if status:
-            query = query.filter_by(status=status)
+            query = query.filter(Reimbursement.status == status)
         
         if start_date:
             try:
@@ -42,23 +53,41 @@ def get_reimbursements():
             except ValueError:
                 return jsonify({'error': '结束日期格式错误，请使用 YYYY-MM-DD'}), 400
         
+        # 关键词检索：优先使用全文索引，页码分页时按相关度排序
+        ranked = None
         if search:
-            query = query.filter(
-                Reimbursement.title.contains(search) |
-                Reimbursement.description.contains(search)
+            matched = fulltext.match_subquery('reimbursements_fts', search)
+            if matched is None:
+                query = query.filter(
+                    Reimbursement.title.contains(search) |
+                    Reimbursement.description.contains(search)
+                )
+            elif cursor is None:
+                ranked = matched
+                query = query.join(ranked, ranked.c.id == Reimbursement.id)
+            else:
+                query = query.filter(Reimbursement.id.in_(select(matched.c.id)))
+        
+        # 游标分页：按 (创建时间, ID) 定位，不统计总数
+        if cursor is not None:
+            try:
+                items, pagination_info = keyset_paginate(
+                    query,
+                    [Reimbursement.created_at, Reimbursement.id],
+                    cursor, per_page, with_total=with_total
+                )
+            except CursorError as e:
+                return jsonify({'error': str(e)}), 400
+        else:
+            # 排序和分页
+            if ranked is not None:
+                query = query.order_by(ranked.c.rank)
+            query = query.order_by(desc(Reimbursement.created_at))
+            pagination = query.paginate(
+                page=page, per_page=per_page, error_out=False
             )
-        
-        # 排序和分页
-        query = query.order_by(desc(Reimbursement.created_at))
-        pagination = query.paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-        
-        reimbursements = [reimbursement.to_dict() for reimbursement in pagination.items]
-        
-        return jsonify({
-            'reimbursements': reimbursements,
-            'pagination': {
+            items = pagination.items
+            pagination_info = {
                 'page': page,
                 'per_page': per_page,
                 'total': pagination.total,
@@ -66,6 +95,12 @@ def get_reimbursements():
                 'has_next': pagination.has_next,
                 'has_prev': pagination.has_prev
             }
+        
+        reimbursements = [reimbursement_row_dict(row) for row in items]
+        
+        return jsonify({
+            'reimbursements': reimbursements,
+            'pagination': pagination_info
         }), 200
         
     except Exception as e:
@@ -102,8 +137,11 @@ def create_reimbursement():
         if len(expenses) != len(expense_ids):
             return jsonify({'error': '部分支出记录不存在、不可报销或已被其他报销申请关联'}), 400
         
-        # 计算总金额
-        total_amount = sum(expense.amount for expense in expenses)
+        # 计算总金额（多笔大额支出之和可能超出整数分范围）
+        try:
+            total_amount = parse_amount(sum(expense.amount for expense in expenses))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # 处理提交日期
         submit_date = date.today()
@@ -129,6 +167,9 @@ def create_reimbursement():
         for expense in expenses:
             expense.reimbursement_id = reimbursement.id
         
+        # 递增数据版本号，使缓存失效
+        bump_generation(user_id)
+        
         db.session.commit()
         
         return jsonify({
@@ -147,7 +188,9 @@ def get_reimbursement(reimbursement_id):
     try:
         user_id = int(get_jwt_identity())
         
-        reimbursement = Reimbursement.query.filter_by(
+        reimbursement = Reimbursement.query.options(
+            selectinload(Reimbursement.expenses)
+        ).filter_by(
             id=reimbursement_id,
             user_id=user_id
         ).first()
@@ -230,7 +273,13 @@ def update_reimbursement(reimbursement_id):
                 expense.reimbursement_id = reimbursement.id
             
             # 重新计算总金额
-            reimbursement.total_amount = sum(expense.amount for expense in expenses)
+            try:
+                reimbursement.total_amount = parse_amount(sum(expense.amount for expense in expenses))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        
+        # 递增数据版本号，使缓存失效
+        bump_generation(user_id)
         
         db.session.commit()
         
@@ -267,6 +316,9 @@ def delete_reimbursement(reimbursement_id):
             expense.reimbursement_id = None
         
         db.session.delete(reimbursement)
+        # 递增数据版本号，使缓存失效
+        bump_generation(user_id)
+        
         db.session.commit()
         
         return jsonify({'message': '报销申请删除成功'}), 200
@@ -304,6 +356,9 @@ def approve_reimbursement(reimbursement_id):
         reimbursement.approve_date = date.today()
         reimbursement.approver_notes = notes
         
+        # 递增数据版本号，使缓存失效
+        bump_generation(user_id)
+        
         db.session.commit()
         
         return jsonify({
@@ -334,6 +389,9 @@ def pay_reimbursement(reimbursement_id):
             return jsonify({'error': '只有已通过的申请可以标记为已支付'}), 400
         
         reimbursement.status = 'paid'
+        # 递增数据版本号，使缓存失效
+        bump_generation(user_id)
+        
         db.session.commit()
         
         return jsonify({
@@ -352,7 +410,7 @@ def get_available_expenses():
     try:
         user_id = int(get_jwt_identity())
         
-        expenses = Expense.query.filter(
+        expenses = Expense.query.options(joinedload(Expense.account)).filter(
             and_(
                 Expense.user_id == user_id,
                 Expense.is_reimbursable == True,
@@ -360,17 +418,8 @@ def get_available_expenses():
             )
         ).order_by(desc(Expense.expense_date)).all()
         
-        expenses_data = []
-        for expense in expenses:
-            expense_dict = expense.to_dict()
-            # 添加账户信息
-            if expense.account:
-                expense_dict['account'] = {
-                    'id': expense.account.id,
-                    'name': expense.account.name,
-                    'account_type': expense.account.account_type
-                }
-            expenses_data.append(expense_dict)
+        # 添加账户信息
+        expenses_data = [expense.to_dict(include_account=True) for expense in expenses]
         
         return jsonify({
             'expenses': expenses_data
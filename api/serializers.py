@@ -0,0 +1,106 @@
+"""
+列表接口的行序列化
+直接查询所需的列并将结果行转换为字典，不构造 ORM 对象；
+金额、日期保持数据库取出的原始类型，由应用的 JSON 提供者统一编码
+"""
+
+from sqlalchemy import select
+from models import Account, Expense, Reimbursement
+from money import yuan
+
+
+def _account_column(column, label):
+    """账户字段的关联子查询：不连接 accounts 表，分页统计总数时可直接走 expenses 的覆盖索引"""
+    return select(column).where(
+        Account.id == Expense.account_id
+    ).correlate(Expense).scalar_subquery().label(label)
+
+
+# 收支记录列表的查询列（含账户摘要）；金额在 SQL 中由分换算为元，直接得到浮点数
+EXPENSE_ROW_COLUMNS = (
+    Expense.id,
+    Expense.user_id,
+    Expense.account_id,
+    yuan(Expense.amount).label('amount'),
+    Expense.category,
+    Expense.category_id,
+    Expense.subcategory,
+    Expense.description,
+    Expense.expense_date,
+    Expense.expense_type,
+    Expense.tags,
+    Expense.receipt_url,
+    Expense.is_reimbursable,
+    Expense.reimbursement_id,
+    Expense.created_at,
+    _account_column(Account.name, 'account_name'),
+    _account_column(Account.account_type, 'account_type')
+)
+
+# 报销申请列表的查询列
+REIMBURSEMENT_ROW_COLUMNS = (
+    Reimbursement.id,
+    Reimbursement.user_id,
+    Reimbursement.title,
+    Reimbursement.description,
+    yuan(Reimbursement.total_amount).label('total_amount'),
+    Reimbursement.status,
+    Reimbursement.submit_date,
+    Reimbursement.approve_date,
+    Reimbursement.approver_notes,
+    Reimbursement.created_at,
+    Reimbursement.expense_count
+)
+
+
+def expense_rows_query(session):
+    """收支记录行查询，需与 expense_row_dict 配合使用"""
+    return session.query(*EXPENSE_ROW_COLUMNS)
+
+
+def expense_row_dict(row):
+    """与 Expense.to_dict(include_account=True) 输出相同的字段"""
+    return {
+        'id': row.id,
+        'user_id': row.user_id,
+        'account_id': row.account_id,
+        'amount': row.amount,
+        'category': row.category,
+        'category_id': row.category_id,
+        'subcategory': row.subcategory,
+        'description': row.description,
+        'expense_date': row.expense_date,
+        'expense_type': row.expense_type,
+        'tags': row.tags.split(',') if row.tags else [],
+        'receipt_url': row.receipt_url,
+        'is_reimbursable': row.is_reimbursable,
+        'reimbursement_id': row.reimbursement_id,
+        'created_at': row.created_at,
+        'account': {
+            'id': row.account_id,
+            'name': row.account_name,
+            'account_type': row.account_type
+        }
+    }
+
+
+def reimbursement_rows_query(session):
+    """报销申请行查询，需与 reimbursement_row_dict 配合使用"""
+    return session.query(*REIMBURSEMENT_ROW_COLUMNS)
+
+
+def reimbursement_row_dict(row):
+    """与 Reimbursement.to_dict() 输出相同的字段"""
+    return {
+        'id': row.id,
+        'user_id': row.user_id,
+        'title': row.title,
+        'description': row.description,
+        'total_amount': row.total_amount,
+        'status': row.status,
+        'submit_date': row.submit_date,
+        'approve_date': row.approve_date,
+        'approver_notes': row.approver_notes,
+        'created_at': row.created_at,
+        'expense_count': row.expense_count or 0
+    }
@@ -1,15 +1,94 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import User, Account, Expense, Reimbursement
+from models import User, Account, Expense, Reimbursement, ExpenseDailyRollup
 from database import db
-from sqlalchemy import func, and_, extract
+from cache import cached_response
+from money import cents, cents_to_float
+from sqlalchemy import func, and_, extract, case
+from sqlalchemy.orm import joinedload
 from datetime import datetime, date, timedelta
 from collections import defaultdict
 
 statistics_bp = Blueprint('statistics', __name__)
 
+# 仪表板最近交易条数上限
+DASHBOARD_MAX_RECENT = 50
+
+def _total_balance(user_id):
+    """活跃账户总余额（分）"""
+    return Account.query.filter_by(
+        user_id=user_id,
+        is_active=True
+    ).with_entities(
+        func.sum(cents(Account.balance))
+    ).scalar() or 0
+
+def _period_start(period):
+    """统计区间的开始日期：month 本月、year 本年，all 返回 None"""
+    today = date.today()
+    if period == 'month':
+        return today.replace(day=1)
+    if period == 'year':
+        return today.replace(month=1, day=1)
+    return None
+
+def _type_sum(expense_type, column=None, since=None):
+    """条件聚合：只累加指定收支类型（及 since 之后日期）的汇总值，无记录时为 0；默认累加金额（分）"""
+    if column is None:
+        column = cents(ExpenseDailyRollup.total_amount)
+    condition = ExpenseDailyRollup.expense_type == expense_type
+    if since is not None:
+        condition = and_(condition, ExpenseDailyRollup.rollup_date >= since)
+    return func.coalesce(func.sum(case((condition, column), else_=0)), 0)
+
+def _reimbursement_summary(user_id):
+    """按状态汇总报销申请的数量和金额"""
+    reimbursement_stats = db.session.query(
+        Reimbursement.status,
+        func.count(Reimbursement.id).label('count'),
+        func.sum(cents(Reimbursement.total_amount)).label('amount')
+    ).filter_by(user_id=user_id).group_by(Reimbursement.status).all()
+    
+    reimbursement_summary = {
+        'pending': {'count': 0, 'amount': 0},
+        'approved': {'count': 0, 'amount': 0},
+        'rejected': {'count': 0, 'amount': 0},
+        'paid': {'count': 0, 'amount': 0}
+    }
+    
+    for status, count, amount in reimbursement_stats:
+        reimbursement_summary[status] = {
+            'count': count,
+            'amount': cents_to_float(amount)
+        }
+    return reimbursement_summary
+
+def _category_list(category_stats):
+    """将 (分类, 金额（分）, 笔数) 列表转换为带百分比的分类数据，返回 (分类列表, 总金额（元）)"""
+    categories = []
+    total_amount = 0
+    
+    for category, amount, count in category_stats:
+        amount_float = cents_to_float(amount)
+        total_amount += amount_float
+        categories.append({
+            'category': category,
+            'amount': amount_float,
+            'count': count,
+            'percentage': 0  # 稍后计算
+        })
+    
+    # 计算百分比
+    for category_data in categories:
+        if total_amount > 0:
+            category_data['percentage'] = round(
+                (category_data['amount'] / total_amount) * 100, 2
+            )
+    return categories, total_amount
+
 @statistics_bp.route('/overview', methods=['GET'])
 @jwt_required()
+@cached_response
 def get_overview():
     """获取总览统计数据"""
     try:
@@ -19,69 +98,39 @@ def get_overview():
         period = request.args.get('period', 'month')  # month, year, all
         
         # 计算时间范围
-        today = date.today()
-        if period == 'month':
-            start_date = today.replace(day=1)
-        elif period == 'year':
-            start_date = today.replace(month=1, day=1)
-        else:  # all
-            start_date = None
-        
-        # 构建基础查询
-        expense_query = Expense.query.filter_by(user_id=user_id)
+        start_date = _period_start(period)
+        
+        # 一次扫描汇总表得到支出、收入和交易笔数，账户总余额作为标量子查询一并取回
+        balance_subquery = db.session.query(
+            func.coalesce(func.sum(cents(Account.balance)), 0)
+        ).filter(
+            Account.user_id == user_id,
+            Account.is_active.is_(True)
+        ).scalar_subquery()
+        
+        totals_query = db.session.query(
+            _type_sum('expense').label('total_expenses'),
+            _type_sum('income').label('total_income'),
+            func.coalesce(func.sum(ExpenseDailyRollup.txn_count), 0).label('transaction_count'),
+            balance_subquery.label('total_balance')
+        ).filter(ExpenseDailyRollup.user_id == user_id)
         if start_date:
-            expense_query = expense_query.filter(Expense.expense_date >= start_date)
-        
-        # 总支出
-        total_expenses = expense_query.filter_by(expense_type='expense').with_entities(
-            func.sum(Expense.amount)
-        ).scalar() or 0
+            totals_query = totals_query.filter(ExpenseDailyRollup.rollup_date >= start_date)
         
-        # 总收入
-        total_income = expense_query.filter_by(expense_type='income').with_entities(
-            func.sum(Expense.amount)
-        ).scalar() or 0
+        total_expenses, total_income, transaction_count, total_balance = totals_query.one()
         
         # 净收入
         net_income = total_income - total_expenses
         
-        # 账户总余额
-        total_balance = Account.query.filter_by(
-            user_id=user_id,
-            is_active=True
-        ).with_entities(
-            func.sum(Account.balance)
-        ).scalar() or 0
-        
-        # 交易笔数
-        transaction_count = expense_query.count()
-        
         # 报销统计
-        reimbursement_stats = db.session.query(
-            Reimbursement.status,
-            func.count(Reimbursement.id).label('count'),
-            func.sum(Reimbursement.total_amount).label('amount')
-        ).filter_by(user_id=user_id).group_by(Reimbursement.status).all()
-        
-        reimbursement_summary = {
-            'pending': {'count': 0, 'amount': 0},
-            'approved': {'count': 0, 'amount': 0},
-            'rejected': {'count': 0, 'amount': 0},
-            'paid': {'count': 0, 'amount': 0}
-        }
-        
-        for status, count, amount in reimbursement_stats:
-            reimbursement_summary[status] = {
-                'count': count,
-                'amount': float(amount or 0)
-            }
+        reimbursement_summary = _reimbursement_summary(user_id)
         
         return jsonify({
             'period': period,
-            'total_expenses': float(total_expenses),
-            'total_income': float(total_income),
-            'net_income': float(net_income),
-            'total_balance': float(total_balance),
+            'total_expenses': cents_to_float(total_expenses),
+            'total_income': cents_to_float(total_income),
+            'net_income': cents_to_float(net_income),
+            'total_balance': cents_to_float(total_balance),
             'transaction_count': transaction_count,
             'reimbursement_summary': reimbursement_summary
         }), 200
@@ -89,8 +138,74 @@ def get_overview():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@statistics_bp.route('/dashboard', methods=['GET'])
+@jwt_required()
+@cached_response
+def get_dashboard():
+    """获取首页数据：本月概览、最近交易和本月支出分类，一次请求返回"""
+    try:
+        user_id = int(get_jwt_identity())
+        # 限制在 1 到 DASHBOARD_MAX_RECENT 之间，避免 recent=-1（不限条数）加载全部记录
+        recent_limit = max(1, min(request.args.get('recent', 5, type=int), DASHBOARD_MAX_RECENT))
+        
+        # 本月按收支类型、分类一次汇总，概览和分类分析共用
+        month_start = date.today().replace(day=1)
+        month_stats = ExpenseDailyRollup.query.filter(
+            ExpenseDailyRollup.user_id == user_id,
+            ExpenseDailyRollup.rollup_date >= month_start
+        ).with_entities(
+            ExpenseDailyRollup.expense_type,
+            ExpenseDailyRollup.category,
+            func.sum(cents(ExpenseDailyRollup.total_amount)).label('amount'),
+            func.sum(ExpenseDailyRollup.txn_count).label('count')
+        ).group_by(
+            ExpenseDailyRollup.expense_type,
+            ExpenseDailyRollup.category
+        ).all()
+        
+        totals = defaultdict(int)
+        transaction_count = 0
+        expense_categories = []
+        for expense_type, category, amount, count in month_stats:
+            totals[expense_type] += amount or 0
+            transaction_count += count or 0
+            if expense_type == 'expense':
+                expense_categories.append((category, amount or 0, count or 0))
+        
+        expense_categories.sort(key=lambda row: row[1], reverse=True)
+        categories, total_amount = _category_list(expense_categories)
+        
+        # 最近交易（一并加载账户信息）
+        recent = Expense.query.options(joinedload(Expense.account)).filter_by(
+            user_id=user_id
+        ).order_by(
+            Expense.expense_date.desc(), Expense.created_at.desc()
+        ).limit(recent_limit).all()
+        
+        return jsonify({
+            'overview': {
+                'period': 'month',
+                'total_expenses': cents_to_float(totals['expense']),
+                'total_income': cents_to_float(totals['income']),
+                'net_income': cents_to_float(totals['income'] - totals['expense']),
+                'total_balance': cents_to_float(_total_balance(user_id)),
+                'transaction_count': transaction_count,
+                'reimbursement_summary': _reimbursement_summary(user_id)
+            },
+            'recent_transactions': [expense.to_dict(include_account=True) for expense in recent],
+            'category_analysis': {
+                'categories': categories,
+                'total_amount': total_amount,
+                'expense_type': 'expense'
+            }
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @statistics_bp.route('/category-analysis', methods=['GET'])
 @jwt_required()
+@cached_response
 def get_category_analysis():
     """获取分类分析数据"""
     try:
@@ -102,7 +217,7 @@ def get_category_analysis():
         expense_type = request.args.get('type', 'expense')
         
         # 构建查询
-        query = Expense.query.filter_by(
+        query = ExpenseDailyRollup.query.filter_by(
             user_id=user_id,
             expense_type=expense_type
         )
@@ -110,45 +225,27 @@ def get_category_analysis():
         if start_date:
             try:
                 start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
-                query = query.filter(Expense.expense_date >= start_date_obj)
+                query = query.filter(ExpenseDailyRollup.rollup_date >= start_date_obj)
             except ValueError:
                 return jsonify({'error': '开始日期格式错误'}), 400
         
         if end_date:
             try:
                 end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
-                query = query.filter(Expense.expense_date <= end_date_obj)
+                query = query.filter(ExpenseDailyRollup.rollup_date <= end_date_obj)
             except ValueError:
                 return jsonify({'error': '结束日期格式错误'}), 400
         
         # 按分类统计
         category_stats = query.with_entities(
-            Expense.category,
-            func.sum(Expense.amount).label('total_amount'),
-            func.count(Expense.id).label('count')
-        ).group_by(Expense.category).order_by(
-            func.sum(Expense.amount).desc()
+            ExpenseDailyRollup.category,
+            func.sum(cents(ExpenseDailyRollup.total_amount)).label('total_amount'),
+            func.sum(ExpenseDailyRollup.txn_count).label('count')
+        ).group_by(ExpenseDailyRollup.category).order_by(
+            func.sum(cents(ExpenseDailyRollup.total_amount)).desc()
         ).all()
         
-        categories = []
-        total_amount = 0
-        
-        for category, amount, count in category_stats:
-            amount_float = float(amount)
-            total_amount += amount_float
-            categories.append({
-                'category': category,
-                'amount': amount_float,
-                'count': count,
-                'percentage': 0  # 稍后计算
-            })
-        
-        # 计算百分比
-        for category_data in categories:
-            if total_amount > 0:
-                category_data['percentage'] = round(
-                    (category_data['amount'] / total_amount) * 100, 2
-                )
+        categories, total_amount = _category_list(category_stats)
         
         return jsonify({
             'categories': categories,
@@ -161,6 +258,7 @@ def get_category_analysis():
 
 @statistics_bp.route('/trend-analysis', methods=['GET'])
 @jwt_required()
+@cached_response
 def get_trend_analysis():
     """获取趋势分析数据"""
     try:
@@ -175,45 +273,46 @@ def get_trend_analysis():
         start_date = end_date - timedelta(days=months * 30)
         
         # 构建查询
-        query = Expense.query.filter(
+        rollup = ExpenseDailyRollup
+        query = rollup.query.filter(
             and_(
-                Expense.user_id == user_id,
-                Expense.expense_date >= start_date,
-                Expense.expense_date <= end_date
+                rollup.user_id == user_id,
+                rollup.rollup_date >= start_date,
+                rollup.rollup_date <= end_date
             )
         )
         
         if period == 'day':
             # 按天统计
             trend_data = query.with_entities(
-                Expense.expense_date,
-                Expense.expense_type,
-                func.sum(Expense.amount).label('amount')
+                rollup.rollup_date,
+                rollup.expense_type,
+                func.sum(cents(rollup.total_amount)).label('amount')
             ).group_by(
-                Expense.expense_date,
-                Expense.expense_type
-            ).order_by(Expense.expense_date).all()
+                rollup.rollup_date,
+                rollup.expense_type
+            ).order_by(rollup.rollup_date).all()
         elif period == 'month':
             # 按月统计
             trend_data = query.with_entities(
-                extract('year', Expense.expense_date).label('year'),
-                extract('month', Expense.expense_date).label('month'),
-                Expense.expense_type,
-                func.sum(Expense.amount).label('amount')
+                extract('year', rollup.rollup_date).label('year'),
+                extract('month', rollup.rollup_date).label('month'),
+                rollup.expense_type,
+                func.sum(cents(rollup.total_amount)).label('amount')
             ).group_by(
-                extract('year', Expense.expense_date),
-                extract('month', Expense.expense_date),
-                Expense.expense_type
+                extract('year', rollup.rollup_date),
+                extract('month', rollup.rollup_date),
+                rollup.expense_type
             ).order_by('year', 'month').all()
         else:  # year
             # 按年统计
             trend_data = query.with_entities(
-                extract('year', Expense.expense_date).label('year'),
-                Expense.expense_type,
-                func.sum(Expense.amount).label('amount')
+                extract('year', rollup.rollup_date).label('year'),
+                rollup.expense_type,
+                func.sum(cents(rollup.total_amount)).label('amount')
             ).group_by(
-                extract('year', Expense.expense_date),
-                Expense.expense_type
+                extract('year', rollup.rollup_date),
+                rollup.expense_type
             ).order_by('year').all()
         
         # 处理数据
@@ -223,15 +322,15 @@ def get_trend_analysis():
             if period == 'day':
                 key = row[0].isoformat()
                 expense_type = row[1]
-                amount = float(row[2])
+                amount = cents_to_float(row[2])
             elif period == 'month':
                 key = f"{int(row[0])}-{int(row[1]):02d}"
                 expense_type = row[2]
-                amount = float(row[3])
+                amount = cents_to_float(row[3])
             else:  # year
                 key = str(int(row[0]))
                 expense_type = row[1]
-                amount = float(row[2])
+                amount = cents_to_float(row[2])
             
             trend_dict[key][expense_type] = amount
         
@@ -256,36 +355,54 @@ def get_trend_analysis():
 
 @statistics_bp.route('/account-analysis', methods=['GET'])
 @jwt_required()
+@cached_response
 def get_account_analysis():
     """获取账户分析数据"""
     try:
         user_id = int(get_jwt_identity())
         
-        # 获取所有活跃账户
-        accounts = Account.query.filter_by(
-            user_id=user_id,
-            is_active=True
+        # 收支流水的统计区间：month, year, all（交易笔数始终为全部记录）
+        period = request.args.get('period', 'month')
+        start_date = _period_start(period)
+        
+        # 按账户一次分组汇总交易笔数和区间内的收支，查询次数与账户数量无关
+        rollup = ExpenseDailyRollup
+        account_stats = db.session.query(
+            rollup.account_id,
+            func.sum(rollup.txn_count).label('transaction_count'),
+            _type_sum('income', since=start_date).label('income'),
+            _type_sum('expense', since=start_date).label('expense')
+        ).filter(rollup.user_id == user_id).group_by(rollup.account_id).subquery()
+        
+        # 活跃账户左连接汇总结果，没有交易的账户也会返回
+        rows = db.session.query(
+            Account,
+            func.coalesce(account_stats.c.transaction_count, 0),
+            func.coalesce(account_stats.c.income, 0),
+            func.coalesce(account_stats.c.expense, 0)
+        ).outerjoin(
+            account_stats, account_stats.c.account_id == Account.id
+        ).filter(
+            Account.user_id == user_id,
+            Account.is_active.is_(True)
         ).all()
         
         account_data = []
         total_balance = 0
         
-        for account in accounts:
+        for account, transaction_count, income, expense in rows:
             balance = float(account.balance)
             total_balance += balance
             
-            # 获取该账户的交易统计
-            expense_count = Expense.query.filter_by(
-                user_id=user_id,
-                account_id=account.id
-            ).count()
-            
             account_data.append({
                 'id': account.id,
                 'name': account.name,
                 'account_type': account.account_type,
                 'balance': balance,
-                'transaction_count': expense_count,
+                'transaction_count': transaction_count,
+                'period_income': cents_to_float(income),
+                'period_expense': cents_to_float(expense),
+                'period_net': cents_to_float(income - expense),
                 'percentage': 0  # 稍后计算
             })
         
@@ -301,7 +418,8 @@ def get_account_analysis():
         
         return jsonify({
             'accounts': account_data,
-            'total_balance': total_balance
+            'total_balance': total_balance,
+            'period': period
         }), 200
         
     except Exception as e:
@@ -309,6 +427,7 @@ def get_account_analysis():
 
 @statistics_bp.route('/monthly-summary', methods=['GET'])
 @jwt_required()
+@cached_response
 def get_monthly_summary():
     """获取月度汇总数据"""
     try:
@@ -325,67 +444,66 @@ def get_monthly_summary():
         else:
             end_date = date(year, month + 1, 1) - timedelta(days=1)
         
-        # 基础查询
-        base_query = Expense.query.filter(
+        # 按日期、分类一次扫描汇总表，收入、支出用条件聚合分列，
+        # 月合计、分类支出和每日数据都由这一组结果计算
+        rollup = ExpenseDailyRollup
+        month_stats = db.session.query(
+            rollup.rollup_date,
+            rollup.category,
+            _type_sum('income').label('income'),
+            _type_sum('expense').label('expense'),
+            _type_sum('expense', rollup.txn_count).label('expense_count')
+        ).filter(
             and_(
-                Expense.user_id == user_id,
-                Expense.expense_date >= start_date,
-                Expense.expense_date <= end_date
+                rollup.user_id == user_id,
+                rollup.rollup_date >= start_date,
+                rollup.rollup_date <= end_date
             )
-        )
-        
-        # 收入支出统计
-        income_total = base_query.filter_by(expense_type='income').with_entities(
-            func.sum(Expense.amount)
-        ).scalar() or 0
-        
-        expense_total = base_query.filter_by(expense_type='expense').with_entities(
-            func.sum(Expense.amount)
-        ).scalar() or 0
-        
-        # 按分类统计支出
-        category_expenses = base_query.filter_by(expense_type='expense').with_entities(
-            Expense.category,
-            func.sum(Expense.amount).label('amount')
-        ).group_by(Expense.category).order_by(
-            func.sum(Expense.amount).desc()
-        ).all()
-        
-        # 按日统计
-        daily_stats = base_query.with_entities(
-            Expense.expense_date,
-            Expense.expense_type,
-            func.sum(Expense.amount).label('amount')
         ).group_by(
-            Expense.expense_date,
-            Expense.expense_type
-        ).order_by(Expense.expense_date).all()
+            rollup.rollup_date,
+            rollup.category
+        ).all()
         
-        # 处理每日数据
+        income_total = 0
+        expense_total = 0
+        category_totals = defaultdict(int)
         daily_data = defaultdict(lambda: {'income': 0, 'expense': 0})
-        for expense_date, expense_type, amount in daily_stats:
-            daily_data[expense_date.isoformat()][expense_type] = float(amount)
+        for expense_date, category, income, expense, expense_count in month_stats:
+            income_total += income
+            expense_total += expense
+            if expense_count:
+                category_totals[category] += expense
+            
+            # 处理每日数据
+            day = daily_data[expense_date.isoformat()]
+            day['income'] += income
+            day['expense'] += expense
+        
+        # 按金额从高到低排列分类支出
+        category_expenses = sorted(
+            category_totals.items(), key=lambda item: item[1], reverse=True
+        )
         
         daily_list = []
         for day_str in sorted(daily_data.keys()):
             data = daily_data[day_str]
             daily_list.append({
                 'date': day_str,
-                'income': data['income'],
-                'expense': data['expense'],
-                'net': data['income'] - data['expense']
+                'income': cents_to_float(data['income']),
+                'expense': cents_to_float(data['expense']),
+                'net': cents_to_float(data['income'] - data['expense'])
             })
         
         return jsonify({
             'year': year,
             'month': month,
             'summary': {
-                'total_income': float(income_total),
-                'total_expense': float(expense_total),
-                'net_income': float(income_total - expense_total)
+                'total_income': cents_to_float(income_total),
+                'total_expense': cents_to_float(expense_total),
+                'net_income': cents_to_float(income_total - expense_total)
             },
             'category_expenses': [
-                {'category': cat, 'amount': float(amount)}
+                {'category': cat, 'amount': cents_to_float(amount)}
                 for cat, amount in category_expenses
             ],
             'daily_data': daily_list
@@ -5,6 +5,13 @@ from datetime import datetime
 import os
 from dotenv import load_dotenv
 from database import db, init_db
+from cache import init_cache
+from conditional import init_conditional_get
+from json_provider import init_json
+from compression import init_compression
+from assets import init_assets, asset_url
+from instrumentation import init_instrumentation
+from metrics import init_metrics
 
 # 加载环境变量
 load_dotenv()
@@ -16,14 +23,49 @@ app = Flask(__name__, static_folder='static', template_folder='templates')
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///cash_management.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLITE_PROFILE'] = os.getenv('SQLITE_PROFILE', 'default')  # default, production
+app.config['STATS_CACHE_BACKEND'] = os.getenv('STATS_CACHE_BACKEND', 'memory')  # memory, sqlite, none
+app.config['STATS_CACHE_SIZE'] = int(os.getenv('STATS_CACHE_SIZE', 1024))
+app.config['STATS_CACHE_PATH'] = os.getenv('STATS_CACHE_PATH', '')  # sqlite 后端的缓存文件，默认 instance/stats_cache.db
+app.config['JSON_PROVIDER'] = os.getenv('JSON_PROVIDER', 'auto')  # auto, orjson, stdlib
+app.config['COMPRESS_ENABLED'] = os.getenv('COMPRESS_ENABLED', 'True').lower() == 'true'
+app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', 1024))  # 小于该字节数的响应不压缩
+app.config['COMPRESS_LEVEL'] = int(os.getenv('COMPRESS_LEVEL', 6))
+app.config['INSTRUMENTATION_ENABLED'] = os.getenv('INSTRUMENTATION_ENABLED', 'False').lower() == 'true'  # 响应附带 Server-Timing
+app.config['SLOW_QUERY_MS'] = float(os.getenv('SLOW_QUERY_MS', 0))  # 超过该毫秒数的 SQL 写入日志，0 表示关闭
+app.config['PROFILE_ADMINS'] = [name.strip() for name in os.getenv('PROFILE_ADMINS', '').split(',') if name.strip()]
+app.config['PROFILE_DIR'] = os.getenv('PROFILE_DIR', '')  # 剖析结果目录，默认 instance/profiles
+app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', 'False').lower() == 'true'  # /metrics 接口（启用后注册性能观测钩子）
+app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN', '')  # 抓取 /metrics 所需的 Bearer 令牌，为空时只允许本机访问
+app.config['METRICS_PATH'] = os.getenv('METRICS_PATH', '')  # 多 worker 共享的指标文件，默认 instance/metrics.db
+app.config['METRICS_FLUSH_INTERVAL'] = float(os.getenv('METRICS_FLUSH_INTERVAL', 1.0))  # worker 写入共享文件的间隔（秒）
+app.config['METRICS_WORKER_TTL'] = float(os.getenv('METRICS_WORKER_TTL', 300))  # 超过该秒数未写入的 worker 合并为 retired
+app.config['JOB_DIR'] = os.getenv('JOB_DIR', '')  # 后台任务文件目录（导入上传、导出结果），默认 instance/jobs
+app.config['JOB_POLL_INTERVAL'] = float(os.getenv('JOB_POLL_INTERVAL', 1.0))  # worker 没有任务时的轮询间隔（秒）
+app.config['JOB_MAX_ATTEMPTS'] = int(os.getenv('JOB_MAX_ATTEMPTS', 3))  # 任务最多执行次数
+app.config['JOB_RETRY_DELAY'] = float(os.getenv('JOB_RETRY_DELAY', 10))  # 首次重试的等待秒数，之后逐次加倍
+app.config['JOB_TIMEOUT'] = int(os.getenv('JOB_TIMEOUT', 600))  # 执行中的任务超过该秒数未报告进度时重新排队
+app.config['JOB_RETENTION_DAYS'] = int(os.getenv('JOB_RETENTION_DAYS', 7))  # 已结束任务及其文件的保留天数
 app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key')
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', 86400))
 
 # 初始化扩展
+init_json(app)
+init_compression(app)  # 最先注册，压缩在其他响应钩子之后执行
 init_db(app)
+init_instrumentation(app)  # 在其他 before_request 钩子之前注册，钩子中的查询也计入请求
+init_metrics(app)
+init_cache(app)
+init_conditional_get(app)
+init_assets(app)
 jwt = JWTManager(app)
 CORS(app)
 
+# 模板中通过 asset_url('js/app.js') 引用静态文件，构建后自动使用带哈希的地址
+@app.context_processor
+def inject_asset_url():
+    return {'asset_url': lambda filename: asset_url(app, filename)}
+
 # 路由
 @app.route('/')
 def index():
@@ -46,6 +88,8 @@ from api.expenses import expenses_bp
 from api.reimbursements import reimbursements_bp
 from api.statistics import statistics_bp
 from api.categories import categories_bp
+from api.batch import batch_bp
+from api.jobs import jobs_bp
 
 # 注册蓝图
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -54,6 +98,25 @@ app.register_blueprint(expenses_bp, url_prefix='/api/expenses')
 app.register_blueprint(reimbursements_bp, url_prefix='/api/reimbursements')
 app.register_blueprint(statistics_bp, url_prefix='/api/statistics')
 app.register_blueprint(categories_bp, url_prefix='/api/categories')
+app.register_blueprint(batch_bp, url_prefix='/api/batch')
+app.register_blueprint(jobs_bp, url_prefix='/api/jobs')
+
+# 初始化全文检索索引（表已存在时创建 FTS5 索引和同步触发器）
+from fulltext import init_fulltext
+from money import legacy_money_columns
+import taxonomy
+import ledger
+with app.app_context():
+    init_fulltext()
+    # 旧数据库的金额仍以元存储，按分读取会相差 100 倍
+    legacy_columns = legacy_money_columns(db.engine)
+    if legacy_columns:
+        app.logger.error('金额字段 %s 尚未迁移为整数分，请先运行 python migrate_money_cents.py',
+                         ', '.join(legacy_columns))
+    if taxonomy.needs_migration(db.engine):
+        app.logger.error('收支记录尚未建立分类和标签关联，请先运行 python migrate_category_tags.py')
+    if ledger.needs_rebuild():
+        app.logger.error('账户余额台账为空，余额走势不可用，请先运行 python rebuild_ledger.py')
 
 # 模型已在database.py中初始化
 
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+静态资源指纹模块
+build_static.py 将 static 下的文件按内容哈希复制到 static/dist 并生成清单，
+模板通过 asset_url() 引用带哈希的地址，这些地址的内容永不变化，可长期缓存
+"""
+
+import json
+import os
+from flask import request, url_for
+
+# 带哈希文件的输出目录（相对 static 目录）及清单文件名
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# 带哈希地址的缓存策略
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def manifest_path(static_folder):
+    """清单文件路径"""
+    return os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+
+
+def load_manifest(static_folder):
+    """读取清单（原路径 -> 带哈希路径），未构建时返回空清单"""
+    try:
+        with open(manifest_path(static_folder), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def init_assets(app):
+    """加载清单并为带哈希的静态文件设置长期缓存"""
+    app.extensions['asset_manifest'] = load_manifest(app.static_folder)
+
+    @app.after_request
+    def cache_fingerprinted(response):
+        filename = (request.view_args or {}).get('filename', '')
+        if (request.endpoint == 'static'
+                and filename.startswith(DIST_DIR + '/')
+                and response.status_code in (200, 304)):
+            response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+
+def asset_url(app, filename):
+    """
+    静态文件地址：清单中有对应的带哈希文件时返回带哈希地址，否则返回原地址；
+    原文件在构建后被修改时也返回原地址，避免引用过期内容
+    """
+    hashed = app.extensions.get('asset_manifest', {}).get(filename)
+    if hashed:
+        source = os.path.join(app.static_folder, filename)
+        target = os.path.join(app.static_folder, hashed)
+        try:
+            if os.path.getmtime(target) >= os.path.getmtime(source):
+                return url_for('static', filename=hashed)
+        except OSError:
+            pass
+    return url_for('static', filename=filename)
@@ -0,0 +1,9 @@
+"""
+性能基准测试
+- datagen: 通过批量插入生成模拟账本（用户 × 账户 × 年份 × 报销申请）
+- scenarios: 覆盖 api/*.py 各接口的请求场景
+- runner: 通过 Flask 测试客户端或多进程 gunicorn 测量延迟分位数和吞吐量
+- compare: 比较两次结果，检查性能回退
+
+用法见 python -m benchmarks --help
+"""
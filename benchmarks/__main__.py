@@ -0,0 +1,174 @@
+"""
+基准测试命令行
+  python -m benchmarks generate --db bench.db --users 3 --years 2
+  python -m benchmarks run --db bench.db --mode all --output results.json
+  python -m benchmarks compare old.json new.json
+
+比较 SQLite 连接配置（database.SQLITE_PROFILES）时，用 --sqlite-profile 分别运行后 compare：
+  python -m benchmarks run --mode server --sqlite-profile default --output default.json
+  python -m benchmarks run --mode server --sqlite-profile production --output production.json
+  python -m benchmarks compare default.json production.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from database import SQLITE_PROFILES
+
+
+def _configure_env(db_path, stats_cache, sqlite_profile='default'):
+    """应用在导入时读取配置，需在导入 app 之前设置环境变量"""
+    env = os.environ.copy()
+    env['DATABASE_URL'] = 'sqlite:///' + os.path.abspath(db_path)
+    env['STATS_CACHE_BACKEND'] = stats_cache
+    env['SQLITE_PROFILE'] = sqlite_profile
+    env['METRICS_PATH'] = os.path.join(os.path.dirname(os.path.abspath(db_path)), 'metrics.db')
+    env['JOB_DIR'] = os.path.join(os.path.dirname(os.path.abspath(db_path)), 'jobs')
+    env['DEBUG'] = 'False'
+    os.environ.update(env)
+    return env
+
+
+def _add_dataset_arguments(parser):
+    parser.add_argument('--users', type=int, default=3, help='用户数')
+    parser.add_argument('--accounts', type=int, default=3, help='每个用户的账户数')
+    parser.add_argument('--years', type=int, default=2, help='每个用户的记录年数')
+    parser.add_argument('--per-day', type=int, default=3, help='每天平均收支笔数')
+    parser.add_argument('--reimbursements', type=int, default=40, help='每个用户的报销申请数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+
+
+def _generate(args, db_path):
+    _configure_env(db_path, 'none')
+    from app import app
+    from benchmarks.datagen import generate
+
+    with app.app_context():
+        summary = generate(
+            users=args.users, accounts=args.accounts, years=args.years,
+            per_day=args.per_day, reimbursements=args.reimbursements, seed=args.seed
+        )
+    print(f"已生成: {summary}")
+
+
+def cmd_generate(args):
+    if os.path.exists(args.db):
+        if not args.force:
+            sys.exit(f'{args.db} 已存在，使用 --force 覆盖')
+        os.remove(args.db)
+    _generate(args, args.db)
+
+
+def cmd_run(args):
+    from benchmarks import runner
+
+    if not os.path.exists(args.db):
+        print(f"{args.db} 不存在，按指定规模生成数据...")
+        # 应用在导入时绑定数据库，在子进程中生成，使本进程的应用使用下面的副本
+        subprocess.run([
+            sys.executable, '-m', 'benchmarks', 'generate', '--db', args.db,
+            '--users', str(args.users), '--accounts', str(args.accounts), '--years', str(args.years),
+            '--per-day', str(args.per_day), '--reimbursements', str(args.reimbursements),
+            '--seed', str(args.seed)
+        ], cwd=PROJECT_ROOT, check=True)
+
+    # 写接口会修改数据，在副本上运行以保证每次结果可比
+    workdir = tempfile.mkdtemp(prefix='bench-')
+    db_copy = os.path.join(workdir, 'bench.db')
+    shutil.copyfile(args.db, db_copy)
+    env = _configure_env(db_copy, args.stats_cache, args.sqlite_profile)
+
+    try:
+        from app import app
+
+        scenarios = runner.select_scenarios(args.only)
+        missing = runner.uncovered_endpoints(app)
+        if missing:
+            print("以下接口没有基准场景: " + ', '.join(missing))
+
+        output = {
+            'meta': {
+                'environment': runner.environment_info(),
+                'dataset': runner.dataset_info(args.db),
+                'options': {
+                    'iterations': args.iterations, 'warmup': args.warmup,
+                    'stats_cache': args.stats_cache, 'sqlite_profile': args.sqlite_profile,
+                    'only': args.only
+                }
+            }
+        }
+
+        if args.mode in ('inprocess', 'all'):
+            print(f"测试客户端（每个场景 {args.iterations} 次）:")
+            output['inprocess'] = runner.run_inprocess(app, scenarios, args.iterations, args.warmup)
+
+        if args.mode in ('server', 'all'):
+            print(f"gunicorn（{args.workers} 个 worker，{args.concurrency} 个并发客户端，{args.duration} 秒）:")
+            output['server'] = runner.run_server(
+                env, scenarios, args.workers, args.concurrency, args.duration
+            )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {args.output}")
+
+
+def cmd_compare(args):
+    from benchmarks.compare import compare
+
+    regressions = compare(args.old, args.new, args.threshold, args.min_delta)
+    if regressions:
+        print(f"发现 {len(regressions)} 项性能回退")
+        sys.exit(1)
+    print("未发现性能回退")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='性能基准测试')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    generate_parser = subparsers.add_parser('generate', help='生成基准数据库')
+    generate_parser.add_argument('--db', default='bench.db', help='基准数据库文件')
+    generate_parser.add_argument('--force', action='store_true', help='覆盖已存在的数据库')
+    _add_dataset_arguments(generate_parser)
+    generate_parser.set_defaults(func=cmd_generate)
+
+    run_parser = subparsers.add_parser('run', help='运行基准测试')
+    run_parser.add_argument('--db', default='bench.db', help='基准数据库文件，不存在时自动生成')
+    run_parser.add_argument('--mode', choices=['inprocess', 'server', 'all'], default='inprocess')
+    run_parser.add_argument('--iterations', type=int, default=50, help='测试客户端模式下每个场景的次数')
+    run_parser.add_argument('--warmup', type=int, default=5, help='每个场景的预热次数')
+    run_parser.add_argument('--workers', type=int, default=4, help='gunicorn worker 数')
+    run_parser.add_argument('--concurrency', type=int, default=8, help='并发客户端进程数')
+    run_parser.add_argument('--duration', type=int, default=10, help='并发压测时长（秒）')
+    run_parser.add_argument('--stats-cache', default='none', choices=['none', 'memory', 'sqlite'],
+                            help='统计接口缓存后端，默认关闭以测量实际查询')
+    run_parser.add_argument('--sqlite-profile', default='default', choices=sorted(SQLITE_PROFILES),
+                            help='SQLite 连接配置（SQLITE_PROFILE），分别运行后用 compare 对比')
+    run_parser.add_argument('--only', nargs='*', help='只运行名称以这些前缀开头的场景')
+    run_parser.add_argument('--output', default='benchmark-results.json', help='结果文件')
+    _add_dataset_arguments(run_parser)
+    run_parser.set_defaults(func=cmd_run)
+
+    compare_parser = subparsers.add_parser('compare', help='比较两次结果')
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.1, help='回退阈值（相对变化）')
+    compare_parser.add_argument('--min-delta', type=float, default=0.5, help='回退的最小绝对差值（毫秒）')
+    compare_parser.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+结果比较
+对比两次基准测试结果中相同场景的延迟，超过阈值的视为性能回退
+"""
+
+import json
+
+# 参与比较的指标
+METRICS = ('p50_ms', 'p95_ms')
+
+
+def _flatten(results):
+    """{(模式, 场景): 统计}"""
+    rows = {}
+    for name, stats in results.get('inprocess', {}).items():
+        rows[('inprocess', name)] = stats
+    server = results.get('server', {})
+    for name, stats in server.get('scenarios', {}).items():
+        rows[('server', name)] = stats
+    # 并发压测的整体吞吐量（比较 SQLite 连接配置时主要看这一行）
+    if server.get('total'):
+        rows[('server', 'total')] = server['total']
+    return rows
+
+
+def _label(results):
+    """结果标识：提交哈希及 SQLite 连接配置"""
+    meta = results['meta']
+    profile = meta.get('options', {}).get('sqlite_profile') or 'default'
+    return f"{meta['environment'].get('commit')} (SQLITE_PROFILE={profile})"
+
+
+def compare(old_path, new_path, threshold=0.1, min_delta_ms=0.5, log=print):
+    """
+    比较两个结果文件，返回回退的 (模式, 场景, 指标, 旧值, 新值) 列表；
+    新值超过旧值的 (1 + threshold) 倍且差值不小于 min_delta_ms 时视为回退
+    """
+    with open(old_path, encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)
+
+    log(f"旧: {_label(old)}  新: {_label(new)}")
+    if old['meta'].get('dataset') != new['meta'].get('dataset'):
+        log("注意: 两次测试的数据规模不同")
+
+    old_rows, new_rows = _flatten(old), _flatten(new)
+    regressions = []
+    for key in sorted(old_rows.keys() & new_rows.keys()):
+        parts = []
+        for metric in METRICS:
+            before, after = old_rows[key][metric], new_rows[key][metric]
+            if before is None or after is None:
+                continue
+            change = (after - before) / before if before else 0
+            parts.append(f"{metric} {before:8.2f} -> {after:8.2f} ({change:+6.1%})")
+            if after > before * (1 + threshold) and after - before >= min_delta_ms:
+                regressions.append((key[0], key[1], metric, before, after))
+        # 吞吐量和错误数只展示，不参与回退判断
+        if key[0] == 'server':
+            parts.append(f"rps {old_rows[key]['rps'] or 0:8.1f} -> {new_rows[key]['rps'] or 0:8.1f}")
+        if old_rows[key].get('errors') or new_rows[key].get('errors'):
+            parts.append(f"错误 {old_rows[key].get('errors', 0)} -> {new_rows[key].get('errors', 0)}")
+        mark = ' !' if any(r[:2] == key for r in regressions) else ''
+        log(f"{key[0]:9s} {key[1]:32s} " + '  '.join(parts) + mark)
+
+    for key in sorted(old_rows.keys() - new_rows.keys()):
+        log(f"{key[0]:9s} {key[1]:32s} 新结果中不存在")
+
+    return regressions
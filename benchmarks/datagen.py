@@ -0,0 +1,234 @@
+"""
+模拟数据生成
+按用户 × 账户 × 年份生成收支记录和报销申请，主键在内存中分配，全部使用批量插入写入，
+写入后重建每日汇总表和全文索引，账户余额与收支记录保持一致
+"""
+
+import random
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from sqlalchemy import insert, update, text
+from werkzeug.security import generate_password_hash
+from database import db
+from models import User, Account, Expense, Reimbursement
+from rollups import rebuild_rollups
+from ledger import rebuild_ledger
+import taxonomy
+from fulltext import init_fulltext
+
+# 所有模拟用户的密码
+DEFAULT_PASSWORD = 'bench123'
+
+# 每批插入的行数
+INSERT_CHUNK_SIZE = 5000
+
+ACCOUNT_TYPES = ['cash', 'bank', 'credit_card', 'alipay', 'wechat', 'other']
+
+# 各分类单笔金额范围
+AMOUNT_RANGES = {
+    'food': (8, 120),
+    'transport': (2, 80),
+    'shopping': (20, 800),
+    'entertainment': (30, 400),
+    'healthcare': (20, 1500),
+    'education': (50, 3000),
+    'housing': (1000, 6000),
+    'utilities': (50, 500),
+    'communication': (30, 200),
+    'insurance': (100, 2000),
+    'investment': (100, 5000),
+    'salary': (8000, 30000),
+    'bonus': (500, 20000),
+    'other': (5, 500)
+}
+
+# 分类: (值, 名称, 类型, 该分类单笔金额范围)，与新用户的默认分类一致
+CATEGORIES = [
+    (value, label, category_type, AMOUNT_RANGES[value])
+    for value, label, category_type in taxonomy.DEFAULT_CATEGORIES
+]
+
+# 描述词表（含中文，便于测试全文检索）
+DESCRIPTIONS = {
+    'food': ['午餐 工作餐', '晚餐 聚餐', '早餐 咖啡', '超市 生鲜', '外卖 订餐'],
+    'transport': ['地铁 通勤', '出租车 打车', '高铁 出差', '加油 停车费'],
+    'shopping': ['网购 日用品', '服装 换季', '电子产品 配件', '家居 用品'],
+    'entertainment': ['电影票', '演唱会 门票', '游戏 充值', '健身房 月卡'],
+    'healthcare': ['门诊 挂号', '药店 买药', '体检 套餐'],
+    'education': ['在线课程', '书籍 教材', '培训 报名费'],
+    'housing': ['房租', '物业费', '维修 费用'],
+    'utilities': ['电费', '水费', '燃气费', '宽带费'],
+    'communication': ['话费 充值', '流量 套餐'],
+    'insurance': ['医疗保险', '车险 续保'],
+    'investment': ['基金 定投', '理财 赎回'],
+    'salary': ['月度 工资'],
+    'bonus': ['季度 奖金', '年终奖'],
+    'other': ['红包', '杂项 支出', '礼物']
+}
+
+TAGS = ['工作', '家庭', '出差', '必要', '可选', '旅行', '节日']
+
+REIMBURSEMENT_STATUSES = ['pending', 'approved', 'rejected', 'paid']
+
+
+def _chunks(rows, size=INSERT_CHUNK_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _bulk_insert(model, rows):
+    """分批批量插入"""
+    for chunk in _chunks(rows):
+        db.session.execute(insert(model), chunk)
+
+
+def _bulk_update(model, rows):
+    """按主键分批批量更新"""
+    for chunk in _chunks(rows):
+        db.session.execute(update(model), chunk)
+
+
+def _random_amount(rnd, low, high):
+    """金额取对数均匀分布，小额交易更多"""
+    value = low * (high / low) ** rnd.random()
+    return Decimal(str(round(value, 2)))
+
+
+def generate(users=3, accounts=3, years=2, per_day=3, reimbursements=40, seed=42,
+             end_date=None, log=print):
+    """
+    生成模拟账本，需在应用上下文中对空数据库调用
+    users: 用户数；accounts: 每个用户的账户数；years: 每个用户的记录年数；
+    per_day: 每天平均收支笔数；reimbursements: 每个用户的报销申请数
+    返回各表生成的行数
+    """
+    rnd = random.Random(seed)
+    end_date = end_date or date.today()
+    start_date = end_date - timedelta(days=365 * years - 1)
+    now = datetime.utcnow()
+
+    db.create_all()
+    if db.session.query(User.id).first() is not None:
+        raise RuntimeError('数据库中已有数据，请使用新的数据库文件')
+
+    expense_categories = [c for c in CATEGORIES if c[2] in ('expense', 'both')]
+    password_hash = generate_password_hash(DEFAULT_PASSWORD)
+
+    user_rows, account_rows = [], []
+    expense_rows, reimbursement_rows, links = [], [], []
+    balances = {}
+    expense_id = reimbursement_id = 0
+
+    for user_index in range(users):
+        user_id = user_index + 1
+        user_rows.append({
+            'id': user_id,
+            'username': f'bench{user_id}',
+            'email': f'bench{user_id}@example.com',
+            'name': f'测试用户{user_id}',
+            'password_hash': password_hash,
+            'is_active': True,
+            'created_at': now,
+            'updated_at': now
+        })
+
+        account_ids = []
+        for account_index in range(accounts):
+            account_id = len(account_rows) + 1
+            account_type = ACCOUNT_TYPES[account_index % len(ACCOUNT_TYPES)]
+            opening = Decimal(str(rnd.randint(1000, 50000)))
+            balances[account_id] = opening
+            account_ids.append(account_id)
+            account_rows.append({
+                'id': account_id, 'user_id': user_id,
+                'name': f'{account_type}-{account_index + 1}', 'account_type': account_type,
+                'balance': opening, 'description': '', 'is_active': True,
+                'created_at': now, 'updated_at': now
+            })
+
+        # 收支记录：每月 10 日发工资，其余为随机日常收支
+        reimbursable = []
+        current = start_date
+        while current <= end_date:
+            entries = []
+            if current.day == 10:
+                entries.append(CATEGORIES[11])
+            for _ in range(rnd.randint(0, per_day * 2)):
+                entries.append(rnd.choice(expense_categories) if rnd.random() < 0.95 else CATEGORIES[12])
+
+            for value, _, category_type, (low, high) in entries:
+                expense_id += 1
+                expense_type = 'income' if category_type == 'income' else 'expense'
+                amount = _random_amount(rnd, low, high)
+                account_id = rnd.choice(account_ids)
+                balances[account_id] += Expense.balance_delta(expense_type, amount)
+                is_reimbursable = expense_type == 'expense' and rnd.random() < 0.1
+                created_at = datetime.combine(current, time(rnd.randint(7, 22), rnd.randint(0, 59), rnd.randint(0, 59)))
+                expense_rows.append({
+                    'id': expense_id, 'user_id': user_id, 'account_id': account_id,
+                    'amount': amount, 'category': value, 'subcategory': '',
+                    'description': rnd.choice(DESCRIPTIONS[value]),
+                    'expense_date': current, 'expense_type': expense_type,
+                    'tags': ','.join(rnd.sample(TAGS, rnd.randint(0, 2))),
+                    'receipt_url': '', 'is_reimbursable': is_reimbursable,
+                    'reimbursement_id': None, 'created_at': created_at, 'updated_at': created_at
+                })
+                if is_reimbursable:
+                    reimbursable.append((expense_id, amount, current))
+            current += timedelta(days=1)
+
+        # 报销申请：每份关联 1~5 笔可报销记录，剩余记录保持未报销
+        rnd.shuffle(reimbursable)
+        position = 0
+        for _ in range(reimbursements):
+            group = reimbursable[position:position + rnd.randint(1, 5)]
+            if not group:
+                break
+            position += len(group)
+            reimbursement_id += 1
+            status = rnd.choice(REIMBURSEMENT_STATUSES)
+            submit_date = max(item[2] for item in group)
+            created_at = datetime.combine(submit_date, time(18, 0)) + timedelta(seconds=reimbursement_id)
+            reimbursement_rows.append({
+                'id': reimbursement_id, 'user_id': user_id,
+                'title': f'报销申请 {reimbursement_id}', 'description': '出差 差旅 报销',
+                'total_amount': sum(item[1] for item in group), 'status': status,
+                'submit_date': submit_date,
+                'approve_date': submit_date + timedelta(days=3) if status != 'pending' else None,
+                'approver_notes': '', 'created_at': created_at, 'updated_at': created_at
+            })
+            links.extend({'id': item[0], 'reimbursement_id': reimbursement_id} for item in group)
+
+    log(f"写入 {len(user_rows)} 个用户、{len(account_rows)} 个账户、"
+        f"{len(expense_rows)} 条收支记录、{len(reimbursement_rows)} 份报销申请...")
+
+    # 账户余额 = 期初余额 + 全部收支
+    for row in account_rows:
+        row['balance'] = balances[row['id']]
+
+    _bulk_insert(User, user_rows)
+    _bulk_insert(Account, account_rows)
+    _bulk_insert(Reimbursement, reimbursement_rows)
+    _bulk_insert(Expense, expense_rows)
+    _bulk_update(Expense, links)
+    db.session.commit()
+
+    log("初始化默认分类，重建汇总表、余额台账、标签关联和全文索引...")
+    # 与注册和迁移脚本相同的方式初始化分类，并关联收支记录
+    _, category_count = taxonomy.provision_default_categories()
+    rebuild_rollups()
+    rebuild_ledger()
+    taxonomy.rebuild_expense_tags()
+    db.session.commit()
+    init_fulltext(rebuild=True)
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+
+    return {
+        'users': len(user_rows),
+        'accounts': len(account_rows),
+        'categories': category_count,
+        'expenses': len(expense_rows),
+        'reimbursements': len(reimbursement_rows),
+        'reimbursed_expenses': len(links)
+    }
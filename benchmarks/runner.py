@@ -0,0 +1,351 @@
+"""
+基准测试执行
+- inprocess: 通过 Flask 测试客户端逐个场景串行测量，不含网络开销
+- server: 启动多 worker 的 gunicorn，多个客户端进程并发请求，测量真实部署下的延迟和吞吐量
+结果为 JSON，包含提交哈希、环境、数据规模及各场景的延迟分位数
+"""
+
+import http.client
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime
+from urllib.parse import urlencode
+from benchmarks.datagen import DEFAULT_PASSWORD
+from benchmarks.scenarios import SCENARIOS
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 报告的延迟分位数
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(sorted_values, pct):
+    """线性插值分位数，sorted_values 需已排序"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(latencies, errors, elapsed=None):
+    """汇总延迟（秒）为毫秒统计，elapsed 为墙钟时间，未提供时按延迟之和计算吞吐量"""
+    values = sorted(latencies)
+    total = elapsed if elapsed is not None else sum(values)
+    result = {
+        'count': len(values),
+        'errors': errors,
+        'mean_ms': round(sum(values) / len(values) * 1000, 3) if values else None,
+        'min_ms': round(values[0] * 1000, 3) if values else None,
+        'max_ms': round(values[-1] * 1000, 3) if values else None,
+        'rps': round(len(values) / total, 1) if total else None
+    }
+    for pct in PERCENTILES:
+        value = percentile(values, pct)
+        result[f'p{pct}_ms'] = round(value * 1000, 3) if value is not None else None
+    return result
+
+
+class BaseSession:
+    """场景使用的会话：以基准用户身份发送请求，ids 为该用户已有数据的 ID"""
+
+    username = 'bench1'
+
+    def __init__(self):
+        self.token = None
+        self.ids = {}
+
+    def request(self, method, path, params=None, json=None, data=None, content_type=None, token=None):
+        """发送请求，返回 (状态码, 响应体)"""
+        raise NotImplementedError
+
+    def call(self, method, path, params=None, json=None, data=None, content_type=None, token=None):
+        """token 为 None 使用基准用户令牌，False 不携带令牌"""
+        if token is None:
+            token = self.token
+        return self.request(method, path, params, json, data, content_type, token or None)
+
+    def login(self):
+        status, body = self.call('POST', '/api/auth/login', json={
+            'username': self.username, 'password': DEFAULT_PASSWORD
+        }, token=False)
+        if status != 200:
+            raise RuntimeError(f'基准用户登录失败: {status} {body}')
+        self.token = body['access_token']
+
+        _, accounts = self.call('GET', '/api/accounts/')
+        _, expenses = self.call('GET', '/api/expenses/', params={'per_page': 1})
+        _, reimbursements = self.call('GET', '/api/reimbursements/', params={'per_page': 1})
+        self.ids = {
+            'account_id': accounts['accounts'][0]['id'],
+            'expense_id': expenses['expenses'][0]['id'],
+            'reimbursement_id': reimbursements['reimbursements'][0]['id']
+        }
+
+    def run(self, scenario):
+        """执行一次场景，返回 (耗时秒, 是否成功)；setup 不计时"""
+        state = scenario.setup(self, {}) if scenario.setup else {}
+        request = scenario.build(self, state)
+        start = time.perf_counter()
+        status, _ = self.call(
+            request['method'], request['path'], request['params'], request['json'],
+            request['data'], request['content_type'], request['token']
+        )
+        return time.perf_counter() - start, status in scenario.expect
+
+
+class TestClientSession(BaseSession):
+    """Flask 测试客户端会话"""
+
+    def __init__(self, app):
+        super().__init__()
+        self.client = app.test_client()
+
+    def request(self, method, path, params=None, json=None, data=None, content_type=None, token=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        response = self.client.open(
+            path, method=method, query_string=params, json=json, data=data,
+            content_type=content_type, headers=headers
+        )
+        # 读取完整响应体（包括流式响应）
+        body = response.get_data()
+        status = response.status_code
+        response.close()
+        return status, _parse(body)
+
+
+class HttpSession(BaseSession):
+    """HTTP 会话，每个请求新建连接（gunicorn sync worker 不保持连接）"""
+
+    def __init__(self, host, port):
+        super().__init__()
+        self.host = host
+        self.port = port
+
+    def request(self, method, path, params=None, json=None, data=None, content_type=None, token=None):
+        headers = {}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        if json is not None:
+            data = _dumps(json)
+            content_type = 'application/json'
+        if content_type:
+            headers['Content-Type'] = content_type
+        if params:
+            path = f'{path}?{urlencode(params)}'
+
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        try:
+            connection.request(method, path, body=data, headers=headers)
+            response = connection.getresponse()
+            return response.status, _parse(response.read())
+        finally:
+            connection.close()
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False).encode('utf-8')
+
+
+def _parse(body):
+    try:
+        return json.loads(body)
+    except ValueError:
+        return None
+
+
+def select_scenarios(only=None):
+    """按名称前缀筛选场景"""
+    if not only:
+        return list(SCENARIOS)
+    prefixes = tuple(only)
+    return [scenario for scenario in SCENARIOS if scenario.name.startswith(prefixes)]
+
+
+def uncovered_endpoints(app):
+    """api 蓝图中没有对应场景的接口"""
+    adapter = app.url_map.bind('localhost')
+    session = _ResolveSession()
+    covered = set()
+    for scenario in SCENARIOS:
+        state = {'account_id': 1, 'category_id': 1, 'expense_id': 1, 'reimbursement_id': 1, 'job_id': 1}
+        request = scenario.build(session, state)
+        endpoint, _ = adapter.match(request['path'], method=request['method'])
+        covered.add((endpoint, request['method']))
+
+    missing = []
+    for rule in app.url_map.iter_rules():
+        if not rule.rule.startswith('/api/'):
+            continue
+        for method in rule.methods - {'HEAD', 'OPTIONS'}:
+            if (rule.endpoint, method) not in covered:
+                missing.append(f'{method} {rule.rule}')
+    return sorted(missing)
+
+
+class _ResolveSession(BaseSession):
+    """只用于解析场景路径"""
+
+    def __init__(self):
+        super().__init__()
+        self.ids = {'account_id': 1, 'expense_id': 1, 'reimbursement_id': 1}
+
+
+def run_inprocess(app, scenarios, iterations=50, warmup=5, log=print):
+    """串行执行每个场景，返回 {场景名: 统计}"""
+    session = TestClientSession(app)
+    session.login()
+
+    results = {}
+    for scenario in scenarios:
+        for _ in range(warmup):
+            session.run(scenario)
+
+        latencies, errors = [], 0
+        for _ in range(iterations):
+            elapsed, ok = session.run(scenario)
+            latencies.append(elapsed)
+            errors += 0 if ok else 1
+
+        results[scenario.name] = summarize(latencies, errors)
+        stats = results[scenario.name]
+        log(f"  {scenario.name:32s} p50 {stats['p50_ms']:8.2f} ms  p95 {stats['p95_ms']:8.2f} ms"
+            f"  {stats['rps']:8.1f} req/s" + (f"  错误 {errors}" if errors else ''))
+    return results
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(host, port, process, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('gunicorn 启动失败')
+        try:
+            session = HttpSession(host, port)
+            if session.request('GET', '/api/health')[0] == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError('等待 gunicorn 启动超时')
+
+
+def _load_worker(host, port, names, duration, queue):
+    """客户端进程：在 duration 秒内轮流执行场景，返回各场景的延迟"""
+    scenarios = [scenario for scenario in SCENARIOS if scenario.name in names]
+    session = HttpSession(host, port)
+    session.login()
+
+    latencies = {scenario.name: [] for scenario in scenarios}
+    errors = {scenario.name: 0 for scenario in scenarios}
+    started = time.perf_counter()
+    deadline = time.time() + duration
+    index = 0
+    while time.time() < deadline:
+        scenario = scenarios[index % len(scenarios)]
+        index += 1
+        try:
+            elapsed, ok = session.run(scenario)
+        except OSError:
+            errors[scenario.name] += 1
+            continue
+        latencies[scenario.name].append(elapsed)
+        if not ok:
+            errors[scenario.name] += 1
+    queue.put((latencies, errors, time.perf_counter() - started))
+
+
+def run_server(env, scenarios, workers=4, concurrency=8, duration=10, log=print):
+    """启动 gunicorn 并发压测 load 场景，返回 {'total': 统计, 'scenarios': {场景名: 统计}}"""
+    host, port = '127.0.0.1', _free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--bind', f'{host}:{port}', '--workers', str(workers),
+         '--log-level', 'warning', 'app:app'],
+        cwd=PROJECT_ROOT, env=env
+    )
+    try:
+        _wait_ready(host, port, process)
+        names = [scenario.name for scenario in scenarios if scenario.load]
+        queue = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(target=_load_worker, args=(host, port, names, duration, queue))
+            for _ in range(concurrency)
+        ]
+        for client in clients:
+            client.start()
+        outputs = [queue.get() for _ in clients]
+        for client in clients:
+            client.join()
+        # 吞吐量按压测阶段计算，不含客户端启动和登录
+        elapsed = max(output[2] for output in outputs)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    all_latencies, all_errors = [], 0
+    results = {}
+    for name in names:
+        latencies = [value for output in outputs for value in output[0][name]]
+        errors = sum(output[1][name] for output in outputs)
+        all_latencies.extend(latencies)
+        all_errors += errors
+        results[name] = summarize(latencies, errors, elapsed)
+        stats = results[name]
+        log(f"  {name:32s} p50 {stats['p50_ms']:8.2f} ms  p95 {stats['p95_ms']:8.2f} ms"
+            f"  {stats['rps']:8.1f} req/s" + (f"  错误 {errors}" if errors else ''))
+
+    total = summarize(all_latencies, all_errors, elapsed)
+    log(f"  {'total':32s} p50 {total['p50_ms']:8.2f} ms  p95 {total['p95_ms']:8.2f} ms  {total['rps']:8.1f} req/s")
+    return {
+        'workers': workers,
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 2),
+        'total': total,
+        'scenarios': results
+    }
+
+
+def environment_info():
+    """提交哈希及运行环境，便于跨提交比较"""
+    def git(*args):
+        try:
+            return subprocess.run(
+                ['git', *args], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        'commit': git('rev-parse', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def dataset_info(db_path):
+    """基准数据库中各表的行数"""
+    connection = sqlite3.connect(db_path)
+    try:
+        return {
+            table: connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+            for table in ('users', 'accounts', 'expenses', 'reimbursements', 'expense_daily_rollup')
+        }
+    finally:
+        connection.close()
@@ -0,0 +1,267 @@
+"""
+请求场景
+每个场景对应一个接口的一种典型请求；需要前置数据的写接口通过 setup 在计时外准备数据，
+path / params / body 可以是函数，参数为 (会话, setup 返回的状态)
+"""
+
+import itertools
+import json
+from datetime import date, timedelta
+from benchmarks.datagen import DEFAULT_PASSWORD
+
+# 用于生成唯一名称
+_counter = itertools.count(1)
+
+
+def _unique(prefix):
+    return f'{prefix}{next(_counter)}'
+
+
+class Scenario:
+    """
+    name: 场景名称；load: 是否参与 gunicorn 并发压测（默认只读接口参与）；
+    expect: 视为成功的状态码
+    """
+
+    def __init__(self, name, method, path, params=None, body=None, data=None,
+                 content_type=None, setup=None, expect=(200,), load=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.params = params
+        self.body = body
+        self.data = data
+        self.content_type = content_type
+        self.setup = setup
+        self.expect = expect
+        self.load = method == 'GET' if load is None else load
+
+    def build(self, session, state):
+        """生成一次请求的参数"""
+        def resolve(value):
+            return value(session, state) if callable(value) else value
+
+        return {
+            'method': self.method,
+            'path': resolve(self.path),
+            'params': resolve(self.params),
+            'json': resolve(self.body),
+            'data': resolve(self.data),
+            'content_type': self.content_type,
+            'token': state.get('token') if state else None
+        }
+
+
+# ---- 前置数据 ----
+
+def _new_expense(session, state=None, **fields):
+    values = {
+        'account_id': session.ids['account_id'],
+        'amount': 12.5,
+        'category': 'food',
+        'description': '基准测试 午餐'
+    }
+    values.update(fields)
+    status, body = session.call('POST', '/api/expenses/', json=values)
+    return {'expense_id': body['expense']['id']}
+
+
+def _new_reimbursement(session, state=None):
+    expense = _new_expense(session, is_reimbursable=True)
+    status, body = session.call('POST', '/api/reimbursements/', json={
+        'title': '基准测试报销', 'expense_ids': [expense['expense_id']]
+    })
+    return {'reimbursement_id': body['reimbursement']['id']}
+
+
+def _approved_reimbursement(session, state=None):
+    state = _new_reimbursement(session)
+    session.call('POST', f"/api/reimbursements/{state['reimbursement_id']}/approve",
+                 json={'action': 'approve'})
+    return state
+
+
+def _new_account(session, state=None):
+    status, body = session.call('POST', '/api/accounts/', json={
+        'name': _unique('基准账户'), 'account_type': 'cash'
+    })
+    return {'account_id': body['account']['id']}
+
+
+def _new_category(session, state=None):
+    status, body = session.call('POST', '/api/categories/', json={
+        'value': _unique('bench_'), 'label': '基准分类'
+    })
+    return {'category_id': body['category']['id']}
+
+
+def _new_user(session, state=None):
+    """注册没有任何数据的新用户，返回其令牌"""
+    username = _unique('benchnew')
+    session.call('POST', '/api/auth/register', json={
+        'username': username, 'email': f'{username}@example.com',
+        'password': DEFAULT_PASSWORD, 'name': username
+    }, token=False)
+    status, body = session.call('POST', '/api/auth/login', json={
+        'username': username, 'password': DEFAULT_PASSWORD
+    }, token=False)
+    return {'token': body['access_token']}
+
+
+def _new_user_without_categories(session, state=None):
+    """注册时会初始化默认分类，删除后用于测量初始化接口"""
+    state = _new_user(session)
+    status, body = session.call('GET', '/api/categories/', token=state['token'])
+    for category in body['categories']:
+        session.call('DELETE', f"/api/categories/{category['id']}", token=state['token'])
+    return state
+
+
+def _bulk_rows(session, state):
+    rows = [
+        json.dumps({
+            'account_id': session.ids['account_id'], 'amount': 10 + i % 50,
+            'category': 'food', 'expense_date': (date.today() - timedelta(days=i % 30)).isoformat(),
+            'description': '批量导入'
+        }, ensure_ascii=False)
+        for i in range(100)
+    ]
+    return '\n'.join(rows).encode('utf-8')
+
+
+def _new_job(session, state=None):
+    status, body = session.call('POST', '/api/jobs/', json={'type': 'rebuild_rollups'})
+    return {'job_id': body['job']['id']}
+
+
+def _cancelled_job(session, state=None):
+    state = _new_job(session)
+    session.call('POST', f"/api/jobs/{state['job_id']}/cancel")
+    return state
+
+
+def _ninety_days_ago(session, state):
+    return {'format': 'csv', 'start_date': (date.today() - timedelta(days=90)).isoformat()}
+
+
+STATISTICS_PATHS = [
+    '/api/statistics/overview',
+    '/api/statistics/category-analysis',
+    '/api/statistics/trend-analysis',
+    '/api/statistics/account-analysis',
+    '/api/statistics/monthly-summary'
+]
+
+
+SCENARIOS = [
+    # 系统
+    Scenario('health', 'GET', '/api/health'),
+
+    # 认证
+    Scenario('auth.login', 'POST', '/api/auth/login',
+             body=lambda s, st: {'username': s.username, 'password': DEFAULT_PASSWORD}),
+    Scenario('auth.register', 'POST', '/api/auth/register', expect=(201,),
+             body=lambda s, st: (lambda name: {
+                 'username': name, 'email': f'{name}@example.com',
+                 'password': DEFAULT_PASSWORD, 'name': name
+             })(_unique('benchreg'))),
+    Scenario('auth.profile', 'GET', '/api/auth/profile'),
+    Scenario('auth.update_profile', 'PUT', '/api/auth/profile', body={'name': '基准测试用户'}),
+    Scenario('auth.change_password', 'POST', '/api/auth/change-password',
+             body={'old_password': DEFAULT_PASSWORD, 'new_password': DEFAULT_PASSWORD}),
+
+    # 账户
+    Scenario('accounts.list', 'GET', '/api/accounts/'),
+    Scenario('accounts.types', 'GET', '/api/accounts/types'),
+    Scenario('accounts.get', 'GET', lambda s, st: f"/api/accounts/{s.ids['account_id']}"),
+    Scenario('accounts.balance_history', 'GET',
+             lambda s, st: f"/api/accounts/{s.ids['account_id']}/balance-history",
+             params=lambda s, st: {'start_date': (date.today() - timedelta(days=90)).isoformat()}),
+    Scenario('accounts.create', 'POST', '/api/accounts/', expect=(201,),
+             body=lambda s, st: {'name': _unique('基准账户'), 'account_type': 'bank'}),
+    Scenario('accounts.update', 'PUT', lambda s, st: f"/api/accounts/{s.ids['account_id']}",
+             body={'description': '基准测试'}),
+    Scenario('accounts.delete', 'DELETE', lambda s, st: f"/api/accounts/{st['account_id']}",
+             setup=_new_account),
+
+    # 分类
+    Scenario('categories.list', 'GET', '/api/categories/'),
+    Scenario('categories.create', 'POST', '/api/categories/', expect=(201,),
+             body=lambda s, st: {'value': _unique('bench_'), 'label': '基准分类'}),
+    Scenario('categories.update', 'PUT', lambda s, st: f"/api/categories/{st['category_id']}",
+             body={'label': '基准分类（改）'}, setup=_new_category),
+    Scenario('categories.delete', 'DELETE', lambda s, st: f"/api/categories/{st['category_id']}",
+             setup=_new_category),
+    Scenario('categories.init_default', 'POST', '/api/categories/init-default', expect=(201,),
+             setup=_new_user_without_categories),
+
+    # 收支记录
+    Scenario('expenses.list', 'GET', '/api/expenses/', params={'per_page': 20}),
+    Scenario('expenses.list_cursor', 'GET', '/api/expenses/', params={'per_page': 20, 'cursor': ''}),
+    Scenario('expenses.list_filtered', 'GET', '/api/expenses/',
+             params={'per_page': 20, 'category': 'food', 'type': 'expense'}),
+    Scenario('expenses.list_tag', 'GET', '/api/expenses/', params={'per_page': 20, 'tag': '出差'}),
+    Scenario('expenses.search', 'GET', '/api/expenses/', params={'per_page': 20, 'search': '工作餐'}),
+    Scenario('expenses.get', 'GET', lambda s, st: f"/api/expenses/{s.ids['expense_id']}"),
+    Scenario('expenses.categories', 'GET', '/api/expenses/categories'),
+    Scenario('expenses.export', 'GET', '/api/expenses/export', params=_ninety_days_ago),
+    Scenario('expenses.create', 'POST', '/api/expenses/', expect=(201,), load=True,
+             body=lambda s, st: {'account_id': s.ids['account_id'], 'amount': 23.4,
+                                 'category': 'transport', 'description': '基准测试 地铁'}),
+    Scenario('expenses.bulk', 'POST', '/api/expenses/bulk', expect=(201,),
+             data=_bulk_rows, content_type='application/x-ndjson'),
+    Scenario('expenses.update', 'PUT', lambda s, st: f"/api/expenses/{st['expense_id']}",
+             body={'amount': 30, 'description': '基准测试 修改'}, setup=_new_expense),
+    Scenario('expenses.delete', 'DELETE', lambda s, st: f"/api/expenses/{st['expense_id']}",
+             setup=_new_expense),
+
+    # 报销
+    Scenario('reimbursements.list', 'GET', '/api/reimbursements/'),
+    Scenario('reimbursements.list_cursor', 'GET', '/api/reimbursements/', params={'cursor': ''}),
+    Scenario('reimbursements.get', 'GET',
+             lambda s, st: f"/api/reimbursements/{s.ids['reimbursement_id']}"),
+    Scenario('reimbursements.available', 'GET', '/api/reimbursements/available-expenses'),
+    Scenario('reimbursements.status_options', 'GET', '/api/reimbursements/status-options'),
+    Scenario('reimbursements.create', 'POST', '/api/reimbursements/', expect=(201,),
+             body=lambda s, st: {'title': '基准测试报销', 'expense_ids': [st['expense_id']]},
+             setup=lambda s, st: _new_expense(s, is_reimbursable=True)),
+    Scenario('reimbursements.update', 'PUT',
+             lambda s, st: f"/api/reimbursements/{st['reimbursement_id']}",
+             body={'title': '基准测试报销（改）'}, setup=_new_reimbursement),
+    Scenario('reimbursements.delete', 'DELETE',
+             lambda s, st: f"/api/reimbursements/{st['reimbursement_id']}",
+             setup=_new_reimbursement),
+    Scenario('reimbursements.approve', 'POST',
+             lambda s, st: f"/api/reimbursements/{st['reimbursement_id']}/approve",
+             body={'action': 'approve'}, setup=_new_reimbursement),
+    Scenario('reimbursements.pay', 'POST',
+             lambda s, st: f"/api/reimbursements/{st['reimbursement_id']}/pay",
+             setup=_approved_reimbursement),
+
+    # 统计
+    Scenario('statistics.overview', 'GET', '/api/statistics/overview'),
+    Scenario('statistics.overview_all', 'GET', '/api/statistics/overview', params={'period': 'all'}),
+    Scenario('statistics.category', 'GET', '/api/statistics/category-analysis'),
+    Scenario('statistics.trend', 'GET', '/api/statistics/trend-analysis'),
+    Scenario('statistics.account', 'GET', '/api/statistics/account-analysis'),
+    Scenario('statistics.monthly', 'GET', '/api/statistics/monthly-summary'),
+    Scenario('statistics.dashboard', 'GET', '/api/statistics/dashboard'),
+
+    # 后台任务（基准测试不运行 worker，任务保持等待状态）
+    Scenario('jobs.list', 'GET', '/api/jobs/'),
+    Scenario('jobs.types', 'GET', '/api/jobs/types'),
+    Scenario('jobs.create', 'POST', '/api/jobs/', expect=(202,),
+             body={'type': 'export_expenses', 'params': {'format': 'csv', 'filters': {'tag': ['出差']}}}),
+    Scenario('jobs.get', 'GET', lambda s, st: f"/api/jobs/{st['job_id']}", setup=_new_job),
+    Scenario('jobs.cancel', 'POST', lambda s, st: f"/api/jobs/{st['job_id']}/cancel", setup=_new_job),
+    Scenario('jobs.retry', 'POST', lambda s, st: f"/api/jobs/{st['job_id']}/retry", expect=(202,),
+             setup=_cancelled_job),
+    Scenario('jobs.download_pending', 'GET', lambda s, st: f"/api/jobs/{st['job_id']}/download",
+             expect=(404,), setup=_new_job),
+    Scenario('expenses.bulk_async', 'POST', '/api/expenses/bulk', expect=(202,),
+             params={'async': 'true'}, data=_bulk_rows, content_type='application/x-ndjson'),
+
+    # 批量请求
+    Scenario('batch.statistics', 'POST', '/api/batch', load=True,
+             body={'requests': [{'path': path} for path in STATISTICS_PATHS]}),
+]
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+静态资源构建脚本：
+1. 按内容哈希将 static 下的文件复制到 static/dist，并生成清单供模板引用
+2. 为文本资源生成 .gz / .br 预压缩文件
+用法: python build_static.py [--clean]
+"""
+
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from compression import compress, supported_encodings, PRECOMPRESSED_EXTENSIONS
+from assets import DIST_DIR, MANIFEST_NAME
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+# 需要预压缩的文件类型（字体等已压缩格式不处理）
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.html', '.txt', '.map')
+
+# 小于该字节数的文件不压缩
+MIN_SIZE = 1024
+
+# 文件名中内容哈希的长度
+HASH_LENGTH = 12
+
+# CSS 中的 url() 引用
+CSS_URL_PATTERN = re.compile(r'url\((["\']?)([^"\')]+)\1\)')
+
+
+def _static_files(include_dist=True):
+    """遍历 static 目录下的文件（不含已生成的压缩文件），可选择跳过 dist 目录"""
+    compressed = tuple(ext for _, ext in PRECOMPRESSED_EXTENSIONS)
+    for root, dirs, files in os.walk(STATIC_DIR):
+        if not include_dist and root == STATIC_DIR and DIST_DIR in dirs:
+            dirs.remove(DIST_DIR)
+        for name in sorted(files):
+            if not name.endswith(compressed):
+                yield os.path.join(root, name)
+
+
+def clean():
+    """删除 dist 目录和已生成的压缩文件"""
+    shutil.rmtree(os.path.join(STATIC_DIR, DIST_DIR), ignore_errors=True)
+    compressed = tuple(ext for _, ext in PRECOMPRESSED_EXTENSIONS)
+    for root, _, files in os.walk(STATIC_DIR):
+        for name in files:
+            if name.endswith(compressed):
+                os.remove(os.path.join(root, name))
+
+
+def _hashed_name(filename, data):
+    """在扩展名前插入内容哈希：css/style.css -> dist/css/style.<hash>.css"""
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    base, ext = posixpath.splitext(filename)
+    return posixpath.join(DIST_DIR, f'{base}.{digest}{ext}')
+
+
+def _rewrite_css_urls(filename, data, manifest):
+    """将 CSS 中引用的静态文件替换为带哈希的地址（相对路径保持相对）"""
+    css_dir = posixpath.dirname(filename)
+    # 带哈希的 CSS 位于 dist 下的同名目录
+    hashed_dir = posixpath.join(DIST_DIR, css_dir)
+
+    def replace(match):
+        quote, ref = match.groups()
+        if ref.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return match.group(0)
+        # 保留查询参数和锚点
+        path, suffix = re.match(r'([^?#]*)(.*)', ref).groups()
+        target = posixpath.normpath(posixpath.join(css_dir, path))
+        if target not in manifest:
+            return match.group(0)
+        new_ref = posixpath.relpath(manifest[target], hashed_dir)
+        return f'url({quote}{new_ref}{suffix}{quote})'
+
+    return CSS_URL_PATTERN.sub(replace, data.decode('utf-8')).encode('utf-8')
+
+
+def fingerprint_assets():
+    """按内容哈希复制文件到 dist 目录并写入清单，返回清单"""
+    shutil.rmtree(os.path.join(STATIC_DIR, DIST_DIR), ignore_errors=True)
+
+    # CSS 引用字体、图片，需在被引用的文件生成哈希后再处理
+    sources = sorted(
+        (os.path.relpath(path, STATIC_DIR).replace(os.sep, '/') for path in _static_files(include_dist=False)),
+        key=lambda name: (name.endswith('.css'), name)
+    )
+
+    manifest = {}
+    for filename in sources:
+        with open(os.path.join(STATIC_DIR, filename), 'rb') as f:
+            data = f.read()
+        if filename.endswith('.css'):
+            data = _rewrite_css_urls(filename, data, manifest)
+
+        hashed = _hashed_name(filename, data)
+        target = os.path.join(STATIC_DIR, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(data)
+        manifest[filename] = hashed
+
+    with open(os.path.join(STATIC_DIR, DIST_DIR, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    return manifest
+
+
+def compress_assets():
+    """生成预压缩文件，返回 (文件数, 原始字节数, 各算法压缩后字节数)"""
+    extensions = dict(PRECOMPRESSED_EXTENSIONS)
+    encodings = supported_encodings()
+    file_count = 0
+    original_size = 0
+    compressed_size = {encoding: 0 for encoding in encodings}
+
+    for path in _static_files():
+        if not path.endswith(COMPRESSIBLE_EXTENSIONS):
+            continue
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < MIN_SIZE:
+            continue
+
+        file_count += 1
+        original_size += len(data)
+        for encoding in encodings:
+            # 构建时使用最高压缩级别
+            output = compress(data, encoding, 11 if encoding == 'br' else 9)
+            with open(path + extensions[encoding], 'wb') as f:
+                f.write(output)
+            compressed_size[encoding] += len(output)
+
+    return file_count, original_size, compressed_size
+
+
+def main():
+    if '--clean' in sys.argv[1:]:
+        clean()
+        print("已删除带哈希的文件和预压缩文件")
+        return
+
+    manifest = fingerprint_assets()
+    print(f"已生成 {len(manifest)} 个带哈希的文件")
+
+    file_count, original_size, compressed_size = compress_assets()
+    print(f"已预压缩 {file_count} 个文件，原始大小 {original_size // 1024} KB")
+    for encoding, size in compressed_size.items():
+        print(f"  {encoding}: {size // 1024} KB")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+统计接口响应缓存模块
+按用户缓存统计接口的 JSON 响应，缓存键包含用户数据版本号；
+收支、账户、报销的写接口递增版本号后旧缓存自然失效
+"""
+
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from functools import wraps
+from flask import current_app, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from database import db
+from models import UserDataVersion
+
+# 命中统计（进程内）
+cache_stats = {'hits': 0, 'misses': 0}
+
+
+class MemoryCache:
+    """进程内 LRU 缓存"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, user_id, generation, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCache:
+    """基于独立 SQLite 文件的共享缓存，多个 gunicorn worker 共用"""
+
+    # 每写入多少次检查一次总条数
+    PRUNE_INTERVAL = 100
+
+    def __init__(self, path, max_entries=10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS response_cache ('
+                'key TEXT PRIMARY KEY, user_id INTEGER NOT NULL, generation INTEGER NOT NULL, '
+                'value BLOB NOT NULL, created_at TEXT NOT NULL)'
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS ix_response_cache_user_generation '
+                'ON response_cache (user_id, generation)'
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute(
+            'SELECT value FROM response_cache WHERE key = ?', (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, user_id, generation, value):
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO response_cache (key, user_id, generation, value, created_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, user_id, generation, value, datetime.utcnow().isoformat())
+            )
+            # 清理该用户旧版本的缓存
+            conn.execute(
+                'DELETE FROM response_cache WHERE user_id = ? AND generation < ?',
+                (user_id, generation)
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_INTERVAL == 0:
+                conn.execute(
+                    'DELETE FROM response_cache WHERE key IN ('
+                    'SELECT key FROM response_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)',
+                    (self.max_entries,)
+                )
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM response_cache')
+
+
+def init_cache(app):
+    """根据配置创建缓存后端：memory（默认）、sqlite 或 none"""
+    backend = app.config.get('STATS_CACHE_BACKEND', 'memory')
+    max_entries = app.config.get('STATS_CACHE_SIZE', 1024)
+
+    if backend == 'none':
+        app.extensions['stats_cache'] = None
+    elif backend == 'memory':
+        app.extensions['stats_cache'] = MemoryCache(max_entries)
+    elif backend == 'sqlite':
+        path = app.config.get('STATS_CACHE_PATH') or os.path.join(app.instance_path, 'stats_cache.db')
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        app.extensions['stats_cache'] = SQLiteCache(path, max_entries)
+    else:
+        raise ValueError(f'未知的缓存后端: {backend}')
+
+
+def get_generation(user_id):
+    """读取用户数据版本号"""
+    return db.session.query(UserDataVersion.generation).filter_by(
+        user_id=user_id
+    ).scalar() or 0
+
+
+def bump_generation(user_id):
+    """递增用户数据版本号，需在写操作的事务内调用，随写操作一起提交"""
+    stmt = sqlite_insert(UserDataVersion).values(
+        user_id=user_id,
+        generation=1,
+        updated_at=datetime.utcnow()
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id'],
+        set_={
+            'generation': UserDataVersion.generation + 1,
+            'updated_at': stmt.excluded.updated_at
+        }
+    )
+    db.session.execute(stmt)
+
+
+def _cache_key(user_id, generation):
+    """缓存键：用户、数据版本、接口路径、当天日期（按月/年统计依赖当前日期）及查询参数"""
+    params = '&'.join(f'{name}={value}' for name, value in sorted(request.args.items(multi=True)))
+    return f'{user_id}:{generation}:{request.path}:{date.today().isoformat()}:{params}'
+
+
+def cached_response(view):
+    """缓存视图的成功响应，需放在 jwt_required 之后"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        backend = current_app.extensions.get('stats_cache')
+        if backend is None:
+            return view(*args, **kwargs)
+
+        user_id = int(get_jwt_identity())
+        generation = get_generation(user_id)
+        key = _cache_key(user_id, generation)
+
+        cached = backend.get(key)
+        if cached is not None:
+            cache_stats['hits'] += 1
+            response = current_app.response_class(cached, mimetype='application/json')
+            response.headers['X-Cache'] = 'HIT'
+            return response
+
+        cache_stats['misses'] += 1
+        response = current_app.make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            backend.set(key, user_id, generation, response.get_data())
+        response.headers['X-Cache'] = 'MISS'
+        return response
+    return wrapper
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+响应压缩模块
+对超过阈值的 JSON、HTML 等文本响应按客户端 Accept-Encoding 进行 brotli / gzip 压缩；
+static 目录下的文件优先直接返回构建时生成的 .br / .gz 预压缩文件（见 build_static.py）
+"""
+
+import gzip
+import mimetypes
+import os
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # 未安装 brotli 时只使用 gzip
+    brotli = None
+
+# 需要压缩的内容类型
+COMPRESS_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'application/x-ndjson',
+    'image/svg+xml',
+    'text/css',
+    'text/csv',
+    'text/html',
+    'text/javascript',
+    'text/plain'
+}
+
+# 预压缩文件的扩展名，按优先顺序排列
+PRECOMPRESSED_EXTENSIONS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def supported_encodings():
+    """当前环境可用的压缩算法，按优先顺序排列"""
+    return ('br', 'gzip') if brotli else ('gzip',)
+
+
+def _choose_encoding(encodings):
+    """从可用算法中选择客户端接受的第一个"""
+    for encoding in encodings:
+        if request.accept_encodings[encoding] > 0:
+            return encoding
+    return None
+
+
+def compress(data, encoding, level):
+    """按指定算法压缩数据"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=min(level, 11))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _send_precompressed(app):
+    """static 文件存在不早于原文件的预压缩版本时直接返回，否则返回 None 交给默认处理"""
+    filename = (request.view_args or {}).get('filename')
+    if not filename or not app.static_folder:
+        return None
+
+    source = os.path.join(app.static_folder, filename)
+    if not os.path.isfile(source):
+        return None
+
+    available = [
+        encoding for encoding, ext in PRECOMPRESSED_EXTENSIONS
+        if os.path.isfile(source + ext) and os.path.getmtime(source + ext) >= os.path.getmtime(source)
+    ]
+    encoding = _choose_encoding(available)
+    if encoding is None:
+        return None
+
+    ext = dict(PRECOMPRESSED_EXTENSIONS)[encoding]
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    response = send_from_directory(app.static_folder, filename + ext, mimetype=mimetype)
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def init_compression(app):
+    """注册压缩钩子，需在其他 after_request 钩子之前调用，使压缩最后执行"""
+
+    @app.before_request
+    def serve_precompressed():
+        if request.endpoint == 'static' and app.config.get('COMPRESS_ENABLED', True):
+            return _send_precompressed(app)
+        return None
+
+    @app.after_request
+    def compress_response(response):
+        if not app.config.get('COMPRESS_ENABLED', True):
+            return response
+
+        # 流式响应、文件响应（static 已由预压缩文件处理）和已编码的响应不处理
+        if (response.status_code != 200
+                or response.direct_passthrough
+                or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESS_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        data = response.get_data()
+        if len(data) < app.config.get('COMPRESS_MIN_SIZE', 1024):
+            return response
+
+        encoding = _choose_encoding(supported_encodings())
+        if encoding is None:
+            return response
+
+        response.set_data(compress(data, encoding, app.config.get('COMPRESS_LEVEL', 6)))
+        response.headers['Content-Encoding'] = encoding
+        # 压缩后字节不同，强 ETag 改为弱 ETag
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
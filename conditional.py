@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+条件请求模块
+根据用户数据版本号为 /api 下的 GET 接口生成 ETag / Last-Modified，
+客户端携带 If-None-Match 且数据未变化时，在执行视图查询之前直接返回 304。
+内容不随用户数据版本变化的蓝图（如后台任务状态）通过 exempt() 排除
+"""
+
+import hashlib
+from datetime import date
+from flask import g, request
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from database import db
+from models import UserDataVersion
+
+# 不做条件请求的蓝图名称
+_exempt_blueprints = set()
+
+
+def exempt(blueprint):
+    """排除整个蓝图：其响应不由用户数据版本决定，不能按版本号返回 304"""
+    _exempt_blueprints.add(blueprint.name)
+    return blueprint
+
+
+def _data_version(user_id):
+    """读取用户数据版本号及最后修改时间"""
+    row = db.session.query(
+        UserDataVersion.generation, UserDataVersion.updated_at
+    ).filter_by(user_id=user_id).first()
+    return (row.generation, row.updated_at) if row else (0, None)
+
+
+def _make_etag(user_id, generation):
+    """ETag 由用户、数据版本、当天日期（统计接口依赖当前日期）和完整请求路径决定"""
+    raw = f'{user_id}:{generation}:{date.today().isoformat()}:{request.full_path}'
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:20]
+
+
+def init_conditional_get(app):
+    """注册条件请求钩子"""
+
+    @app.before_request
+    def check_not_modified():
+        if request.method != 'GET' or not request.path.startswith('/api/'):
+            return None
+        if request.blueprint in _exempt_blueprints:
+            return None
+
+        # 令牌无效时交给视图的 jwt_required 返回错误
+        try:
+            verify_jwt_in_request(optional=True)
+            identity = get_jwt_identity()
+        except Exception:
+            return None
+        if identity is None:
+            return None
+
+        user_id = int(identity)
+        generation, updated_at = _data_version(user_id)
+        g.data_etag = _make_etag(user_id, generation)
+        g.data_last_modified = updated_at
+
+        if request.if_none_match.contains_weak(g.data_etag):
+            response = app.response_class(status=304)
+            _set_validators(response)
+            return response
+        return None
+
+    @app.after_request
+    def add_validators(response):
+        if request.method == 'GET' and response.status_code == 200 and 'data_etag' in g:
+            _set_validators(response)
+        return response
+
+
+def _set_validators(response):
+    """写入 ETag、Last-Modified，要求客户端每次使用前重新验证"""
+    response.set_etag(g.data_etag, weak=True)
+    if g.data_last_modified:
+        response.last_modified = g.data_last_modified
+    response.headers['Cache-Control'] = 'private, no-cache'
@@ -7,16 +7,59 @@
 
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from sqlalchemy import event
 
 # 创建数据库实例
 db = SQLAlchemy()
 migrate = Migrate()
 
+# SQLite 连接参数预设（通过 SQLITE_PROFILE 选择）
+SQLITE_PROFILES = {
+    # 保持 SQLite 默认行为
+    'default': {},
+    # 多进程部署：WAL 模式下读写互不阻塞，写冲突时等待而不是直接报 database is locked
+    'production': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'mmap_size': 268435456,  # 256MB
+        'cache_size': -64000,  # 约 64MB
+        'temp_store': 'MEMORY'
+    }
+}
+
+def get_sqlite_pragmas(app):
+    """根据配置计算需要在每个连接上设置的 PRAGMA"""
+    profile = app.config.get('SQLITE_PROFILE', 'default')
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f'未知的 SQLite 配置: {profile}')
+
+    pragmas = dict(SQLITE_PROFILES[profile])
+    # SQLITE_PRAGMAS 可覆盖预设中的单项参数
+    pragmas.update(app.config.get('SQLITE_PRAGMAS') or {})
+    return pragmas
+
+def _sqlite_connect_listener(pragmas):
+    """生成连接事件监听器，新建连接时依次执行 PRAGMA"""
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+    return set_sqlite_pragmas
+
 def init_db(app):
     """初始化数据库"""
     db.init_app(app)
     migrate.init_app(app, db)
-    
+
     # 在应用上下文中创建表
     with app.app_context():
-        db.create_all()
\ No newline at end of file
+        if db.engine.dialect.name == 'sqlite':
+            pragmas = get_sqlite_pragmas(app)
+            if pragmas:
+                event.listen(db.engine, 'connect', _sqlite_connect_listener(pragmas))
+
+        db.create_all()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全文检索模块
+基于 SQLite FTS5（trigram 分词，支持中文子串匹配）为收支记录和报销申请建立影子索引；
+trigram 无法匹配 1~2 个字符的关键词（如两个字的中文词），另用二元组表 {索引名}_grams 索引这类短词。
+索引均由触发器随原表自动维护
+"""
+
+import logging
+from sqlalchemy import select, table, column, literal_column, inspect, or_, union
+from sqlalchemy.exc import OperationalError
+from database import db
+
+logger = logging.getLogger(__name__)
+
+# 索引名 -> (原表, 被索引的列)
+FTS_INDEXES = {
+    'expenses_fts': ('expenses', ['description', 'category', 'subcategory']),
+    'reimbursements_fts': ('reimbursements', ['title', 'description'])
+}
+
+# trigram 分词至少需要 3 个字符，更短的关键词（1~2 个字符）改查二元组表，
+# 二元组表不可用时才回退到不走索引的 LIKE 查询
+MIN_TERM_LENGTH = 3
+
+# 二元组表只拆分每列的前若干个字符；有列超过该长度的行另记一个空串标记，查询短词时对这些行用 LIKE 复核
+SHORT_INDEX_MAX_LENGTH = 1000
+
+# 二元组表与 SQL 的 lower() 一致，只把 ASCII 字母转为小写（与 LIKE 的大小写规则相同）
+_ASCII_LOWER = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+# 各索引是否可用（进程内缓存）
+_available = {}
+
+
+def _ddl(name):
+    """生成建立索引表和同步触发器的语句"""
+    source, columns = FTS_INDEXES[name]
+    cols = ', '.join(columns)
+    new_values = ', '.join(f'new.{col}' for col in columns)
+    old_values = ', '.join(f'old.{col}' for col in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5("
+        f"{cols}, content='{source}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {name}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_ad AFTER DELETE ON {source} BEGIN "
+        f"INSERT INTO {name}({name}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_au AFTER UPDATE OF {cols} ON {source} BEGIN "
+        f"INSERT INTO {name}({name}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {name}(rowid, {cols}) VALUES (new.id, {new_values}); END"
+    ]
+
+
+def _gram_select(values, row_id):
+    """
+    生成拆分二元组的 SELECT：values 为 (行ID表达式, 列值表达式) 的 UNION ALL 子查询，
+    每个位置取 lower(substr(v, n, 2))，末位只剩一个字符，因此单字关键词也能按前缀命中
+    """
+    return (
+        f"SELECT DISTINCT lower(substr(v, n, 2)), {row_id} FROM ({values}) "
+        f"JOIN fts_positions ON n <= min(length(v), {SHORT_INDEX_MAX_LENGTH})"
+    )
+
+
+def _gram_ddl(name):
+    """生成二元组表、位置表和同步触发器的语句（触发器中不能使用 CTE，位置序列取自 fts_positions）"""
+    source, columns = FTS_INDEXES[name]
+    grams = f'{name}_grams'
+    cols = ', '.join(columns)
+
+    def rows(prefix):
+        values = ' UNION ALL '.join(f'SELECT {prefix}.{col} AS v' for col in columns)
+        too_long = ', '.join(f"length(coalesce({prefix}.{col}, ''))" for col in columns)
+        return (
+            f"INSERT OR IGNORE INTO {grams}(gram, row_id) {_gram_select(values, f'{prefix}.id')}; "
+            f"INSERT OR IGNORE INTO {grams}(gram, row_id) SELECT '', {prefix}.id "
+            f"WHERE max({too_long}, 0) > {SHORT_INDEX_MAX_LENGTH};"
+        )
+
+    return [
+        "CREATE TABLE IF NOT EXISTS fts_positions (n INTEGER PRIMARY KEY)",
+        f"INSERT OR IGNORE INTO fts_positions(n) WITH RECURSIVE seq(n) AS "
+        f"(SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < {SHORT_INDEX_MAX_LENGTH}) SELECT n FROM seq",
+        f"CREATE TABLE IF NOT EXISTS {grams} ("
+        f"gram TEXT NOT NULL, row_id INTEGER NOT NULL, PRIMARY KEY (gram, row_id)) WITHOUT ROWID",
+        f"CREATE INDEX IF NOT EXISTS ix_{grams}_row_id ON {grams}(row_id)",
+        f"CREATE TRIGGER IF NOT EXISTS {grams}_ai AFTER INSERT ON {source} BEGIN {rows('new')} END",
+        f"CREATE TRIGGER IF NOT EXISTS {grams}_ad AFTER DELETE ON {source} BEGIN "
+        f"DELETE FROM {grams} WHERE row_id = old.id; END",
+        f"CREATE TRIGGER IF NOT EXISTS {grams}_au AFTER UPDATE OF {cols} ON {source} BEGIN "
+        f"DELETE FROM {grams} WHERE row_id = old.id; {rows('new')} END"
+    ]
+
+
+def _rebuild_grams(conn, name):
+    """从原表重建二元组表"""
+    source, columns = FTS_INDEXES[name]
+    grams = f'{name}_grams'
+    values = ' UNION ALL '.join(f'SELECT id, {col} AS v FROM {source}' for col in columns)
+    too_long = ' OR '.join(f'length({col}) > {SHORT_INDEX_MAX_LENGTH}' for col in columns)
+    conn.exec_driver_sql(f'DELETE FROM {grams}')
+    conn.exec_driver_sql(f'INSERT OR IGNORE INTO {grams}(gram, row_id) {_gram_select(values, "id")}')
+    conn.exec_driver_sql(f"INSERT OR IGNORE INTO {grams}(gram, row_id) SELECT '', id FROM {source} WHERE {too_long}")
+
+
+def init_fulltext(rebuild=False):
+    """创建缺失的全文索引及触发器，新建的索引会从原表重建，需在应用上下文中调用"""
+    _available.clear()
+    if db.engine.dialect.name != 'sqlite':
+        return
+
+    existing = set(inspect(db.engine).get_table_names())
+    for name, (source, _) in FTS_INDEXES.items():
+        if source not in existing:
+            continue
+        try:
+            with db.engine.begin() as conn:
+                created = name not in existing
+                for statement in _ddl(name):
+                    conn.exec_driver_sql(statement)
+                if created or rebuild:
+                    conn.exec_driver_sql(f"INSERT INTO {name}({name}) VALUES ('rebuild')")
+            _available[name] = True
+        except OperationalError as e:
+            # SQLite 未编译 FTS5 或不支持 trigram 时回退到 LIKE 查询
+            logger.warning('全文索引 %s 不可用: %s', name, e)
+            _available[name] = False
+
+        # 二元组表只用普通表和触发器，不依赖 FTS5
+        grams = f'{name}_grams'
+        try:
+            with db.engine.begin() as conn:
+                created = grams not in existing
+                for statement in _gram_ddl(name):
+                    conn.exec_driver_sql(statement)
+                if created or rebuild:
+                    _rebuild_grams(conn, name)
+            _available[grams] = True
+        except OperationalError as e:
+            logger.warning('短词索引 %s 不可用: %s', grams, e)
+            _available[grams] = False
+
+
+def is_available(name):
+    """索引是否可用"""
+    if name not in _available:
+        _available[name] = (
+            db.engine.dialect.name == 'sqlite'
+            and name in inspect(db.engine).get_table_names()
+        )
+    return _available[name]
+
+
+def _short_match_subquery(name, term):
+    """
+    1~2 个字符的关键词查二元组表：两个字符按等值、单个字符按前缀范围命中，
+    超长行（空串标记）对原表用 LIKE 复核；所有结果 rank 相同
+    """
+    source, columns = FTS_INDEXES[name]
+    grams = table(f'{name}_grams', column('gram'), column('row_id'))
+    src = table(source, column('id'), *(column(col) for col in columns))
+
+    term = term.translate(_ASCII_LOWER)
+    if len(term) == 2:
+        condition = grams.c.gram == term
+    else:
+        condition = grams.c.gram.between(term, term + '\U0010ffff')
+    matched = union(
+        select(grams.c.row_id.label('id')).where(condition),
+        select(src.c.id).where(
+            src.c.id.in_(select(grams.c.row_id).where(grams.c.gram == '')),
+            or_(*(src.c[col].contains(term, autoescape=True) for col in columns))
+        )
+    ).subquery()
+    return select(matched.c.id.label('id'), literal_column('0').label('rank')).subquery()
+
+
+def match_subquery(name, term):
+    """
+    返回匹配关键词的 (id, rank) 子查询，rank 越小相关度越高；
+    索引不可用时返回 None，调用方应回退到 LIKE 查询
+    """
+    term = (term or '').strip()
+    if not term:
+        return None
+    if len(term) < MIN_TERM_LENGTH:
+        return _short_match_subquery(name, term) if is_available(f'{name}_grams') else None
+    if not is_available(name):
+        return None
+
+    # 整体作为短语匹配，与 LIKE '%term%' 的子串语义一致
+    phrase = '"' + term.replace('"', '""') + '"'
+    fts = table(name, column('rowid'), column('rank'))
+    return select(
+        fts.c.rowid.label('id'),
+        fts.c.rank.label('rank')
+    ).where(literal_column(name).op('MATCH')(phrase)).subquery()
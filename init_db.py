@@ -15,6 +15,9 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app import app, db
 from models import User, Account, Expense, Reimbursement
+from rollups import rebuild_rollups
+from ledger import rebuild_ledger
+from fulltext import init_fulltext
 
 def create_tables():
     """创建数据库表"""
@@ -27,6 +30,9 @@ def create_tables():
         # 创建所有表
         db.create_all()
         
+        # 创建全文检索索引
+        init_fulltext(rebuild=True)
+        
         print("数据库表创建成功！")
 
 def create_sample_data():
@@ -190,6 +196,11 @@ def create_sample_data():
             db.session.add(reimbursement)
             db.session.commit()
         
+        # 生成统计汇总和余额台账
+        rebuild_rollups(demo_user.id)
+        rebuild_ledger(demo_user.id)
+        db.session.commit()
+        
         print("示例数据创建成功！")
         print(f"演示账户: 用户名=demo, 密码=demo123")
 
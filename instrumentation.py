@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+请求性能观测模块
+- 通过 SQLAlchemy 游标事件统计每个请求的 SQL 次数和耗时
+- 响应附带 Server-Timing 头（db / serialize / total），浏览器开发者工具可直接查看
+- 超过 SLOW_QUERY_MS 的 SQL 写入日志，参数只记录类型不记录值
+- PROFILE_ADMINS 中的用户携带 X-Profile 头时对该请求进行性能剖析，结果写入 PROFILE_DIR
+- count_statements() 记录一段代码执行的全部 SQL，用于测试接口的查询次数预算
+"""
+
+import cProfile
+import logging
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from flask import g, has_app_context, request
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from sqlalchemy import event
+from database import db
+from models import User
+
+try:
+    import pyinstrument
+except ImportError:  # 未安装 pyinstrument 时只支持 cProfile
+    pyinstrument = None
+
+logger = logging.getLogger(__name__)
+
+# 触发性能剖析的请求头，值为 cprofile（默认）或 pyinstrument
+PROFILE_HEADER = 'X-Profile'
+
+
+def _current_timing():
+    """当前请求的计时数据，不在请求中时返回 None"""
+    if not has_app_context():
+        return None
+    return g.get('request_timing')
+
+
+def request_timing():
+    """当前请求（不含批量接口的子请求）的计时数据：queries、db、serialize、start"""
+    timing = _current_timing()
+    if timing is None or timing['request'] is not request._get_current_object():
+        return None
+    return timing
+
+
+def _redact(parameters):
+    """参数只保留类型，避免日志中出现金额、描述等用户数据"""
+    if isinstance(parameters, (list, tuple)) and parameters and isinstance(parameters[0], (list, tuple, dict)):
+        return f'<{len(parameters)} 组参数>'
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    return [type(value).__name__ for value in parameters or ()]
+
+
+def _register_query_listeners(engine, slow_query_ms):
+    """在引擎上注册游标事件，累计当前请求的 SQL 次数和耗时并记录慢查询"""
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start_time'].pop()
+
+        timing = _current_timing()
+        if timing is not None:
+            timing['queries'] += 1
+            timing['db'] += elapsed
+
+        if slow_query_ms and elapsed * 1000 >= slow_query_ms:
+            logger.warning(
+                '慢查询 %.1f ms%s: %s 参数: %s',
+                elapsed * 1000,
+                f' ({request.method} {request.path})' if timing is not None else '',
+                ' '.join(statement.split()),
+                _redact(parameters)
+            )
+
+
+@contextmanager
+def count_statements(engine=None):
+    """
+    记录代码块内在引擎上执行的 SQL，产出 (语句, 参数) 列表，len() 即语句数。
+    不依赖 INSTRUMENTATION_ENABLED，需在应用上下文中调用（默认使用 db.engine）
+    """
+    engine = engine or db.engine
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def _wrap_json_response(provider):
+    """统计 JSON 序列化耗时（jsonify 经由 app.json.response 生成响应）"""
+    original = provider.response
+
+    def response(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            timing = _current_timing()
+            if timing is not None:
+                timing['serialize'] += time.perf_counter() - start
+
+    provider.response = response
+
+
+def _profiling_allowed(admins):
+    """请求携带 X-Profile 头且令牌属于 PROFILE_ADMINS 中的用户"""
+    if not admins or PROFILE_HEADER not in request.headers:
+        return False
+
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:
+        return False
+    if identity is None:
+        return False
+
+    username = db.session.query(User.username).filter_by(id=int(identity)).scalar()
+    return username in admins
+
+
+def _start_profiler(kind):
+    """kind 为 pyinstrument 且已安装时使用 pyinstrument，否则使用 cProfile"""
+    if kind == 'pyinstrument' and pyinstrument is not None:
+        profiler = pyinstrument.Profiler()
+        profiler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    return profiler
+
+
+def _stop_profiler(profiler):
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+    else:
+        profiler.stop()
+
+
+def _save_profile(profiler, directory):
+    """写入剖析结果，返回文件名：cProfile 为 .prof（可用 snakeviz 等查看），pyinstrument 为 .html"""
+    os.makedirs(directory, exist_ok=True)
+    endpoint = (request.endpoint or 'unknown').replace('.', '-')
+    stem = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{endpoint}"
+
+    _stop_profiler(profiler)
+    if isinstance(profiler, cProfile.Profile):
+        filename = stem + '.prof'
+        profiler.dump_stats(os.path.join(directory, filename))
+    else:
+        filename = stem + '.html'
+        with open(os.path.join(directory, filename), 'w', encoding='utf-8') as f:
+            f.write(profiler.output_html())
+    return filename
+
+
+def _server_timing(timing, total):
+    return ', '.join([
+        f"db;dur={timing['db'] * 1000:.2f};desc=\"{timing['queries']} queries\"",
+        f"serialize;dur={timing['serialize'] * 1000:.2f}",
+        f"total;dur={total * 1000:.2f}"
+    ])
+
+
+def init_instrumentation(app):
+    """
+    注册性能观测钩子，需在 init_db 之后、其他 before_request 钩子之前调用，
+    使条件请求等钩子中的查询也计入当前请求；序列化计时依赖 init_json 已安装的 JSON 提供者。
+    启用 /metrics 时同样需要这些钩子统计每个请求的 SQL 次数
+    """
+    enabled = app.config.get('INSTRUMENTATION_ENABLED', False)
+    slow_query_ms = app.config.get('SLOW_QUERY_MS', 0)
+    admins = set(app.config.get('PROFILE_ADMINS') or ())
+    profile_dir = app.config.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles')
+
+    if not (enabled or slow_query_ms or admins or app.config.get('METRICS_ENABLED')):
+        return
+
+    with app.app_context():
+        _register_query_listeners(db.engine, slow_query_ms)
+    _wrap_json_response(app.json)
+
+    @app.before_request
+    def start_request_timing():
+        # 批量接口的子请求共用外层请求的应用上下文，计入外层请求
+        if 'request_timing' in g:
+            return None
+
+        g.request_timing = {
+            'request': request._get_current_object(),
+            'start': time.perf_counter(),
+            'queries': 0,
+            'db': 0.0,
+            'serialize': 0.0,
+            'profiler': None
+        }
+        if _profiling_allowed(admins):
+            kind = request.headers.get(PROFILE_HEADER, '').strip().lower()
+            g.request_timing['profiler'] = _start_profiler(kind)
+        return None
+
+    @app.after_request
+    def add_server_timing(response):
+        timing = request_timing()
+        if timing is None:
+            return response
+
+        if timing['profiler'] is not None:
+            response.headers['X-Profile-File'] = _save_profile(timing['profiler'], profile_dir)
+            timing['profiler'] = None
+
+        if enabled:
+            response.headers['Server-Timing'] = _server_timing(timing, time.perf_counter() - timing['start'])
+        return response
+
+    @app.teardown_request
+    def finish_request_timing(exc):
+        timing = request_timing()
+        if timing is None:
+            return
+        # 未经过 after_request（如未处理的异常）时停止剖析
+        if timing['profiler'] is not None:
+            _stop_profiler(timing['profiler'])
+        g.pop('request_timing')
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台任务模块
+重建汇总、大批量导入导出、按用户回填数据等耗时操作提交为任务写入 jobs 表，接口立即返回；
+worker.py 进程轮询领取并执行任务，不依赖外部消息队列。
+- 处理函数通过 ctx.checkpoint() 报告进度并提交事务，断点状态与已完成的写入一起提交，重试时从断点继续
+- 执行失败按指数退避重试，达到 max_attempts 次后标记为 failed
+- 执行中的任务超过 JOB_TIMEOUT 秒没有报告进度（worker 退出或卡死）时重新排队
+"""
+
+import glob
+import json
+import logging
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, update
+from database import db
+from models import Job
+from cache import bump_generation
+import rollups
+import ledger
+import taxonomy
+
+logger = logging.getLogger(__name__)
+
+# 任务类型 -> {'handler', 'max_attempts', 'validate', 'submit'}
+JOB_HANDLERS = {}
+
+# 已结束的任务状态
+FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled')
+
+
+def job_handler(job_type, max_attempts=None, validate=None, submit=True):
+    """
+    注册任务处理函数 handler(ctx)，返回值（可 JSON 序列化）作为任务结果。
+    validate(user_id, params) 在提交时校验参数，参数错误时抛出 ValueError；
+    submit 为 False 的任务只能由对应接口创建（如需要上传文件的导入），不能通过 POST /api/jobs/ 提交
+    """
+    def decorator(handler):
+        JOB_HANDLERS[job_type] = {
+            'handler': handler,
+            'max_attempts': max_attempts,
+            'validate': validate,
+            'submit': submit
+        }
+        return handler
+    return decorator
+
+
+def job_dir():
+    """任务文件（上传的导入文件、导出结果）目录，默认 instance/jobs"""
+    path = current_app.config.get('JOB_DIR') or os.path.join(current_app.instance_path, 'jobs')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def job_path(job_id, suffix):
+    """任务文件路径：job-<ID><suffix>"""
+    return os.path.join(job_dir(), f'job-{job_id}{suffix}')
+
+
+def enqueue(user_id, job_type, params=None, max_attempts=None):
+    """创建任务并加入会话（ID 在 flush 后可用），需由调用方提交"""
+    entry = JOB_HANDLERS.get(job_type)
+    if entry is None:
+        raise ValueError(f'未知的任务类型: {job_type}')
+
+    job = Job(
+        user_id=user_id,
+        job_type=job_type,
+        status='pending',
+        params=json.dumps(params or {}, ensure_ascii=False),
+        max_attempts=max_attempts or entry['max_attempts'] or current_app.config.get('JOB_MAX_ATTEMPTS', 3),
+        run_after=datetime.utcnow()
+    )
+    db.session.add(job)
+    return job
+
+
+class JobContext:
+    """传给处理函数的执行上下文"""
+
+    def __init__(self, job):
+        self.job = job
+        self.user_id = job.user_id
+        self.params = json.loads(job.params) if job.params else {}
+        # 上次执行保存的断点，首次执行为空字典
+        self.state = json.loads(job.state) if job.state else {}
+
+    def path(self, suffix):
+        return job_path(self.job.id, suffix)
+
+    def checkpoint(self, progress=None, message=None, state=None):
+        """
+        更新进度（及断点状态）并提交当前事务。
+        处理函数在此之前的写入与断点一起提交，之后失败重试时不会重复执行已提交的部分
+        """
+        job = self.job
+        if state is not None:
+            self.state = state
+            job.state = json.dumps(state, ensure_ascii=False)
+        if progress is not None:
+            # 100 留给任务完成时设置
+            job.progress = max(0, min(99, int(progress)))
+        if message is not None:
+            job.message = message[:200]
+        job.heartbeat_at = datetime.utcnow()
+        db.session.commit()
+
+
+def claim_job(worker_id):
+    """领取一个到期的待执行任务，没有时返回 None；单条 UPDATE 完成领取，多个 worker 不会领到同一任务"""
+    now = datetime.utcnow()
+    candidate = (
+        select(Job.id)
+        .where(Job.status == 'pending', Job.run_after <= now)
+        .order_by(Job.run_after, Job.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    stmt = update(Job).where(Job.id == candidate, Job.status == 'pending').values(
+        status='running',
+        attempts=Job.attempts + 1,
+        locked_by=worker_id,
+        heartbeat_at=now,
+        started_at=now,
+        updated_at=now
+    ).returning(Job.id)
+    job_id = db.session.execute(stmt.execution_options(synchronize_session=False)).scalar()
+    db.session.commit()
+    return db.session.get(Job, job_id) if job_id is not None else None
+
+
+def _fail(job, error, retry_delay):
+    """记录失败：未达到最大次数时延后重新排队（指数退避），否则标记为 failed"""
+    now = datetime.utcnow()
+    job.error = error
+    job.locked_by = None
+    if job.attempts < job.max_attempts:
+        job.status = 'pending'
+        job.run_after = now + timedelta(seconds=retry_delay * 2 ** (job.attempts - 1))
+        job.message = f'第 {job.attempts} 次执行失败，等待重试'
+    else:
+        job.status = 'failed'
+        job.finished_at = now
+        job.message = f'执行 {job.attempts} 次均失败'
+
+
+def run_job(job, retry_delay=10):
+    """执行任务：成功时保存结果，失败时回滚本次未提交的写入并按重试策略处理"""
+    job_id = job.id
+    job_type = job.job_type
+    try:
+        entry = JOB_HANDLERS.get(job_type)
+        if entry is None:
+            raise RuntimeError(f'未知的任务类型: {job_type}')
+
+        result = entry['handler'](JobContext(job))
+
+        job.status = 'succeeded'
+        job.progress = 100
+        job.message = '已完成'
+        job.result = json.dumps(result, ensure_ascii=False) if result is not None else None
+        job.error = None
+        job.locked_by = None
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        return True
+
+    except Exception as e:
+        db.session.rollback()
+        logger.exception('任务 %s（%s）执行失败', job_id, job_type)
+        job = db.session.get(Job, job_id)
+        _fail(job, str(e), retry_delay)
+        db.session.commit()
+        return False
+
+
+def requeue_stale(timeout, retry_delay=10):
+    """超过 timeout 秒未报告进度的执行中任务按失败处理（重新排队或标记为 failed），返回处理的任务数"""
+    cutoff = datetime.utcnow() - timedelta(seconds=timeout)
+    stale = Job.query.filter(Job.status == 'running', Job.heartbeat_at < cutoff).all()
+    for job in stale:
+        logger.warning('任务 %s 超过 %s 秒未报告进度（worker: %s），重新排队', job.id, timeout, job.locked_by)
+        _fail(job, f'执行超时：超过 {timeout} 秒未报告进度', retry_delay)
+    db.session.commit()
+    return len(stale)
+
+
+def purge_jobs(days):
+    """删除结束超过 days 天的任务及其文件，返回删除的任务数"""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    jobs = Job.query.filter(Job.status.in_(FINISHED_STATUSES), Job.finished_at < cutoff).all()
+    directory = job_dir()
+    for job in jobs:
+        for path in glob.glob(os.path.join(directory, f'job-{job.id}.*')):
+            os.remove(path)
+        db.session.delete(job)
+    db.session.commit()
+    return len(jobs)
+
+
+def run_worker(app, once=False, stop_event=None):
+    """
+    worker 主循环：领取并逐个执行任务，没有任务时每 JOB_POLL_INTERVAL 秒轮询一次。
+    once 为 True 时执行完当前所有到期任务后退出；stop_event 被设置后在当前任务结束时退出
+    """
+    stop_event = stop_event or threading.Event()
+    poll_interval = app.config.get('JOB_POLL_INTERVAL', 1.0)
+    retry_delay = app.config.get('JOB_RETRY_DELAY', 10)
+    timeout = app.config.get('JOB_TIMEOUT', 600)
+    retention_days = app.config.get('JOB_RETENTION_DAYS', 7)
+    worker_id = f'{socket.gethostname()}:{os.getpid()}'
+
+    with app.app_context():
+        logger.info('任务 worker %s 已启动', worker_id)
+        last_purge = None
+        while not stop_event.is_set():
+            # 每小时清理一次过期任务
+            if last_purge is None or datetime.utcnow() - last_purge > timedelta(hours=1):
+                purge_jobs(retention_days)
+                last_purge = datetime.utcnow()
+
+            requeue_stale(timeout, retry_delay)
+            job = claim_job(worker_id)
+            if job is None:
+                if once:
+                    break
+                stop_event.wait(poll_interval)
+                continue
+
+            logger.info('开始执行任务 %s（%s，第 %s 次）', job.id, job.job_type, job.attempts)
+            run_job(job, retry_delay)
+            # 每个任务结束后释放会话，避免大任务加载的对象常驻内存
+            db.session.remove()
+        logger.info('任务 worker %s 已退出', worker_id)
+
+
+@job_handler('rebuild_rollups')
+def _rebuild_rollups(ctx):
+    """重建当前用户的收支汇总"""
+    row_count = rollups.rebuild_rollups(ctx.user_id)
+    bump_generation(ctx.user_id)
+    return {'rollup_rows': row_count}
+
+
+@job_handler('rebuild_ledger')
+def _rebuild_ledger(ctx):
+    """根据收支记录重建当前用户的账户余额台账"""
+    row_count = ledger.rebuild_ledger(ctx.user_id)
+    bump_generation(ctx.user_id)
+    return {'ledger_rows': row_count}
+
+
+@job_handler('relink_taxonomy')
+def _relink_taxonomy(ctx):
+    """按分类值回填当前用户收支记录的分类ID，并根据 tags 字符串重建标签关联"""
+    linked = taxonomy.link_categories(ctx.user_id)
+    ctx.checkpoint(50, f'已关联 {linked} 条记录的分类')
+    tag_links = taxonomy.rebuild_expense_tags(user_id=ctx.user_id)
+    bump_generation(ctx.user_id)
+    return {'linked_categories': linked, 'tag_links': tag_links}
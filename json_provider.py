@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON 序列化模块
+安装了 orjson 时使用 orjson 作为应用的 JSON 提供者，否则使用标准库；
+两者对 Decimal（转为数值）和日期时间（ISO 格式）的处理一致，
+视图可以直接返回数据库取出的原始值而无需逐字段转换
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from flask.json.provider import JSONProvider, DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时回退到标准库
+    orjson = None
+
+
+def _json_default(obj):
+    """处理 JSON 原生不支持的类型"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (date, datetime)):
+        return obj.isoformat()
+    return DefaultJSONProvider.default(obj)
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """标准库 json 实现，日期输出 ISO 格式而非 HTTP 日期"""
+
+    default = staticmethod(_json_default)
+
+
+class OrjsonProvider(JSONProvider):
+    """orjson 实现，直接输出 UTF-8 字节"""
+
+    # flask_jwt_extended 等扩展通过 app.json.default 处理自定义类型
+    default = staticmethod(_json_default)
+    option = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_json_default, option=self.option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_json_default, option=self.option),
+            mimetype='application/json'
+        )
+
+
+def init_json(app):
+    """根据 JSON_PROVIDER 配置安装 JSON 提供者：auto（默认，有 orjson 时使用）、orjson 或 stdlib"""
+    name = app.config.get('JSON_PROVIDER', 'auto')
+
+    if name == 'auto':
+        name = 'orjson' if orjson else 'stdlib'
+
+    if name == 'orjson':
+        if orjson is None:
+            raise RuntimeError('JSON_PROVIDER=orjson 需要先安装 orjson')
+        app.json = OrjsonProvider(app)
+    elif name == 'stdlib':
+        app.json = StdlibJSONProvider(app)
+    else:
+        raise ValueError(f'未知的 JSON 提供者: {name}')
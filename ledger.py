@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+账户余额台账模块
+维护 account_daily_balances 表：每个账户每天一行，保存当日收支净额和截至当日的累计净额。
+账户当前余额减去某日之后的净额即为该日的余额，查询任意日期的余额只需按 (account_id, balance_date)
+索引定位一行，余额走势为一次索引区间扫描，不再回放全部收支记录。
+账户余额手工修改（期初余额、校正）视为发生在所有记录之前，历史余额随之整体平移
+"""
+
+from datetime import timedelta
+from sqlalchemy import func, delete, update, select, exists, case
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from database import db
+from models import Expense, AccountDailyBalance
+from money import cents, to_cents, cents_to_float
+
+
+def _record(user_id, account_id, balance_date, delta, count):
+    """按账户和日期累加净额和笔数，新建的行累计净额暂记为 0，由 _recompute 修正"""
+    stmt = sqlite_insert(AccountDailyBalance).values(
+        user_id=user_id,
+        account_id=account_id,
+        balance_date=balance_date,
+        net_amount=delta,
+        cumulative_amount=0,
+        txn_count=count
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['account_id', 'balance_date'],
+        set_={
+            'net_amount': AccountDailyBalance.net_amount + stmt.excluded.net_amount,
+            'txn_count': AccountDailyBalance.txn_count + stmt.excluded.txn_count
+        }
+    )
+    db.session.execute(stmt)
+
+
+def _recompute(account_id, from_date):
+    """
+    从 from_date 起重新计算账户的累计净额：前一行的累计净额加上窗口函数求出的逐日累计和。
+    只改写 from_date 及之后的行，记账日期通常是最近几天，涉及的行数很少
+    """
+    base = (
+        select(cents(AccountDailyBalance.cumulative_amount))
+        .where(
+            AccountDailyBalance.account_id == account_id,
+            AccountDailyBalance.balance_date < from_date
+        )
+        .order_by(AccountDailyBalance.balance_date.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    running = select(
+        AccountDailyBalance.id,
+        (
+            func.coalesce(base, 0) +
+            func.sum(cents(AccountDailyBalance.net_amount)).over(order_by=AccountDailyBalance.balance_date)
+        ).label('cumulative')
+    ).where(
+        AccountDailyBalance.account_id == account_id,
+        AccountDailyBalance.balance_date >= from_date
+    ).subquery()
+    db.session.execute(
+        update(AccountDailyBalance)
+        .where(AccountDailyBalance.id == running.c.id)
+        .values(cumulative_amount=running.c.cumulative)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def apply(snap, sign=1):
+    """
+    将一条记录（rollups.snapshot 生成的快照）计入（sign=1）或移出（sign=-1）台账，
+    需在调用方事务内提交
+    """
+    account_id = snap['account_id']
+    balance_date = snap['rollup_date']
+    delta = Expense.balance_delta(snap['expense_type'], snap['amount']) * sign
+    _record(snap['user_id'], account_id, balance_date, delta, sign)
+
+    # 移出后清理已经没有记录的日期
+    if sign < 0:
+        db.session.execute(
+            delete(AccountDailyBalance).where(
+                AccountDailyBalance.account_id == account_id,
+                AccountDailyBalance.balance_date == balance_date,
+                AccountDailyBalance.txn_count <= 0
+            )
+        )
+    _recompute(account_id, balance_date)
+
+
+def add_snapshots(snaps):
+    """批量计入台账：按账户和日期合并后写入，每个账户只从最早的日期重新计算一次累计净额"""
+    merged = {}
+    for snap in snaps:
+        key = (snap['user_id'], snap['account_id'], snap['rollup_date'])
+        delta, count = merged.get(key, (0, 0))
+        merged[key] = (delta + Expense.balance_delta(snap['expense_type'], snap['amount']), count + 1)
+
+    earliest = {}
+    for (user_id, account_id, balance_date), (delta, count) in merged.items():
+        _record(user_id, account_id, balance_date, delta, count)
+        if account_id not in earliest or balance_date < earliest[account_id]:
+            earliest[account_id] = balance_date
+
+    for account_id, from_date in earliest.items():
+        _recompute(account_id, from_date)
+
+
+def rebuild_ledger(user_id=None):
+    """根据 expenses 表重建台账，user_id 为空时重建全部用户，返回台账行数"""
+    clear = delete(AccountDailyBalance)
+    if user_id is not None:
+        clear = clear.where(AccountDailyBalance.user_id == user_id)
+    db.session.execute(clear)
+
+    delta = func.sum(case(
+        (func.coalesce(Expense.expense_type, 'expense') == 'expense', -cents(Expense.amount)),
+        else_=cents(Expense.amount)
+    ))
+    source = select(
+        Expense.user_id,
+        Expense.account_id,
+        Expense.expense_date,
+        delta,
+        func.sum(delta).over(partition_by=Expense.account_id, order_by=Expense.expense_date),
+        func.count(Expense.id)
+    ).group_by(
+        Expense.user_id,
+        Expense.account_id,
+        Expense.expense_date
+    )
+    if user_id is not None:
+        source = source.where(Expense.user_id == user_id)
+
+    db.session.execute(
+        AccountDailyBalance.__table__.insert().from_select(
+            ['user_id', 'account_id', 'balance_date', 'net_amount', 'cumulative_amount', 'txn_count'],
+            source
+        )
+    )
+
+    count_query = db.session.query(func.count(AccountDailyBalance.id))
+    if user_id is not None:
+        count_query = count_query.filter(AccountDailyBalance.user_id == user_id)
+    return count_query.scalar()
+
+
+def needs_rebuild():
+    """已有收支记录但台账为空（从旧版本升级），需运行 rebuild_ledger.py"""
+    return db.session.query(
+        exists().where(Expense.id.isnot(None)) & ~exists().where(AccountDailyBalance.id.isnot(None))
+    ).scalar()
+
+
+def _cumulative_as_of(account_id, as_of=None):
+    """截至 as_of（含）的累计净额（分），as_of 为空时为全部记录的累计净额"""
+    query = select(cents(AccountDailyBalance.cumulative_amount)).where(
+        AccountDailyBalance.account_id == account_id
+    )
+    if as_of is not None:
+        query = query.where(AccountDailyBalance.balance_date <= as_of)
+    value = db.session.execute(
+        query.order_by(AccountDailyBalance.balance_date.desc()).limit(1)
+    ).scalar()
+    return value or 0
+
+
+def balance_history(account, start_date=None, end_date=None):
+    """
+    账户在 [start_date, end_date] 区间的期初、期末余额及每个有记录日期的日终余额。
+    余额 = 当前余额 - 全部累计净额 + 截至该日的累计净额；未指定开始日期时期初余额为第一笔记录之前的余额
+    """
+    # 当前余额与全部累计净额之差：第一笔记录之前的余额
+    offset = to_cents(account.balance or 0) - _cumulative_as_of(account.id)
+
+    opening = offset
+    if start_date is not None:
+        opening += _cumulative_as_of(account.id, start_date - timedelta(days=1))
+    closing = offset + _cumulative_as_of(account.id, end_date)
+
+    query = select(
+        AccountDailyBalance.balance_date,
+        cents(AccountDailyBalance.net_amount),
+        cents(AccountDailyBalance.cumulative_amount),
+        AccountDailyBalance.txn_count
+    ).where(AccountDailyBalance.account_id == account.id)
+    if start_date is not None:
+        query = query.where(AccountDailyBalance.balance_date >= start_date)
+    if end_date is not None:
+        query = query.where(AccountDailyBalance.balance_date <= end_date)
+    rows = db.session.execute(query.order_by(AccountDailyBalance.balance_date)).all()
+
+    return {
+        'opening_balance': cents_to_float(opening),
+        'closing_balance': cents_to_float(closing),
+        'history': [
+            {
+                'date': balance_date.isoformat(),
+                'net_amount': cents_to_float(net_amount),
+                'balance': cents_to_float(offset + cumulative),
+                'txn_count': txn_count
+            }
+            for balance_date, net_amount, cumulative, txn_count in rows
+        ]
+    }
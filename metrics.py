@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行指标模块
+以 Prometheus 文本格式在 /metrics 输出请求数、延迟直方图、SQL 次数、统计缓存命中、
+SQLite 锁冲突及 gunicorn worker 信息。
+各 worker 在进程内累计指标，定期把当前值写入共享的 SQLite 文件（每个 worker 一组行），
+抓取时按 worker 求和，因此无论请求落在哪个 worker 上都能得到全部 worker 的汇总
+"""
+
+import hmac
+import os
+import socket
+import sqlite3
+import threading
+import time
+from flask import request, jsonify
+from sqlalchemy import event
+from database import db
+from cache import cache_stats
+from instrumentation import request_timing
+
+# 延迟直方图的桶上限（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 未配置 METRICS_TOKEN 时只允许本机抓取
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+# 已退出 worker 的计数器合并到这一行，与正在运行的 worker 一起参与汇总
+RETIRED_WORKER = 'retired'
+
+# 指标定义：名称 -> (类型, 说明)，按此顺序输出
+METRICS = {
+    'cash_http_requests_total': ('counter', 'HTTP 请求数'),
+    'cash_http_request_duration_seconds': ('histogram', 'HTTP 请求耗时'),
+    'cash_db_queries_total': ('counter', 'SQL 执行次数'),
+    'cash_db_query_duration_seconds_total': ('counter', 'SQL 执行总耗时'),
+    'cash_stats_cache_hits_total': ('counter', '统计接口缓存命中次数'),
+    'cash_stats_cache_misses_total': ('counter', '统计接口缓存未命中次数'),
+    'cash_stats_cache_hit_ratio': ('gauge', '统计接口缓存命中率'),
+    'cash_sqlite_lock_errors_total': ('counter', '等待 busy_timeout 后仍因锁冲突失败的 SQL 次数'),
+    'cash_worker_requests_total': ('counter', '各 worker 处理的请求数'),
+    'cash_worker_start_time_seconds': ('gauge', 'worker 启动时间'),
+    'cash_worker_last_flush_time_seconds': ('gauge', 'worker 最近一次写入指标的时间')
+}
+
+
+def _label_string(labels):
+    """标签元组转为 Prometheus 格式 a="1",b="2"（值中的反斜杠、引号、换行需要转义）"""
+    return ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+
+
+def _format_le(bound):
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+_BUCKET_LABELS = [(bound, _format_le(bound)) for bound in LATENCY_BUCKETS + (float('inf'),)]
+
+
+class MetricsStore:
+    """
+    进程内累计指标，由后台线程每 flush_interval 秒写入共享 SQLite 文件（空闲的 worker 也能及时写入）。
+    每个 worker 的行以 worker 标识区分，写入的是累计值（覆盖而非累加），重复写入不影响结果。
+    超过 worker_ttl 秒未写入的 worker 视为已退出：写入时把它的计数器（含直方图）累加到 retired 行、
+    丢弃仪表值和带 worker 标签的序列后删除其行，汇总后的计数器不会因 worker 重启而回退，文件也不会随重启次数增长。
+    空闲的 worker 至少每 worker_ttl / 4 秒写入一次，避免仍在运行时被合并
+    """
+
+    def __init__(self, path, flush_interval=1.0, worker_ttl=300.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.worker_ttl = max(worker_ttl, flush_interval * 10)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pid = None
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS metric_values ('
+                'worker TEXT NOT NULL, name TEXT NOT NULL, suffix TEXT NOT NULL, labels TEXT NOT NULL, '
+                'le TEXT NOT NULL, value REAL NOT NULL, PRIMARY KEY (worker, name, suffix, labels, le))'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS metric_workers ('
+                'worker TEXT PRIMARY KEY, pid INTEGER NOT NULL, started_at REAL NOT NULL, '
+                'flushed_at REAL NOT NULL)'
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _ensure_worker(self):
+        """首次使用或 fork 之后（如 gunicorn --preload）重置进程内的值"""
+        pid = os.getpid()
+        if self._pid != pid:
+            self._pid = pid
+            self._started_at = time.time()
+            # 进程号会被复用，标识中加入启动时间
+            self.worker = f'{socket.gethostname()}:{pid}:{int(self._started_at)}'
+            self._values = {}
+            self._dirty = True
+            self._flushed_at = 0.0
+            # 线程不会随 fork 复制，每个进程各自启动
+            threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True).start()
+
+    def _flush_loop(self):
+        pid = os.getpid()
+        while self._pid == pid:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # 写入失败（如锁等待超时）时下次重试
+                self._dirty = True
+
+    def worker_id(self):
+        """当前 worker 的标识：主机名:进程号:启动时间"""
+        with self._lock:
+            self._ensure_worker()
+            return self.worker
+
+    def inc(self, name, labels=(), amount=1, suffix='', le=''):
+        with self._lock:
+            self._ensure_worker()
+            key = (name, suffix, _label_string(labels), le)
+            self._values[key] = self._values.get(key, 0) + amount
+            self._dirty = True
+
+    def set(self, name, value, labels=()):
+        with self._lock:
+            self._ensure_worker()
+            if self._values.get((name, '', _label_string(labels), '')) != value:
+                self._values[(name, '', _label_string(labels), '')] = value
+                self._dirty = True
+
+    def observe(self, name, seconds, labels=()):
+        """直方图：桶计数为累积值（未落入的桶也写入 0，保证每个桶都有值），另记 _sum 和 _count"""
+        label_string = _label_string(labels)
+        with self._lock:
+            self._ensure_worker()
+            values = self._values
+            for bound, le in _BUCKET_LABELS:
+                key = (name, '_bucket', label_string, le)
+                values[key] = values.get(key, 0) + (1 if seconds <= bound else 0)
+            for suffix, amount in (('_sum', seconds), ('_count', 1)):
+                key = (name, suffix, label_string, '')
+                values[key] = values.get(key, 0) + amount
+            self._dirty = True
+
+    def flush(self, force=False):
+        """有新值（或 force、距上次写入超过 worker_ttl / 4）时把进程内的值写入共享文件，并合并已退出的 worker"""
+        with self._lock:
+            self._ensure_worker()
+            now = time.time()
+            if not (force or self._dirty or now - self._flushed_at >= self.worker_ttl / 4):
+                return
+            self._dirty = False
+            self._flushed_at = now
+            rows = [(self.worker, *key, value) for key, value in self._values.items()]
+
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO metric_values (worker, name, suffix, labels, le, value) '
+                'VALUES (?, ?, ?, ?, ?, ?)', rows
+            )
+            conn.execute(
+                'INSERT OR REPLACE INTO metric_workers (worker, pid, started_at, flushed_at) '
+                'VALUES (?, ?, ?, ?)', (self.worker, self._pid, self._started_at, now)
+            )
+            # 与上面的写入在同一事务中（已持有写锁），多个 worker 同时写入也只会合并一次
+            self._retire_workers(conn, now - self.worker_ttl)
+
+    def _retire_workers(self, conn, before):
+        """把 before 之前最后写入的 worker 合并到 retired 行后删除"""
+        stale = [
+            worker for worker, in conn.execute(
+                'SELECT worker FROM metric_workers WHERE flushed_at < ? AND worker != ?', (before, self.worker)
+            )
+        ]
+        if not stale:
+            return
+
+        worker_marks = ','.join('?' * len(stale))
+        # 仪表值只对运行中的 worker 有意义；带 worker 标签的序列每个 worker 一条，合并后仍会无限增长
+        counters = [
+            name for name, (metric_type, _) in METRICS.items()
+            if metric_type != 'gauge' and name != 'cash_worker_requests_total'
+        ]
+        name_marks = ','.join('?' * len(counters))
+        conn.execute(
+            'INSERT INTO metric_values (worker, name, suffix, labels, le, value) '
+            'SELECT ?, name, suffix, labels, le, SUM(value) FROM metric_values '
+            f'WHERE worker IN ({worker_marks}) AND name IN ({name_marks}) '
+            'GROUP BY name, suffix, labels, le '
+            'ON CONFLICT (worker, name, suffix, labels, le) DO UPDATE SET value = value + excluded.value',
+            [RETIRED_WORKER, *stale, *counters]
+        )
+        conn.execute(f'DELETE FROM metric_values WHERE worker IN ({worker_marks})', stale)
+        conn.execute(f'DELETE FROM metric_workers WHERE worker IN ({worker_marks})', stale)
+
+    def collect(self):
+        """汇总所有 worker 的值，返回 {(name, suffix, labels, le): value} 及 worker 列表"""
+        self.flush(force=True)
+        conn = self._connect()
+        values = {
+            (name, suffix, labels, le): value
+            for name, suffix, labels, le, value in conn.execute(
+                'SELECT name, suffix, labels, le, SUM(value) FROM metric_values '
+                'GROUP BY name, suffix, labels, le'
+            )
+        }
+        workers = conn.execute(
+            'SELECT worker, pid, started_at, flushed_at FROM metric_workers ORDER BY started_at'
+        ).fetchall()
+        return values, workers
+
+
+def _format_value(value):
+    """整数值不带小数点输出"""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _sort_key(item):
+    (name, suffix, labels, le), _ = item
+    order = {'_bucket': 0, '_sum': 1, '_count': 2}.get(suffix, 0)
+    return labels, order, float(le) if le else 0.0
+
+
+def render(values, workers):
+    """按 Prometheus 文本格式输出"""
+    hits = values.get(('cash_stats_cache_hits_total', '', '', ''), 0)
+    misses = values.get(('cash_stats_cache_misses_total', '', '', ''), 0)
+    values[('cash_stats_cache_hit_ratio', '', '', '')] = hits / (hits + misses) if hits + misses else 0
+
+    for worker, pid, started_at, flushed_at in workers:
+        labels = _label_string((('worker', worker), ('pid', pid)))
+        values[('cash_worker_start_time_seconds', '', labels, '')] = started_at
+        values[('cash_worker_last_flush_time_seconds', '', labels, '')] = flushed_at
+
+    lines = []
+    for name, (metric_type, description) in METRICS.items():
+        series = sorted(
+            ((key, value) for key, value in values.items() if key[0] == name), key=_sort_key
+        )
+        if not series:
+            continue
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for (_, suffix, labels, le), value in series:
+            if le:
+                labels = f'{labels},le="{le}"' if labels else f'le="{le}"'
+            label_part = '{' + labels + '}' if labels else ''
+            lines.append(f'{name}{suffix}{label_part} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def _is_lock_error(exc):
+    message = str(exc).lower()
+    return 'database is locked' in message or 'database is busy' in message
+
+
+def _scrape_allowed(token):
+    """配置了令牌时校验 Authorization: Bearer 令牌，否则只允许本机地址"""
+    if token:
+        scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+        return scheme.lower() == 'bearer' and hmac.compare_digest(credentials.strip().encode(), token.encode())
+    return request.remote_addr in LOCAL_ADDRESSES
+
+
+def init_metrics(app):
+    """注册指标钩子和 /metrics 接口，需在 init_instrumentation 之后调用以取得每个请求的 SQL 次数"""
+    if not app.config.get('METRICS_ENABLED', False):
+        return
+
+    path = app.config.get('METRICS_PATH') or os.path.join(app.instance_path, 'metrics.db')
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    store = MetricsStore(
+        path, app.config.get('METRICS_FLUSH_INTERVAL', 1.0), app.config.get('METRICS_WORKER_TTL', 300.0)
+    )
+    app.extensions['metrics'] = store
+
+    with app.app_context():
+        @event.listens_for(db.engine, 'handle_error')
+        def count_lock_errors(context):
+            if _is_lock_error(context.original_exception):
+                store.inc('cash_sqlite_lock_errors_total')
+
+    @app.after_request
+    def record_request(response):
+        timing = request_timing()
+        if timing is None or request.endpoint == 'metrics':
+            return response
+
+        blueprint = request.blueprint or ('static' if request.endpoint == 'static' else 'app')
+        labels = (('blueprint', blueprint),)
+        store.inc('cash_http_requests_total', labels + (
+            ('method', request.method), ('status', response.status_code)
+        ))
+        store.observe('cash_http_request_duration_seconds', time.perf_counter() - timing['start'], labels)
+        store.inc('cash_db_queries_total', labels, timing['queries'])
+        store.inc('cash_db_query_duration_seconds_total', labels, timing['db'])
+        store.inc('cash_worker_requests_total', (('worker', store.worker_id()),))
+        # 缓存命中数在 cache 模块中按进程累计，直接取当前值
+        store.set('cash_stats_cache_hits_total', cache_stats['hits'])
+        store.set('cash_stats_cache_misses_total', cache_stats['misses'])
+        return response
+
+    token = app.config.get('METRICS_TOKEN', '')
+
+    @app.route('/metrics', endpoint='metrics')
+    def metrics():
+        """Prometheus 指标（所有 worker 汇总），指标含各 worker 的主机名和进程号，不对外公开"""
+        if not _scrape_allowed(token):
+            return jsonify({'error': '无权访问指标'}), 401 if token else 403
+        values, workers = store.collect()
+        return app.response_class(render(values, workers), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+数据库迁移脚本：为账户表添加乐观锁版本号字段
+"""
+
+import os
+import sys
+from dotenv import load_dotenv
+from sqlalchemy import inspect
+
+# 加载环境变量
+load_dotenv()
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app
+from database import db
+
+def migrate_account_version():
+    """添加 accounts.version_id 字段"""
+    with app.app_context():
+        try:
+            columns = [column['name'] for column in inspect(db.engine).get_columns('accounts')]
+            if 'version_id' in columns:
+                print("accounts.version_id 已存在，跳过迁移")
+                return
+
+            print("正在添加 accounts.version_id 字段...")
+            with db.engine.begin() as conn:
+                conn.exec_driver_sql(
+                    'ALTER TABLE accounts ADD COLUMN version_id INTEGER NOT NULL DEFAULT 1'
+                )
+            print("账户版本号迁移完成！")
+
+        except Exception as e:
+            print(f"迁移失败: {e}")
+            raise
+
+if __name__ == '__main__':
+    migrate_account_version()
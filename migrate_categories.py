@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 """
 数据库迁移脚本：添加分类表
+为还没有分类的用户批量初始化默认分类：每批用户一条 INSERT ... SELECT 并单独提交，
+中断后重新执行会跳过已完成的用户
 """
 
 import os
@@ -15,7 +17,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app import app
 from database import db
-from models import Category, User
+from taxonomy import provision_default_categories
 
 def migrate_categories():
     """迁移分类表"""
@@ -28,46 +30,12 @@ def migrate_categories():
             
             # 为所有现有用户初始化默认分类
             print("正在为现有用户初始化默认分类...")
+            users, categories = provision_default_categories(log=print)
+            if users:
+                print(f"为 {users} 个用户初始化了 {categories} 个默认分类")
+            else:
+                print("所有用户都已有分类，跳过初始化")
             
-            users = User.query.all()
-            default_categories = [
-                {'value': 'food', 'label': '餐饮', 'category_type': 'expense', 'sort_order': 1},
-                {'value': 'transport', 'label': '交通', 'category_type': 'expense', 'sort_order': 2},
-                {'value': 'shopping', 'label': '购物', 'category_type': 'expense', 'sort_order': 3},
-                {'value': 'entertainment', 'label': '娱乐', 'category_type': 'expense', 'sort_order': 4},
-                {'value': 'healthcare', 'label': '医疗', 'category_type': 'expense', 'sort_order': 5},
-                {'value': 'education', 'label': '教育', 'category_type': 'expense', 'sort_order': 6},
-                {'value': 'housing', 'label': '住房', 'category_type': 'expense', 'sort_order': 7},
-                {'value': 'utilities', 'label': '水电费', 'category_type': 'expense', 'sort_order': 8},
-                {'value': 'communication', 'label': '通讯', 'category_type': 'expense', 'sort_order': 9},
-                {'value': 'insurance', 'label': '保险', 'category_type': 'expense', 'sort_order': 10},
-                {'value': 'investment', 'label': '投资', 'category_type': 'both', 'sort_order': 11},
-                {'value': 'salary', 'label': '工资', 'category_type': 'income', 'sort_order': 12},
-                {'value': 'bonus', 'label': '奖金', 'category_type': 'income', 'sort_order': 13},
-                {'value': 'other', 'label': '其他', 'category_type': 'both', 'sort_order': 14}
-            ]
-            
-            for user in users:
-                # 检查用户是否已有分类
-                existing_count = Category.query.filter_by(user_id=user.id).count()
-                if existing_count > 0:
-                    print(f"用户 {user.username} 已有分类，跳过初始化")
-                    continue
-                
-                # 为用户创建默认分类
-                for cat_data in default_categories:
-                    category = Category(
-                        user_id=user.id,
-                        value=cat_data['value'],
-                        label=cat_data['label'],
-                        category_type=cat_data['category_type'],
-                        sort_order=cat_data['sort_order']
-                    )
-                    db.session.add(category)
-                
-                print(f"为用户 {user.username} 初始化了 {len(default_categories)} 个默认分类")
-            
-            db.session.commit()
             print("分类迁移完成！")
             
         except Exception as e:
@@ -76,4 +44,4 @@ def migrate_categories():
             raise
 
 if __name__ == '__main__':
-    migrate_categories()
\ No newline at end of file
+    migrate_categories()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+数据库迁移脚本：为收支记录添加 category_id 外键和 expense_tags 标签关联表
+- expenses 表添加 category_id 列，按分类值回填
+- 创建 tags / expense_tags 表，将逗号分隔的 tags 字符串拆分写入关联表
+原有的 category / tags 字符串保留不变，可重复执行
+"""
+
+import os
+import sys
+from dotenv import load_dotenv
+
+# 加载环境变量
+load_dotenv()
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app
+from database import db
+from models import Expense, Tag, ExpenseTag
+from sqlalchemy import inspect
+import taxonomy
+
+
+def migrate_category_tags():
+    """添加分类外键和标签关联表并迁移已有数据"""
+    with app.app_context():
+        try:
+            # 创建 tags / expense_tags 表
+            db.create_all()
+
+            columns = {info['name'] for info in inspect(db.engine).get_columns('expenses')}
+            if 'category_id' not in columns:
+                print("正在为 expenses 表添加 category_id 列...")
+                with db.engine.begin() as conn:
+                    conn.exec_driver_sql(
+                        'ALTER TABLE expenses ADD COLUMN category_id INTEGER REFERENCES categories (id)'
+                    )
+
+            for model in (Expense, Tag, ExpenseTag):
+                for index in model.__table__.indexes:
+                    index.create(bind=db.engine, checkfirst=True)
+
+            print("正在回填分类ID...")
+            linked = taxonomy.link_categories()
+            print(f"已关联 {linked} 条收支记录的分类")
+
+            print("正在拆分标签...")
+            pairs = taxonomy.rebuild_expense_tags()
+            tag_count = db.session.query(Tag.id).count()
+            db.session.commit()
+            print(f"共 {tag_count} 个标签、{pairs} 条标签关联")
+
+            # 更新查询规划器的统计信息
+            with db.engine.begin() as conn:
+                conn.exec_driver_sql('ANALYZE')
+            print("分类和标签迁移完成！")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"迁移失败: {e}")
+            raise
+
+if __name__ == '__main__':
+    migrate_category_tags()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+数据库迁移脚本：为已有数据库补建查询索引
+db.create_all() 只会为新建的表创建索引，已存在的表需要通过本脚本补建
+"""
+
+import os
+import sys
+from dotenv import load_dotenv
+
+# 加载环境变量
+load_dotenv()
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app
+from database import db
+from models import Account, Expense, Reimbursement
+from sqlalchemy import inspect
+
+def migrate_indexes():
+    """补建索引"""
+    with app.app_context():
+        try:
+            # 创建缺失的表
+            db.create_all()
+
+            print("正在补建索引...")
+            inspector = inspect(db.engine)
+            for model in (Account, Expense, Reimbursement):
+                columns = {info['name'] for info in inspector.get_columns(model.__tablename__)}
+                for index in model.__table__.indexes:
+                    # 列由其他迁移脚本添加（如 category_id），尚未迁移时跳过
+                    if not {column.name for column in index.columns} <= columns:
+                        print(f"索引 {index.name} 的列尚不存在，跳过")
+                        continue
+                    index.create(bind=db.engine, checkfirst=True)
+                    print(f"索引 {index.name} 已就绪")
+
+            # 更新查询规划器的统计信息
+            with db.engine.begin() as conn:
+                conn.exec_driver_sql('ANALYZE')
+            print("索引迁移完成！")
+
+        except Exception as e:
+            print(f"迁移失败: {e}")
+            raise
+
+if __name__ == '__main__':
+    migrate_indexes()
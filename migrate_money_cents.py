@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+数据库迁移脚本：金额字段由 Numeric(元) 改为整数分
+SQLite 不支持修改列类型，按官方建议的步骤重建表：以原建表语句（列类型改为 INTEGER）创建新表，
+换算金额后复制数据，删除旧表并改名，再恢复原有的索引和触发器；汇总表按新数据重新生成。
+迁移前请先备份数据库文件
+"""
+
+import os
+import re
+import sys
+from dotenv import load_dotenv
+
+# 加载环境变量
+load_dotenv()
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app
+from database import db
+from money import MONEY_COLUMNS, legacy_money_columns
+from rollups import rebuild_rollups
+from fulltext import init_fulltext
+
+
+def _rebuild_table(conn, table, money_columns):
+    """重建表，money_columns 中的列改为 INTEGER 并将元换算为分"""
+    create_sql = conn.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).scalar()
+    # 表上的索引和触发器随旧表删除，记录下来在新表上重建
+    extra_sql = [row[0] for row in conn.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type IN ('index', 'trigger') AND tbl_name = ? "
+        "AND sql IS NOT NULL", (table,)
+    )]
+
+    new_table = f'{table}_new'
+    new_sql = re.sub(rf'^CREATE TABLE "?{table}"?', f'CREATE TABLE {new_table}', create_sql)
+    for column in money_columns:
+        new_sql, replaced = re.subn(
+            rf'(\b{column}\s+)(NUMERIC|DECIMAL|REAL|FLOAT)(\(\s*\d+\s*,\s*\d+\s*\))?',
+            r'\1INTEGER', new_sql, count=1, flags=re.IGNORECASE
+        )
+        if not replaced:
+            raise RuntimeError(f'无法识别 {table}.{column} 的列定义')
+
+    columns = [row[1] for row in conn.exec_driver_sql(f'PRAGMA table_info({table})')]
+    select_list = ', '.join(
+        f'CAST(ROUND({name} * 100) AS INTEGER)' if name in money_columns else name
+        for name in columns
+    )
+
+    conn.exec_driver_sql(f'DROP TABLE IF EXISTS {new_table}')
+    conn.exec_driver_sql(new_sql)
+    conn.exec_driver_sql(
+        f'INSERT INTO {new_table} ({", ".join(columns)}) SELECT {select_list} FROM {table}'
+    )
+    conn.exec_driver_sql(f'DROP TABLE {table}')
+    conn.exec_driver_sql(f'ALTER TABLE {new_table} RENAME TO {table}')
+    for sql in extra_sql:
+        conn.exec_driver_sql(sql)
+
+
+def migrate_money_cents():
+    """将金额字段迁移为整数分"""
+    with app.app_context():
+        try:
+            legacy = legacy_money_columns(db.engine)
+            if not legacy:
+                print("金额字段已是整数分，跳过迁移")
+                return
+
+            tables = {}
+            for name in legacy:
+                table, column = name.split('.')
+                tables.setdefault(table, []).append(column)
+
+            with db.engine.begin() as conn:
+                # 新表改名为原表名时不改写其他表中的引用
+                conn.exec_driver_sql('PRAGMA legacy_alter_table=ON')
+                # pysqlite 不会为 DDL 自动开启事务，显式开启使整个重建过程要么全部完成要么全部回滚
+                conn.exec_driver_sql('BEGIN')
+                for table, columns in tables.items():
+                    print(f"正在重建 {table}（{', '.join(columns)}）...")
+                    _rebuild_table(conn, table, columns)
+                conn.exec_driver_sql('PRAGMA legacy_alter_table=OFF')
+
+            # 汇总表按整数分重新聚合，全文索引按新表重建
+            rebuild_rollups()
+            db.session.commit()
+            init_fulltext(rebuild=True)
+
+            with db.engine.begin() as conn:
+                conn.exec_driver_sql('ANALYZE')
+            print(f"金额迁移完成：{', '.join(f'{t}.{c}' for t, c in MONEY_COLUMNS)} 已改为整数分")
+
+        except Exception as e:
+            print(f"迁移失败: {e}")
+            raise
+
+if __name__ == '__main__':
+    migrate_money_cents()
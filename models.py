@@ -1,7 +1,10 @@
+import json
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import select, func, update
 from werkzeug.security import generate_password_hash, check_password_hash
 from database import db
+from money import Money
 
 class User(db.Model):
     """用户模型"""
@@ -48,15 +51,40 @@ class Account(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     name = db.Column(db.String(100), nullable=False)
     account_type = db.Column(db.String(50), nullable=False)  # cash, bank, credit_card, alipay, wechat
-    balance = db.Column(db.Numeric(10, 2), default=0.00)
+    balance = db.Column(Money, default=0)  # 以分存储
     description = db.Column(db.Text)
     is_active = db.Column(db.Boolean, default=True)
+    version_id = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # 乐观锁版本号
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # 关系
     expenses = db.relationship('Expense', backref='account', lazy=True)
     
+    # 索引：账户列表按用户过滤并按创建时间排序
+    __table_args__ = (
+        db.Index('ix_accounts_user_created', 'user_id', 'created_at'),
+    )
+    
+    # 通过 ORM 修改账户时校验版本号，防止覆盖并发写入
+    __mapper_args__ = {'version_id_col': version_id}
+    
+    @staticmethod
+    def adjust_balance(account_id, delta):
+        """在数据库中原子地调整余额（UPDATE ... SET balance = balance + delta），需在调用方事务内提交"""
+        if not delta:
+            return
+        db.session.execute(
+            update(Account)
+            .where(Account.id == account_id)
+            .values(
+                balance=Account.balance + delta,
+                version_id=Account.version_id + 1,
+                updated_at=datetime.utcnow()
+            )
+            .execution_options(synchronize_session=False)
+        )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -76,26 +104,51 @@ class Expense(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=False)
-    amount = db.Column(db.Numeric(10, 2), nullable=False)
+    amount = db.Column(Money, nullable=False)  # 以分存储
     category = db.Column(db.String(50), nullable=False)  # food, transport, shopping, etc.
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'))  # 对应的分类，category 没有对应分类时为空
     subcategory = db.Column(db.String(50))
     description = db.Column(db.Text)
     expense_date = db.Column(db.Date, nullable=False, default=datetime.utcnow().date())
     expense_type = db.Column(db.String(20), default='expense')  # expense, income
-    tags = db.Column(db.String(200))  # 标签，逗号分隔
+    tags = db.Column(db.String(200))  # 标签，逗号分隔（用于输出；筛选使用 expense_tags 表）
     receipt_url = db.Column(db.String(255))  # 收据图片URL
     is_reimbursable = db.Column(db.Boolean, default=False)
     reimbursement_id = db.Column(db.Integer, db.ForeignKey('reimbursements.id'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    def to_dict(self):
-        return {
+    # 索引
+    __table_args__ = (
+        # 收支列表：按用户过滤，按日期、创建时间倒序
+        db.Index('ix_expenses_user_date_created', 'user_id', 'expense_date', 'created_at'),
+        # 统计及类型筛选：按用户、收支类型、日期
+        db.Index('ix_expenses_user_type_date', 'user_id', 'expense_type', 'expense_date'),
+        # 分类筛选及分类删除检查
+        db.Index('ix_expenses_user_category', 'user_id', 'category'),
+        db.Index('ix_expenses_category_id', 'category_id'),
+        # 账户维度的统计及账户删除检查
+        db.Index('ix_expenses_account_date', 'account_id', 'expense_date'),
+        # 报销单关联的支出记录
+        db.Index('ix_expenses_reimbursement', 'reimbursement_id'),
+        # 可报销且未关联报销单的记录（部分索引）
+        db.Index('ix_expenses_user_reimbursable_open', 'user_id', 'expense_date',
+                 sqlite_where=db.text('is_reimbursable = 1 AND reimbursement_id IS NULL')),
+    )
+    
+    @staticmethod
+    def balance_delta(expense_type, amount):
+        """计算一条记录对账户余额的影响：支出为负，收入为正"""
+        return -amount if (expense_type or 'expense') == 'expense' else amount
+    
+    def to_dict(self, include_account=False):
+        data = {
             'id': self.id,
             'user_id': self.user_id,
             'account_id': self.account_id,
             'amount': float(self.amount),
             'category': self.category,
+            'category_id': self.category_id,
             'subcategory': self.subcategory,
             'description': self.description,
             'expense_date': self.expense_date.isoformat() if self.expense_date else None,
@@ -106,6 +159,14 @@ class Expense(db.Model):
             'reimbursement_id': self.reimbursement_id,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+        # 附带账户摘要信息
+        if include_account and self.account:
+            data['account'] = {
+                'id': self.account.id,
+                'name': self.account.name,
+                'account_type': self.account.account_type
+            }
+        return data
 
 class Category(db.Model):
     """分类模型"""
@@ -144,7 +205,7 @@ class Reimbursement(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
-    total_amount = db.Column(db.Numeric(10, 2), nullable=False)
+    total_amount = db.Column(Money, nullable=False)  # 以分存储
     status = db.Column(db.String(20), default='pending')  # pending, approved, rejected, paid
     submit_date = db.Column(db.Date, nullable=False, default=datetime.utcnow().date())
     approve_date = db.Column(db.Date)
@@ -155,6 +216,22 @@ class Reimbursement(db.Model):
     # 关系
     expenses = db.relationship('Expense', backref='reimbursement', lazy=True)
     
+    # 关联支出记录数（关联子查询，避免为计数加载全部支出记录）
+    expense_count = db.column_property(
+        select(func.count(Expense.id))
+        .where(Expense.reimbursement_id == id)
+        .correlate_except(Expense)
+        .scalar_subquery()
+    )
+    
+    # 索引
+    __table_args__ = (
+        # 报销列表：按用户过滤，按创建时间倒序
+        db.Index('ix_reimbursements_user_created', 'user_id', 'created_at'),
+        # 按状态筛选及状态统计
+        db.Index('ix_reimbursements_user_status', 'user_id', 'status'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -167,5 +244,128 @@ class Reimbursement(db.Model):
             'approve_date': self.approve_date.isoformat() if self.approve_date else None,
             'approver_notes': self.approver_notes,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'expense_count': len(self.expenses)
-        }
\ No newline at end of file
+            'expense_count': self.expense_count or 0
+        }
+
+class Tag(db.Model):
+    """标签模型（每个用户的标签名只存一份，收支记录通过 expense_tags 关联）"""
+    __tablename__ = 'tags'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    name = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # 唯一约束：同一用户的标签名不能重复
+    __table_args__ = (db.UniqueConstraint('user_id', 'name', name='unique_user_tag'),)
+
+
+class ExpenseTag(db.Model):
+    """收支记录与标签的关联"""
+    __tablename__ = 'expense_tags'
+    
+    expense_id = db.Column(db.Integer, db.ForeignKey('expenses.id'), primary_key=True)
+    tag_id = db.Column(db.Integer, db.ForeignKey('tags.id'), primary_key=True)
+    
+    # 索引：按标签查找收支记录
+    __table_args__ = (
+        db.Index('ix_expense_tags_tag_expense', 'tag_id', 'expense_id'),
+    )
+
+
+class Job(db.Model):
+    """后台任务模型（由 worker.py 进程执行，参数、进度状态和结果以 JSON 文本保存）"""
+    __tablename__ = 'jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    job_type = db.Column(db.String(50), nullable=False)  # rebuild_rollups, import_expenses, export_expenses 等
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, succeeded, failed, cancelled
+    params = db.Column(db.Text)  # 任务参数
+    state = db.Column(db.Text)  # 断点状态，重试时从此处继续
+    result = db.Column(db.Text)  # 执行结果
+    progress = db.Column(db.Integer, nullable=False, default=0)  # 进度百分比
+    message = db.Column(db.String(200))  # 进度说明
+    error = db.Column(db.Text)  # 最近一次失败的原因
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # 重试时延后执行
+    locked_by = db.Column(db.String(100))  # 执行中的 worker
+    heartbeat_at = db.Column(db.DateTime)  # 执行中最近一次报告进度的时间
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # 索引
+    __table_args__ = (
+        # worker 领取任务：按状态和执行时间查找
+        db.Index('ix_jobs_status_run_after', 'status', 'run_after'),
+        # 任务列表：按用户过滤，按创建时间倒序
+        db.Index('ix_jobs_user_created', 'user_id', 'created_at'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'status': self.status,
+            'params': json.loads(self.params) if self.params else {},
+            'result': json.loads(self.result) if self.result else None,
+            'progress': self.progress,
+            'message': self.message,
+            'error': self.error,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_after': self.run_after.isoformat() if self.run_after else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class ExpenseDailyRollup(db.Model):
+    """收支每日汇总模型（按用户、日期、类型、分类、账户预聚合）"""
+    __tablename__ = 'expense_daily_rollup'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    rollup_date = db.Column(db.Date, nullable=False)
+    expense_type = db.Column(db.String(20), nullable=False)  # expense, income
+    category = db.Column(db.String(50), nullable=False)
+    account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=False)
+    total_amount = db.Column(Money, nullable=False, default=0)  # 以分存储
+    txn_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # 唯一约束：每个汇总维度组合只有一行
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'rollup_date', 'expense_type', 'category', 'account_id',
+                            name='unique_expense_daily_rollup'),
+    )
+
+
+class AccountDailyBalance(db.Model):
+    """账户每日余额模型（按账户、日期汇总收支净额，并保存截至当日的累计净额）"""
+    __tablename__ = 'account_daily_balances'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=False)
+    balance_date = db.Column(db.Date, nullable=False)
+    net_amount = db.Column(Money, nullable=False, default=0)  # 当日收入减支出，以分存储
+    cumulative_amount = db.Column(Money, nullable=False, default=0)  # 截至当日（含）的累计净额，以分存储
+    txn_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # 唯一约束：每个账户每天一行；(account_id, balance_date) 索引支撑按日期定位和区间查询
+    __table_args__ = (
+        db.UniqueConstraint('account_id', 'balance_date', name='unique_account_daily_balance'),
+    )
+
+
+class UserDataVersion(db.Model):
+    """用户数据版本模型（每次写入收支、账户、报销数据时递增，用于缓存失效）"""
+    __tablename__ = 'user_data_versions'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    generation = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
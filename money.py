@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+金额存储模块
+金额字段在数据库中以整数“分”存储，聚合在 SQL 中按整数求和，不受浮点误差和
+Numeric(10, 2) 位数的限制；ORM 属性仍为 Decimal（元），业务代码按元读写。
+列表、导出和统计等热路径通过 cents() / yuan() 直接读取整数，不经过 Decimal 转换
+"""
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from sqlalchemy import Float, Integer, inspect, literal_column, type_coerce
+from sqlalchemy.types import TypeDecorator
+
+_ONE_CENT = Decimal('0.01')
+
+# 整数分需能存入 SQLite 的 64 位有符号整数
+MAX_CENTS = 2 ** 63 - 1
+
+# 以分存储的金额字段：(表名, 列名)
+MONEY_COLUMNS = (
+    ('accounts', 'balance'),
+    ('expenses', 'amount'),
+    ('reimbursements', 'total_amount'),
+    ('expense_daily_rollup', 'total_amount'),
+    ('account_daily_balances', 'net_amount'),
+    ('account_daily_balances', 'cumulative_amount')
+)
+
+
+def to_cents(value):
+    """元转换为整数分（四舍五入到分），支持 Decimal、int、float 和数字字符串"""
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return int((value * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def parse_amount(value):
+    """
+    解析接口传入的金额（元），返回 Decimal；格式错误、非有限值、不大于 0
+    或换算为分后超出 64 位整数范围时抛出 ValueError
+    """
+    try:
+        amount = value if isinstance(value, Decimal) else Decimal(str(value))
+    except (InvalidOperation, ValueError, TypeError):
+        raise ValueError('金额格式错误')
+    if not amount.is_finite():
+        raise ValueError('金额格式错误')
+    if amount <= 0:
+        raise ValueError('金额必须大于0')
+    # 先按数量级排除过大的值，避免换算为分时超出 Decimal 精度
+    if amount.adjusted() >= 18 or to_cents(amount) > MAX_CENTS:
+        raise ValueError('金额超出范围')
+    return amount
+
+
+def from_cents(cents):
+    """整数分转换为 Decimal 元"""
+    return (Decimal(cents) * _ONE_CENT).quantize(_ONE_CENT)
+
+
+def cents_to_float(cents):
+    """整数分转换为浮点数元，用于 JSON 输出"""
+    return (cents or 0) / 100
+
+
+class Money(TypeDecorator):
+    """金额类型：数据库中为整数分，Python 中为 Decimal 元"""
+
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return to_cents(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return from_cents(value)
+
+
+def cents(column):
+    """按整数分读取金额列或表达式（如 func.sum(cents(Expense.amount))），结果为 int"""
+    return type_coerce(column, Integer)
+
+
+def yuan(column):
+    """在 SQL 中将分换算为元，结果直接为 float"""
+    return type_coerce(type_coerce(column, Integer) / literal_column('100.0'), Float)
+
+
+def legacy_money_columns(engine):
+    """仍按 Numeric 声明（尚未迁移为整数分）的金额列，需运行 migrate_money_cents.py"""
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    legacy = []
+    for table, column in MONEY_COLUMNS:
+        if table not in tables:
+            continue
+        for info in inspector.get_columns(table):
+            if info['name'] == column and not isinstance(info['type'], Integer):
+                legacy.append(f'{table}.{column}')
+    return legacy
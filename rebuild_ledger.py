@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+台账重建脚本：根据收支记录重建 account_daily_balances 账户余额台账
+用法: python rebuild_ledger.py [user_id]
+"""
+
+import os
+import sys
+from dotenv import load_dotenv
+
+# 加载环境变量
+load_dotenv()
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app
+from database import db
+from ledger import rebuild_ledger
+
+
+def main(user_id=None):
+    """重建余额台账"""
+    with app.app_context():
+        try:
+            # 确保台账表已创建
+            db.create_all()
+            
+            if user_id is None:
+                print("正在重建全部用户的余额台账...")
+            else:
+                print(f"正在重建用户 {user_id} 的余额台账...")
+
+            row_count = rebuild_ledger(user_id)
+            db.session.commit()
+            print(f"台账重建完成，共 {row_count} 条台账记录")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"台账重建失败: {e}")
+            raise
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else None)
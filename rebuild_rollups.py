@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+汇总重建脚本：根据收支记录重建 expense_daily_rollup 汇总表
+用法: python rebuild_rollups.py [user_id]
+"""
+
+import os
+import sys
+from dotenv import load_dotenv
+
+# 加载环境变量
+load_dotenv()
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app
+from database import db
+from rollups import rebuild_rollups
+
+
+def main(user_id=None):
+    """重建汇总表"""
+    with app.app_context():
+        try:
+            # 确保汇总表已创建
+            db.create_all()
+            
+            if user_id is None:
+                print("正在重建全部用户的收支汇总...")
+            else:
+                print(f"正在重建用户 {user_id} 的收支汇总...")
+
+            row_count = rebuild_rollups(user_id)
+            db.session.commit()
+            print(f"汇总重建完成，共 {row_count} 条汇总记录")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"汇总重建失败: {e}")
+            raise
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else None)
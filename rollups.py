@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+收支汇总模块
+维护 expense_daily_rollup 预聚合表，统计接口直接读取汇总行而不再扫描整个 expenses 表
+"""
+
+from sqlalchemy import func, delete, and_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from database import db
+from models import Expense, ExpenseDailyRollup
+
+# 汇总维度
+ROLLUP_KEYS = ('user_id', 'rollup_date', 'expense_type', 'category', 'account_id')
+
+
+def snapshot(expense):
+    """记录支出记录当前的汇总维度和金额，用于更新前后对比"""
+    return {
+        'user_id': expense.user_id,
+        'rollup_date': expense.expense_date,
+        'expense_type': expense.expense_type or 'expense',
+        'category': expense.category,
+        'account_id': expense.account_id,
+        'amount': expense.amount
+    }
+
+
+def snapshot_values(values):
+    """由待插入的字段字典生成汇总快照（批量导入时使用）"""
+    return {
+        'user_id': values['user_id'],
+        'rollup_date': values['expense_date'],
+        'expense_type': values.get('expense_type') or 'expense',
+        'category': values['category'],
+        'account_id': values['account_id'],
+        'amount': values['amount']
+    }
+
+
+def _upsert(key, amount, count):
+    """按汇总维度累加金额和笔数"""
+    stmt = sqlite_insert(ExpenseDailyRollup).values(
+        total_amount=amount,
+        txn_count=count,
+        **key
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(ROLLUP_KEYS),
+        set_={
+            'total_amount': ExpenseDailyRollup.total_amount + stmt.excluded.total_amount,
+            'txn_count': ExpenseDailyRollup.txn_count + stmt.excluded.txn_count
+        }
+    )
+    db.session.execute(stmt)
+
+
+def apply(snap, sign=1):
+    """将一条记录计入（sign=1）或移出（sign=-1）汇总表，需在调用方事务内提交"""
+    key = {name: snap[name] for name in ROLLUP_KEYS}
+    _upsert(key, snap['amount'] * sign, sign)
+
+    # 移出后清理已经没有记录的汇总行
+    if sign < 0:
+        db.session.execute(
+            delete(ExpenseDailyRollup).where(
+                and_(
+                    *[getattr(ExpenseDailyRollup, name) == value for name, value in key.items()],
+                    ExpenseDailyRollup.txn_count <= 0
+                )
+            )
+        )
+
+
+def add_expense(expense):
+    """新增记录后计入汇总"""
+    apply(snapshot(expense), 1)
+
+
+def remove_expense(expense):
+    """删除记录前移出汇总"""
+    apply(snapshot(expense), -1)
+
+
+def add_snapshots(snaps):
+    """批量计入汇总：先在内存中按维度合并，每个维度只执行一次写入"""
+    merged = {}
+    for snap in snaps:
+        key = tuple(snap[name] for name in ROLLUP_KEYS)
+        amount, count = merged.get(key, (0, 0))
+        merged[key] = (amount + snap['amount'], count + 1)
+
+    for key, (amount, count) in merged.items():
+        _upsert(dict(zip(ROLLUP_KEYS, key)), amount, count)
+
+
+def rebuild_rollups(user_id=None):
+    """根据 expenses 表重建汇总，user_id 为空时重建全部用户，返回汇总行数"""
+    clear = delete(ExpenseDailyRollup)
+    if user_id is not None:
+        clear = clear.where(ExpenseDailyRollup.user_id == user_id)
+    db.session.execute(clear)
+
+    expense_type = func.coalesce(Expense.expense_type, 'expense')
+    source = select(
+        Expense.user_id,
+        Expense.expense_date,
+        expense_type,
+        Expense.category,
+        Expense.account_id,
+        func.sum(Expense.amount),
+        func.count(Expense.id)
+    ).group_by(
+        Expense.user_id,
+        Expense.expense_date,
+        expense_type,
+        Expense.category,
+        Expense.account_id
+    )
+    if user_id is not None:
+        source = source.where(Expense.user_id == user_id)
+
+    db.session.execute(
+        ExpenseDailyRollup.__table__.insert().from_select(
+            list(ROLLUP_KEYS) + ['total_amount', 'txn_count'], source
+        )
+    )
+
+    count_query = db.session.query(func.count(ExpenseDailyRollup.id))
+    if user_id is not None:
+        count_query = count_query.filter(ExpenseDailyRollup.user_id == user_id)
+    return count_query.scalar()
@@ -36,8 +36,10 @@ const ENDPOINTS = {
         category: `${API_BASE}/statistics/category-analysis`,
         trend: `${API_BASE}/statistics/trend-analysis`,
         account: `${API_BASE}/statistics/account-analysis`,
-        monthly: `${API_BASE}/statistics/monthly-summary`
-    }
+        monthly: `${API_BASE}/statistics/monthly-summary`,
+        dashboard: `${API_BASE}/statistics/dashboard`
+    },
+    batch: `${API_BASE}/batch`
 };
 
 // 工具函数
@@ -153,6 +155,9 @@ class Toast {
 
 // API 请求类
 class API {
+    // GET 响应缓存：url -> { etag, data }，配合 If-None-Match 避免重复下载未变化的数据
+    static etagCache = new Map();
+
     static async request(url, options = {}) {
         const defaultOptions = {
             headers: {
@@ -165,6 +170,13 @@ class API {
             defaultOptions.headers['Authorization'] = `Bearer ${authToken}`;
         }
 
+        // GET 请求携带上次的 ETag
+        const method = (options.method || 'GET').toUpperCase();
+        const cached = method === 'GET' ? this.etagCache.get(url) : null;
+        if (cached) {
+            defaultOptions.headers['If-None-Match'] = cached.etag;
+        }
+
         const finalOptions = {
             ...defaultOptions,
             ...options,
@@ -182,12 +194,22 @@ class API {
                 throw new Error('登录已过期，请重新登录');
             }
 
+            // 数据未变化，直接使用缓存
+            if (response.status === 304 && cached) {
+                return cached.data;
+            }
+
             const data = await response.json();
 
             if (!response.ok) {
                 throw new Error(data.error || `HTTP ${response.status}`);
             }
 
+            const etag = response.headers.get('ETag');
+            if (method === 'GET' && etag) {
+                this.etagCache.set(url, { etag, data });
+            }
+
             return data;
         } catch (error) {
             console.error('API Request Error:', error);
@@ -222,6 +244,19 @@ class API {
             method: 'DELETE'
         });
     }
+
+    // 将多个 GET 请求合并为一次 /api/batch 请求，按顺序返回各自的数据
+    static async batch(requests) {
+        const result = await this.post(ENDPOINTS.batch, {
+            requests: requests.map(([path, params = {}]) => ({ path, params }))
+        });
+        return result.responses.map(item => {
+            if (item.status !== 200) {
+                throw new Error((item.body && item.body.error) || `HTTP ${item.status}`);
+            }
+            return item.body;
+        });
+    }
 }
 
 // 认证管理类
@@ -290,6 +325,7 @@ class Auth {
         currentUser = null;
         localStorage.removeItem('authToken');
         localStorage.removeItem('currentUser');
+        API.etagCache.clear();
         this.updateUI(false);
         PageManager.showPage('login');
         Toast.info('已退出登录');
@@ -427,20 +463,11 @@ class PageManager {
 class Dashboard {
     static async load() {
         try {
-            // 加载概览数据
-            const overview = await API.get(ENDPOINTS.statistics.overview, { period: 'month' });
-            this.updateOverviewCards(overview);
-
-            // 加载最近交易
-            const expenses = await API.get(ENDPOINTS.expenses.list, { per_page: 5 });
-            this.updateRecentTransactions(expenses.expenses);
-
-            // 加载分类图表
-            const categoryData = await API.get(ENDPOINTS.statistics.category, {
-                type: 'expense',
-                start_date: Utils.getTodayString().substring(0, 8) + '01' // 本月第一天
-            });
-            this.updateCategoryChart(categoryData.categories);
+            // 一次请求加载概览、最近交易和本月分类数据
+            const data = await API.get(ENDPOINTS.statistics.dashboard, { recent: 5 });
+            this.updateOverviewCards(data.overview);
+            this.updateRecentTransactions(data.recent_transactions);
+            this.updateCategoryChart(data.category_analysis.categories);
 
         } catch (error) {
             console.error('Dashboard load error:', error);
@@ -693,11 +720,25 @@ class AccountManager {
 
 // 收支记录管理类
 class ExpenseManager {
+    // 游标分页状态
+    static filters = {};
+    static nextCursor = null;
+    static loadingMore = false;
+    static scrollObserver = null;
+    // 每次重新加载列表时递增，晚于新列表返回的旧请求结果直接丢弃
+    static loadToken = 0;
+
     static async load(filters = {}) {
+        const token = ++this.loadToken;
         try {
-            const response = await API.get(ENDPOINTS.expenses.list, filters);
+            this.filters = filters;
+            this.nextCursor = null;
+            this.loadingMore = false;
+            const response = await API.get(ENDPOINTS.expenses.list, { ...filters, cursor: '' });
+            if (token !== this.loadToken) return;
             const expenses = response.expenses || [];
             this.updateExpenseList(expenses);
+            this.updatePaginationState(response.pagination);
             this.loadExpenseCategories();
             // 加载账户选项到下拉框
             AccountManager.loadAccountOptions();
@@ -706,6 +747,55 @@ class ExpenseManager {
         }
     }
 
+    static async loadMore() {
+        if (this.loadingMore || !this.nextCursor) return;
+
+        const token = this.loadToken;
+        const cursor = this.nextCursor;
+        this.loadingMore = true;
+        try {
+            const response = await API.get(ENDPOINTS.expenses.list, { ...this.filters, cursor });
+            // 请求期间列表已按新的筛选条件重新加载（或已追加过该页），丢弃旧结果
+            if (token !== this.loadToken || cursor !== this.nextCursor) return;
+            this.updateExpenseList(response.expenses || [], true);
+            this.updatePaginationState(response.pagination);
+        } catch (error) {
+            console.error('加载更多收支记录失败:', error);
+        } finally {
+            if (token === this.loadToken) {
+                this.loadingMore = false;
+            }
+        }
+    }
+
+    static updatePaginationState(pagination) {
+        this.nextCursor = pagination && pagination.has_next ? pagination.next_cursor : null;
+
+        const sentinel = document.getElementById('expensesPagination');
+        if (!sentinel) return;
+
+        sentinel.innerHTML = this.nextCursor
+            ? '<div class="text-center text-muted py-2"><i class="bi bi-hourglass-split"></i> 加载中...</div>'
+            : '';
+
+        // 滚动到列表底部时自动加载下一页
+        if (!this.scrollObserver && 'IntersectionObserver' in window) {
+            this.scrollObserver = new IntersectionObserver(entries => {
+                if (entries.some(entry => entry.isIntersecting)) {
+                    this.loadMore();
+                }
+            }, { rootMargin: '200px' });
+        }
+        if (this.scrollObserver) {
+            // 观察器只在可见状态变化时回调：追加的一页较短、底部仍然可见时不会再触发，
+            // 重新观察会立即按当前状态回调一次，底部可见时继续加载下一页
+            this.scrollObserver.unobserve(sentinel);
+            this.scrollObserver.observe(sentinel);
+        } else if (this.nextCursor) {
+            sentinel.innerHTML = '<div class="text-center py-2"><button class="btn btn-sm btn-outline-secondary" onclick="ExpenseManager.loadMore()">加载更多</button></div>';
+        }
+    }
+
     static applyFilters() {
         const typeEl = document.getElementById('expenseTypeFilter');
         const categoryEl = document.getElementById('expenseCategoryFilter');
@@ -738,11 +828,11 @@ class ExpenseManager {
         this.load();
     }
 
-    static updateExpenseList(expenses) {
+    static updateExpenseList(expenses, append = false) {
         const container = document.getElementById('expensesList');
         if (!container) return;
 
-        container.innerHTML = expenses.map(expense => `
+        const html = expenses.map(expense => `
             <div class="col-12">
                 <div class="card mb-2">
                     <div class="card-body py-2">
@@ -787,6 +877,12 @@ class ExpenseManager {
                 </div>
             </div>
         `).join('');
+
+        if (append) {
+            container.insertAdjacentHTML('beforeend', html);
+        } else {
+            container.innerHTML = html;
+        }
     }
 
     static async loadExpenseCategories() {
@@ -1101,19 +1197,18 @@ class ReimbursementManager {
 class StatisticsManager {
     static async load() {
         try {
-            const overview = await API.get(ENDPOINTS.statistics.overview);
+            // 合并为一次批量请求
+            const [overview, categoryData, trendData, accountData, monthlyData] = await API.batch([
+                [ENDPOINTS.statistics.overview],
+                [ENDPOINTS.statistics.category],
+                [ENDPOINTS.statistics.trend],
+                [ENDPOINTS.statistics.account],
+                [ENDPOINTS.statistics.monthly]
+            ]);
             this.updateOverview(overview);
-
-            const categoryData = await API.get(ENDPOINTS.statistics.category);
             this.updateCategoryChart(categoryData.categories || []);
-
-            const trendData = await API.get(ENDPOINTS.statistics.trend);
             this.updateTrendChart(trendData.trend || []);
-
-            const accountData = await API.get(ENDPOINTS.statistics.account);
             this.updateExpenseRanking(accountData.accounts || []);
-
-            const monthlyData = await API.get(ENDPOINTS.statistics.monthly);
             this.updateMonthlySummary(monthlyData);
         } catch (error) {
             console.error('StatisticsManager.load error:', error);
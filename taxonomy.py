@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分类与标签关联模块
+收支记录的 category / tags 字符串仍原样保存（用于输出、汇总和全文检索），
+同时维护 category_id 外键和 expense_tags 关联表，筛选时走整数索引而不是字符串匹配
+"""
+
+from datetime import datetime
+from sqlalchemy import select, update, delete, and_, func, inspect, exists, literal, union_all
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from database import db
+from models import Category, Expense, Tag, ExpenseTag, User
+
+# 标签名最大长度（与 Tag.name 一致）
+TAG_MAX_LENGTH = 50
+
+# 默认分类：(值, 名称, 类型)，排序号按顺序从 1 开始
+DEFAULT_CATEGORIES = (
+    ('food', '餐饮', 'expense'),
+    ('transport', '交通', 'expense'),
+    ('shopping', '购物', 'expense'),
+    ('entertainment', '娱乐', 'expense'),
+    ('healthcare', '医疗', 'expense'),
+    ('education', '教育', 'expense'),
+    ('housing', '住房', 'expense'),
+    ('utilities', '水电费', 'expense'),
+    ('communication', '通讯', 'expense'),
+    ('insurance', '保险', 'expense'),
+    ('investment', '投资', 'both'),
+    ('salary', '工资', 'income'),
+    ('bonus', '奖金', 'income'),
+    ('other', '其他', 'both')
+)
+
+# 分批初始化默认分类时每批的用户数（每批按用户ID范围选取，不绑定ID列表，不受 SQLite 变量个数限制）
+PROVISION_CHUNK_SIZE = 1000
+
+
+def parse_tags(tags):
+    """标签列表或逗号分隔字符串转为去重后的标签名列表（保持原顺序）"""
+    if not tags:
+        return []
+    if isinstance(tags, str):
+        tags = tags.split(',')
+    names = []
+    for tag in tags:
+        name = str(tag).strip()[:TAG_MAX_LENGTH]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def category_id_for(user_id, value):
+    """分类值对应的分类ID，用户没有该分类时返回 None"""
+    if not value:
+        return None
+    return db.session.execute(
+        select(Category.id).where(Category.user_id == user_id, Category.value == value)
+    ).scalar()
+
+
+def tag_ids_for(user_id, names):
+    """标签名对应的标签ID：{标签名: ID}，不存在的标签自动创建"""
+    names = set(names)
+    if not names:
+        return {}
+    db.session.execute(
+        sqlite_insert(Tag).on_conflict_do_nothing(index_elements=['user_id', 'name']),
+        [{'user_id': user_id, 'name': name} for name in names]
+    )
+    return dict(db.session.execute(
+        select(Tag.name, Tag.id).where(Tag.user_id == user_id, Tag.name.in_(names))
+    ).all())
+
+
+def link_tags(pairs):
+    """批量写入 (收支记录ID, 标签ID) 关联"""
+    if pairs:
+        db.session.execute(
+            sqlite_insert(ExpenseTag).on_conflict_do_nothing(),
+            [{'expense_id': expense_id, 'tag_id': tag_id} for expense_id, tag_id in pairs]
+        )
+
+
+def set_expense_tags(user_id, expense_id, names):
+    """将收支记录的标签关联替换为 names，需在调用方事务内提交"""
+    db.session.execute(delete(ExpenseTag).where(ExpenseTag.expense_id == expense_id))
+    tag_ids = tag_ids_for(user_id, names)
+    link_tags([(expense_id, tag_ids[name]) for name in names])
+
+
+def clear_expense_tags(expense_id):
+    """删除收支记录的标签关联"""
+    db.session.execute(delete(ExpenseTag).where(ExpenseTag.expense_id == expense_id))
+
+
+def link_categories(user_id=None, value=None, user_ids=None, user_id_range=None):
+    """
+    按分类值回填收支记录的 category_id（只处理尚未关联的记录），返回更新的行数。
+    新建分类、修改分类值或初始化默认分类后调用，使按分类值保存的历史记录关联到分类；
+    user_ids 或 user_id_range（(起, 止]）用于分批处理多个用户
+    """
+    category_id = (
+        select(Category.id)
+        .where(Category.user_id == Expense.user_id, Category.value == Expense.category)
+        .scalar_subquery()
+    )
+    # 只是补充关联，保留记录的修改时间
+    stmt = update(Expense).where(Expense.category_id.is_(None), category_id.isnot(None)).values(
+        category_id=category_id, updated_at=Expense.updated_at
+    )
+    if user_id is not None:
+        stmt = stmt.where(Expense.user_id == user_id)
+    if user_ids is not None:
+        stmt = stmt.where(Expense.user_id.in_(user_ids))
+    if user_id_range is not None:
+        stmt = stmt.where(Expense.user_id > user_id_range[0], Expense.user_id <= user_id_range[1])
+    if value is not None:
+        stmt = stmt.where(Expense.category == value)
+    return db.session.execute(stmt.execution_options(synchronize_session=False)).rowcount
+
+
+def _default_categories_select():
+    """默认分类的常量结果集（UNION ALL），用于 INSERT ... SELECT"""
+    return union_all(*[
+        select(
+            literal(value).label('value'),
+            literal(label).label('label'),
+            literal(category_type).label('category_type'),
+            literal(sort_order).label('sort_order')
+        )
+        for sort_order, (value, label, category_type) in enumerate(DEFAULT_CATEGORIES, start=1)
+    ]).subquery('defaults')
+
+
+def _without_categories():
+    """用户还没有任何分类"""
+    return ~exists().where(Category.user_id == User.id)
+
+
+def _insert_default_categories(users):
+    """为满足 users 条件且还没有任何分类的用户添加默认分类，一条 INSERT ... SELECT 完成，返回插入的行数"""
+    now = datetime.utcnow()
+    defaults = _default_categories_select()
+    source = select(
+        User.id,
+        defaults.c.value,
+        defaults.c.label,
+        defaults.c.category_type,
+        literal(True),
+        defaults.c.sort_order,
+        literal(now),
+        literal(now)
+    ).select_from(User).join(defaults, literal(True)).where(users, _without_categories())
+    stmt = sqlite_insert(Category).from_select(
+        ['user_id', 'value', 'label', 'category_type', 'is_active', 'sort_order', 'created_at', 'updated_at'],
+        source
+    ).on_conflict_do_nothing(index_elements=['user_id', 'value'])
+    return db.session.execute(stmt).rowcount
+
+
+def add_default_categories(user_ids):
+    """
+    为 user_ids 中还没有任何分类的用户添加默认分类，返回插入的行数。
+    已有分类的用户不受影响，重复执行安全；需在调用方事务内提交
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0
+
+    inserted = _insert_default_categories(User.id.in_(user_ids))
+    # 关联已使用这些分类值的收支记录
+    if inserted:
+        link_categories(user_ids=user_ids)
+    return inserted
+
+
+def provision_default_categories(chunk_size=PROVISION_CHUNK_SIZE, log=None):
+    """
+    为所有还没有分类的用户添加默认分类：每批 chunk_size 个用户执行一次 INSERT ... SELECT 并提交，
+    每批以用户ID范围 (last_id, upper] 选取，内存占用与用户数无关；中断后重新执行会跳过已完成的用户。
+    返回 (用户数, 分类数)
+    """
+    last_id = 0
+    users = 0
+    categories = 0
+    while True:
+        chunk = (
+            select(User.id)
+            .where(User.id > last_id, _without_categories())
+            .order_by(User.id).limit(chunk_size)
+        ).subquery()
+        count, upper = db.session.execute(select(func.count(), func.max(chunk.c.id))).one()
+        if not count:
+            return users, categories
+
+        inserted = _insert_default_categories(and_(User.id > last_id, User.id <= upper))
+        if inserted:
+            link_categories(user_id_range=(last_id, upper))
+        categories += inserted
+        db.session.commit()
+        last_id = upper
+        users += count
+        if log:
+            log(f"已为 {users} 个用户初始化默认分类")
+
+
+def unlink_category(category_id):
+    """解除收支记录与分类的关联（分类值修改前调用）"""
+    db.session.execute(
+        update(Expense).where(Expense.category_id == category_id)
+        .values(category_id=None, updated_at=Expense.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def tag_condition(user_id, name):
+    """按标签筛选的条件：经 expense_tags 的 (tag_id, expense_id) 索引定位记录ID"""
+    tagged = (
+        select(ExpenseTag.expense_id)
+        .join(Tag, Tag.id == ExpenseTag.tag_id)
+        .where(and_(Tag.user_id == user_id, Tag.name == name))
+    )
+    return Expense.id.in_(tagged)
+
+
+def rebuild_expense_tags(user_id=None, chunk_size=5000):
+    """根据 expenses.tags 字符串重建标签关联，user_id 为空时重建全部用户，返回关联行数"""
+    clear = delete(ExpenseTag)
+    source = select(Expense.id, Expense.user_id, Expense.tags).where(
+        Expense.tags.isnot(None), Expense.tags != ''
+    )
+    if user_id is not None:
+        clear = clear.where(ExpenseTag.expense_id.in_(select(Expense.id).where(Expense.user_id == user_id)))
+        source = source.where(Expense.user_id == user_id)
+    db.session.execute(clear)
+
+    last_id = 0
+    count = 0
+    while True:
+        rows = db.session.execute(
+            source.where(Expense.id > last_id).order_by(Expense.id).limit(chunk_size)
+        ).all()
+        if not rows:
+            return count
+        last_id = rows[-1].id
+
+        # 每批按用户合并查询（或创建）标签
+        names_by_user = {}
+        parsed = []
+        for expense_id, user_id, tags in rows:
+            names = parse_tags(tags)
+            parsed.append((expense_id, user_id, names))
+            names_by_user.setdefault(user_id, set()).update(names)
+        tag_ids = {
+            user_id: tag_ids_for(user_id, names) for user_id, names in names_by_user.items()
+        }
+        pairs = [
+            (expense_id, tag_ids[user_id][name])
+            for expense_id, user_id, names in parsed for name in names
+        ]
+        link_tags(pairs)
+        count += len(pairs)
+
+
+def needs_migration(engine):
+    """expenses 表已存在但还没有 category_id 列或 expense_tags 表，需运行 migrate_category_tags.py"""
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    if 'expenses' not in tables:
+        return False
+    columns = {info['name'] for info in inspector.get_columns('expenses')}
+    return 'category_id' not in columns or 'expense_tags' not in tables
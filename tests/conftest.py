@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试公共夹具
+app.py 在导入时读取环境变量并创建应用，因此在导入前把数据库、任务目录指向临时目录，
+测试不会读写 instance/ 下的数据库
+"""
+
+import itertools
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_DIR = tempfile.mkdtemp(prefix='cash-tests-')
+
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(TEST_DIR, 'test.db')
+os.environ['JOB_DIR'] = os.path.join(TEST_DIR, 'jobs')
+os.environ['METRICS_PATH'] = os.path.join(TEST_DIR, 'metrics.db')
+os.environ['METRICS_ENABLED'] = 'False'
+os.environ['STATS_CACHE_BACKEND'] = 'memory'
+sys.path.insert(0, ROOT)
+
+PASSWORD = 'test123456'
+
+_user_numbers = itertools.count(1)
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app as flask_app
+    flask_app.config['TESTING'] = True
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(client):
+    """注册一个新用户并创建账户，返回 {'id', 'headers', 'account_id'}"""
+    def factory(balance=0):
+        username = f'tester{os.getpid()}_{next(_user_numbers)}'
+        response = client.post('/api/auth/register', json={
+            'username': username,
+            'email': f'{username}@example.com',
+            'password': PASSWORD,
+            'name': username
+        })
+        assert response.status_code == 201, response.get_json()
+        user_id = response.get_json()['user']['id']
+
+        token = client.post('/api/auth/login', json={
+            'username': username, 'password': PASSWORD
+        }).get_json()['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+
+        response = client.post('/api/accounts/', json={
+            'name': '测试账户', 'account_type': 'bank', 'balance': balance
+        }, headers=headers)
+        assert response.status_code == 201, response.get_json()
+
+        return {
+            'id': user_id,
+            'headers': headers,
+            'account_id': response.get_json()['account']['id']
+        }
+    return factory
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""批量请求接口测试"""
+
+
+def _batch(client, user, requests):
+    response = client.post('/api/batch', json={'requests': requests}, headers=user['headers'])
+    assert response.status_code == 200
+    return response.get_json()['responses']
+
+
+def test_query_in_path_is_merged_with_params(client, make_user):
+    user = make_user()
+    for amount in (10, 20, 30):
+        client.post('/api/expenses/', json={
+            'account_id': user['account_id'], 'amount': amount, 'category': 'food'
+        }, headers=user['headers'])
+
+    responses = _batch(client, user, [
+        {'path': '/api/expenses/?per_page=1', 'params': {'category': 'food'}},
+        {'path': '/api/expenses/?per_page=2'}
+    ])
+    assert [item['status'] for item in responses] == [200, 200]
+    assert len(responses[0]['body']['expenses']) == 1
+    assert responses[0]['body']['pagination']['total'] == 3
+    assert len(responses[1]['body']['expenses']) == 2
+
+
+def test_bad_item_does_not_fail_batch(client, make_user):
+    user = make_user()
+    responses = _batch(client, user, [
+        {'path': '/api/expenses/export', 'params': {'format': 'csv'}},
+        {'path': '/api/not-found'},
+        {'path': '/api/accounts/', 'params': 'x'},
+        {'path': 123},
+        {'path': '/api/accounts/'}
+    ])
+    assert [item['status'] for item in responses] == [400, 404, 400, 400, 200]
+    assert responses[0]['body']['error']
+    assert responses[4]['body']['accounts'][0]['id'] == user['account_id']
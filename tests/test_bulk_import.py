@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""批量导入测试：无效行逐行报告，不影响同一批中的有效行"""
+
+import json
+
+
+def _import(client, user, rows):
+    body = '\n'.join(row if isinstance(row, str) else json.dumps(row) for row in rows)
+    return client.post('/api/expenses/bulk', data=body.encode(), headers=dict(
+        user['headers'], **{'Content-Type': 'application/x-ndjson'}
+    ))
+
+
+def test_invalid_amounts_are_reported_per_row(client, make_user):
+    user = make_user()
+
+    def row(amount):
+        return {'account_id': user['account_id'], 'amount': amount, 'category': 'food'}
+
+    response = _import(client, user, [
+        row(10),
+        row('1e17'),
+        '{"account_id": %d, "amount": 1e400, "category": "food"}' % user['account_id'],
+        '{"account_id": %d, "amount": NaN, "category": "food"}' % user['account_id'],
+        row('NaN'),
+        row(-5),
+        row('20.5')
+    ])
+    assert response.status_code == 201
+    result = response.get_json()
+    assert (result['imported'], result['failed']) == (2, 5)
+    assert result['errors'] == [
+        {'row': 2, 'error': '金额超出范围'},
+        {'row': 3, 'error': '金额格式错误'},
+        {'row': 4, 'error': '金额格式错误'},
+        {'row': 5, 'error': '金额格式错误'},
+        {'row': 6, 'error': '金额必须大于0'}
+    ]
+
+    response = client.get('/api/accounts/', headers=user['headers'])
+    assert response.get_json()['accounts'][0]['balance'] == -30.5
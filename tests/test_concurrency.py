@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多进程并发记账压力测试
+多个进程（与 gunicorn 多 worker 相同，各自持有连接池）同时新增、修改、删除同一用户两个账户的收支记录，
+结束后账户余额应等于期初余额加上现存记录的收支净额，也应与余额台账的累计净额一致：
+没有丢失的余额更新，也没有乐观锁版本冲突导致的失败请求
+"""
+
+import multiprocessing
+import os
+import random
+import sqlite3
+
+import pytest
+
+PROCESSES = 4
+OPERATIONS_PER_PROCESS = 50
+OPENING_BALANCES = (1000, 500)
+
+
+def _client(db_path, profile):
+    """在子进程中按指定数据库和 SQLite 配置创建应用，返回测试客户端"""
+    os.environ['DATABASE_URL'] = 'sqlite:///' + db_path
+    os.environ['SQLITE_PROFILE'] = profile
+    from app import app
+    return app.test_client()
+
+
+def _setup(db_path, profile):
+    """注册用户并创建两个账户，返回 (请求头, 账户ID列表)"""
+    client = _client(db_path, profile)
+    user = {'username': 'stress', 'email': 'stress@example.com', 'password': 'stress123', 'name': 'stress'}
+    assert client.post('/api/auth/register', json=user).status_code == 201
+    token = client.post('/api/auth/login', json=user).get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    account_ids = []
+    for i, balance in enumerate(OPENING_BALANCES):
+        response = client.post('/api/accounts/', json={
+            'name': f'账户{i}', 'account_type': 'bank', 'balance': balance
+        }, headers=headers)
+        account_ids.append(response.get_json()['account']['id'])
+    return headers, account_ids
+
+
+def _work(db_path, profile, headers, account_ids, seed, barrier):
+    """随机新增、修改、删除本进程创建的记录，返回失败请求的 (操作, 状态码, 响应)"""
+    client = _client(db_path, profile)
+    # 所有进程完成导入后同时开始，保证请求真正并发
+    barrier.wait()
+    rnd = random.Random(seed)
+    created = []
+    failures = []
+
+    for _ in range(OPERATIONS_PER_PROCESS):
+        action = rnd.choice(('create', 'create', 'create', 'update', 'delete')) if created else 'create'
+        if action == 'create':
+            response = client.post('/api/expenses/', json={
+                'account_id': rnd.choice(account_ids),
+                'amount': rnd.randint(1, 10000) / 100,
+                'category': 'food',
+                'expense_type': rnd.choice(('expense', 'income')),
+                'expense_date': f'2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}'
+            }, headers=headers)
+            if response.status_code == 201:
+                created.append(response.get_json()['expense']['id'])
+        elif action == 'update':
+            response = client.put(f'/api/expenses/{rnd.choice(created)}', json={
+                'account_id': rnd.choice(account_ids),
+                'amount': rnd.randint(1, 10000) / 100,
+                'expense_type': rnd.choice(('expense', 'income'))
+            }, headers=headers)
+        else:
+            response = client.delete(f'/api/expenses/{created.pop(rnd.randrange(len(created)))}',
+                                     headers=headers)
+
+        if response.status_code not in (200, 201):
+            failures.append((action, response.status_code, response.get_json()))
+    return failures
+
+
+@pytest.mark.parametrize('profile', ['default', 'production'])
+def test_concurrent_writes_keep_balances_consistent(tmp_path, profile):
+    db_path = str(tmp_path / 'stress.db')
+    context = multiprocessing.get_context('spawn')
+
+    with context.Pool(1) as pool:
+        headers, account_ids = pool.apply(_setup, (db_path, profile))
+
+    with context.Manager() as manager, context.Pool(PROCESSES) as pool:
+        barrier = manager.Barrier(PROCESSES)
+        results = pool.starmap(_work, [
+            (db_path, profile, headers, account_ids, seed, barrier) for seed in range(PROCESSES)
+        ])
+    failures = [failure for result in results for failure in result]
+    assert failures == []
+
+    conn = sqlite3.connect(db_path)
+    try:
+        for account_id, opening in zip(account_ids, OPENING_BALANCES):
+            balance = conn.execute('SELECT balance FROM accounts WHERE id = ?', (account_id,)).fetchone()[0]
+            net = conn.execute(
+                "SELECT coalesce(sum(CASE WHEN coalesce(expense_type, 'expense') = 'expense' "
+                "THEN -amount ELSE amount END), 0) FROM expenses WHERE account_id = ?",
+                (account_id,)
+            ).fetchone()[0]
+            ledger = conn.execute(
+                'SELECT coalesce(sum(net_amount), 0) FROM account_daily_balances WHERE account_id = ?',
+                (account_id,)
+            ).fetchone()[0]
+            cumulative = conn.execute(
+                'SELECT cumulative_amount FROM account_daily_balances WHERE account_id = ? '
+                'ORDER BY balance_date DESC LIMIT 1',
+                (account_id,)
+            ).fetchone()
+
+            # 金额以分存储
+            assert balance == opening * 100 + net
+            assert ledger == net
+            assert (cumulative[0] if cumulative else 0) == net
+    finally:
+        conn.close()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""全文检索测试：trigram 索引匹配不到的 1~2 个字符关键词改查二元组表"""
+
+import pytest
+
+import fulltext
+from database import db
+from instrumentation import count_statements
+
+DESCRIPTIONS = ['午餐外卖', '打车回家', 'Taxi to airport', '50%折扣', '超长备注' + '啊' * fulltext.SHORT_INDEX_MAX_LENGTH + '尾巴']
+
+
+@pytest.fixture
+def user_with_expenses(client, make_user):
+    user = make_user()
+    for description in DESCRIPTIONS:
+        response = client.post('/api/expenses/', json={
+            'account_id': user['account_id'], 'amount': 10, 'category': 'food', 'description': description
+        }, headers=user['headers'])
+        assert response.status_code == 201
+    return user
+
+
+def _search(client, user, term, **params):
+    response = client.get('/api/expenses/', query_string=dict(params, search=term), headers=user['headers'])
+    assert response.status_code == 200
+    return sorted(item['description'] for item in response.get_json()['expenses'])
+
+
+@pytest.mark.parametrize('term, expected', [
+    ('外卖', ['午餐外卖']),
+    ('打', ['打车回家']),
+    ('ta', ['Taxi to airport']),
+    ('%', ['50%折扣']),
+    ('家', ['打车回家']),
+    ('尾巴', [DESCRIPTIONS[4]]),
+    ('回到', [])
+])
+def test_short_terms(client, user_with_expenses, term, expected):
+    assert _search(client, user_with_expenses, term) == expected
+    assert _search(client, user_with_expenses, term, cursor='') == expected
+
+
+def test_short_terms_follow_updates(client, user_with_expenses):
+    user = user_with_expenses
+    expense_id = client.get('/api/expenses/', query_string={'search': '外卖'},
+                            headers=user['headers']).get_json()['expenses'][0]['id']
+    client.put(f'/api/expenses/{expense_id}', json={'description': '晚餐堂食'}, headers=user['headers'])
+    assert _search(client, user, '外卖') == []
+    assert _search(client, user, '堂食') == ['晚餐堂食']
+
+    client.delete(f'/api/expenses/{expense_id}', headers=user['headers'])
+    assert _search(client, user, '堂食') == []
+
+
+def test_short_terms_use_index(app, client, user_with_expenses):
+    """短词查询应走二元组表的主键，不能全表扫描 expenses 做 LIKE"""
+    with app.app_context(), count_statements() as statements:
+        client.get('/api/expenses/', query_string={'search': '外卖'}, headers=user_with_expenses['headers'])
+    statement, parameters = next(item for item in statements if 'expenses_fts_grams' in item[0])
+    with app.app_context(), db.engine.connect() as conn:
+        rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+    plan = '\n'.join(row[-1] for row in rows)
+    assert 'SEARCH expenses_fts_grams USING PRIMARY KEY' in plan
+    assert 'SCAN expenses\n' not in plan + '\n'
+
+
+def test_like_fallback_without_index(client, user_with_expenses, monkeypatch):
+    """二元组表不可用时回退到 LIKE 查询，结果一致"""
+    monkeypatch.setitem(fulltext._available, 'expenses_fts_grams', False)
+    assert fulltext.match_subquery('expenses_fts', '外卖') is None
+    assert _search(client, user_with_expenses, '外卖') == ['午餐外卖']
+    assert _search(client, user_with_expenses, 'ta') == ['Taxi to airport']
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""性能观测默认关闭：未配置任何观测选项时不注册请求钩子和 SQL 事件监听"""
+
+import json
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+# app.py 在导入时读取配置，需在新进程中按默认环境变量导入
+CHECK = '''
+import json
+from app import app
+from database import db
+
+with app.app_context():
+    listening = any(
+        getattr(fn, '__module__', '') == 'instrumentation' for fn in db.engine.dispatch.before_cursor_execute
+    )
+print(json.dumps({
+    'hooks': [fn.__name__ for fn in app.before_request_funcs.get(None, [])],
+    'listening': listening,
+    'metrics': 'metrics' in app.view_functions
+}))
+'''
+
+
+def test_instrumentation_is_opt_in(tmp_path):
+    env = {
+        name: value for name, value in os.environ.items()
+        if not name.startswith(('METRICS_', 'INSTRUMENTATION_', 'SLOW_QUERY_', 'PROFILE_'))
+    }
+    env.update(DATABASE_URL='sqlite:///' + str(tmp_path / 'app.db'), JOB_DIR=str(tmp_path / 'jobs'))
+    output = subprocess.run(
+        [sys.executable, '-c', CHECK], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+
+    assert 'start_request_timing' not in result['hooks']
+    assert not result['listening']
+    assert not result['metrics']
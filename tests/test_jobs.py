@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""后台任务接口测试"""
+
+import jobs
+
+
+def test_job_status_is_not_answered_with_304(app, client, make_user):
+    """任务状态由 worker 更新而不递增数据版本，轮询不能命中条件请求"""
+    user = make_user()
+    response = client.post('/api/jobs/', json={'type': 'rebuild_rollups'}, headers=user['headers'])
+    assert response.status_code == 202
+    job_id = response.get_json()['job']['id']
+
+    response = client.get(f'/api/jobs/{job_id}', headers=user['headers'])
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
+    assert response.get_json()['job']['status'] == 'pending'
+
+    jobs.run_worker(app, once=True)
+
+    # If-None-Match: * 对任何 ETag 都成立，未排除的接口会直接返回 304
+    headers = dict(user['headers'], **{'If-None-Match': '*'})
+    response = client.get(f'/api/jobs/{job_id}', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['job']['status'] == 'succeeded'
+
+    response = client.get('/api/jobs/', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['jobs'][0]['status'] == 'succeeded'
+
+
+def test_other_api_gets_still_conditional(client, make_user):
+    user = make_user()
+    response = client.get('/api/accounts/', headers=user['headers'])
+    etag = response.headers['ETag']
+
+    headers = dict(user['headers'], **{'If-None-Match': etag})
+    assert client.get('/api/accounts/', headers=headers).status_code == 304
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""指标存储测试"""
+
+import sqlite3
+import time
+
+from metrics import RETIRED_WORKER, MetricsStore
+
+
+def _add_worker(path, worker, flushed_at, rows):
+    """模拟另一个进程写入的 worker 行"""
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany(
+            'INSERT INTO metric_values (worker, name, suffix, labels, le, value) VALUES (?, ?, ?, ?, ?, ?)',
+            [(worker, *row) for row in rows]
+        )
+        conn.execute(
+            'INSERT INTO metric_workers (worker, pid, started_at, flushed_at) VALUES (?, ?, ?, ?)',
+            (worker, 1, flushed_at - 10, flushed_at)
+        )
+    conn.close()
+
+
+def _workers(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {
+            worker for worker, in conn.execute('SELECT DISTINCT worker FROM metric_values')
+        }, {worker for worker, in conn.execute('SELECT worker FROM metric_workers')}
+    finally:
+        conn.close()
+
+
+def test_stale_workers_are_folded_into_retired_row(tmp_path):
+    path = str(tmp_path / 'metrics.db')
+    store = MetricsStore(path, flush_interval=60, worker_ttl=600)
+    requests = ('cash_http_requests_total', '', 'blueprint="expenses"', '')
+    bucket = ('cash_http_request_duration_seconds', '_bucket', 'blueprint="expenses"', '0.1')
+
+    for worker, count in (('old:1:1', 3), ('old:2:2', 4)):
+        _add_worker(path, worker, 1000.0, [
+            (*requests, count),
+            (*bucket, count),
+            ('cash_stats_cache_hit_ratio', '', '', '', 0.5),
+            ('cash_worker_requests_total', '', f'worker="{worker}"', '', count)
+        ])
+    store.inc('cash_http_requests_total', (('blueprint', 'expenses'),), amount=5)
+    values, workers = store.collect()
+
+    # 汇总值不变，已退出 worker 的仪表值和 worker 序列不再输出
+    assert values[requests] == 12
+    assert values[bucket] == 7
+    assert ('cash_stats_cache_hit_ratio', '', '', '') not in values
+    assert not any(key[0] == 'cash_worker_requests_total' for key in values)
+    assert [worker for worker, *_ in workers] == [store.worker_id()]
+    assert _workers(path) == ({RETIRED_WORKER, store.worker_id()}, {store.worker_id()})
+
+    # 后续退出的 worker 累加到同一行
+    _add_worker(path, 'old:3:3', 1000.0, [(*requests, 2)])
+    values, _ = store.collect()
+    assert values[requests] == 14
+    assert _workers(path)[0] == {RETIRED_WORKER, store.worker_id()}
+
+
+def test_recent_workers_are_kept(tmp_path):
+    path = str(tmp_path / 'metrics.db')
+    store = MetricsStore(path, flush_interval=60, worker_ttl=600)
+    _add_worker(path, 'other:1:1', time.time() - 60, [
+        ('cash_http_requests_total', '', '', '', 1)
+    ])
+
+    values, workers = store.collect()
+    assert values[('cash_http_requests_total', '', '', '')] == 1
+    assert 'other:1:1' in [worker for worker, *_ in workers]
+
+
+def _metrics_app(tmp_path, token=''):
+    """只注册指标接口的应用（测试夹具中的应用关闭了指标）"""
+    from flask import Flask
+    from database import db
+    from metrics import init_metrics
+
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI='sqlite:///' + str(tmp_path / 'app.db'),
+        METRICS_ENABLED=True,
+        METRICS_PATH=str(tmp_path / 'metrics.db'),
+        METRICS_TOKEN=token
+    )
+    db.init_app(app)
+    init_metrics(app)
+    return app.test_client()
+
+
+def test_metrics_requires_token(tmp_path):
+    client = _metrics_app(tmp_path, token='s3cret')
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    response = client.get('/metrics', headers={'Authorization': 'Bearer s3cret'})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+
+
+def test_metrics_without_token_is_local_only(tmp_path):
+    client = _metrics_app(tmp_path)
+    assert client.get('/metrics').status_code == 200
+    assert client.get('/metrics', environ_base={'REMOTE_ADDR': '203.0.113.7'}).status_code == 403
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""金额解析测试：超出整数分范围或非有限的金额返回 400，而不是在写入时报错"""
+
+from decimal import Decimal
+
+import pytest
+
+from money import MAX_CENTS, parse_amount
+
+INVALID_AMOUNTS = [
+    ('abc', '金额格式错误'),
+    (None, '金额格式错误'),
+    ('NaN', '金额格式错误'),
+    ('Infinity', '金额格式错误'),
+    (0, '金额必须大于0'),
+    (-1, '金额必须大于0'),
+    ('1e17', '金额超出范围'),
+    ('1e30', '金额超出范围'),
+    ('1e400', '金额超出范围')
+]
+
+
+@pytest.mark.parametrize('value, message', INVALID_AMOUNTS)
+def test_parse_amount_rejects(value, message):
+    with pytest.raises(ValueError, match=message):
+        parse_amount(value)
+
+
+def test_parse_amount_bounds():
+    assert parse_amount('12.5') == Decimal('12.5')
+    assert parse_amount(Decimal(MAX_CENTS) / 100) == Decimal('92233720368547758.07')
+    with pytest.raises(ValueError, match='金额超出范围'):
+        parse_amount('92233720368547758.08')
+
+
+@pytest.mark.parametrize('value, message', INVALID_AMOUNTS)
+def test_create_and_update_reject_invalid_amount(client, make_user, value, message):
+    user = make_user()
+    response = client.post('/api/expenses/', json={
+        'account_id': user['account_id'], 'amount': 10, 'category': 'food'
+    }, headers=user['headers'])
+    expense_id = response.get_json()['expense']['id']
+
+    # 必填校验会先拦截空值，只检查能到达金额解析的输入
+    if value:
+        response = client.post('/api/expenses/', json={
+            'account_id': user['account_id'], 'amount': value, 'category': 'food'
+        }, headers=user['headers'])
+        assert response.status_code == 400
+        assert response.get_json()['error'] == message
+
+    response = client.put(f'/api/expenses/{expense_id}', json={'amount': value}, headers=user['headers'])
+    assert response.status_code == 400
+    assert response.get_json()['error'] == message
+
+    response = client.get('/api/accounts/', headers=user['headers'])
+    assert response.get_json()['accounts'][0]['balance'] == -10
+
+
+def test_reimbursement_total_out_of_range(client, make_user):
+    user = make_user()
+    # 每个账户各一笔，单个账户余额不超出范围
+    response = client.post('/api/accounts/', json={
+        'name': '第二账户', 'account_type': 'bank', 'balance': 0
+    }, headers=user['headers'])
+    expense_ids = []
+    for account_id in (user['account_id'], response.get_json()['account']['id']):
+        response = client.post('/api/expenses/', json={
+            'account_id': account_id, 'amount': '60000000000000000', 'category': 'food',
+            'is_reimbursable': True
+        }, headers=user['headers'])
+        assert response.status_code == 201
+        expense_ids.append(response.get_json()['expense']['id'])
+
+    response = client.post('/api/reimbursements/', json={
+        'title': '超额报销', 'expense_ids': expense_ids
+    }, headers=user['headers'])
+    assert response.status_code == 400
+    assert response.get_json()['error'] == '金额超出范围'
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""列表分页参数测试"""
+
+import pytest
+
+from api.pagination import MAX_PER_PAGE
+
+LIST_PATHS = ('/api/expenses/', '/api/reimbursements/')
+
+
+@pytest.mark.parametrize('path', LIST_PATHS)
+@pytest.mark.parametrize('per_page', (0, -1))
+@pytest.mark.parametrize('cursor', (None, ''))
+def test_non_positive_per_page_is_rejected(client, make_user, path, per_page, cursor):
+    user = make_user()
+    params = {'per_page': per_page}
+    if cursor is not None:
+        params['cursor'] = cursor
+    response = client.get(path, query_string=params, headers=user['headers'])
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('path', LIST_PATHS)
+@pytest.mark.parametrize('cursor', (None, ''))
+def test_per_page_is_capped(client, make_user, path, cursor):
+    user = make_user()
+    params = {'per_page': MAX_PER_PAGE * 10}
+    if cursor is not None:
+        params['cursor'] = cursor
+    response = client.get(path, query_string=params, headers=user['headers'])
+    assert response.status_code == 200
+    assert response.get_json()['pagination']['per_page'] == MAX_PER_PAGE
+
+
+def test_cursor_pages_cover_all_rows(client, make_user):
+    user = make_user()
+    for amount in (1, 2, 3):
+        client.post('/api/expenses/', json={
+            'account_id': user['account_id'], 'amount': amount, 'category': 'food'
+        }, headers=user['headers'])
+
+    seen = []
+    cursor = ''
+    while cursor is not None:
+        body = client.get('/api/expenses/', query_string={'per_page': 2, 'cursor': cursor},
+                          headers=user['headers']).get_json()
+        seen.extend(item['id'] for item in body['expenses'])
+        cursor = body['pagination']['next_cursor']
+    assert len(seen) == len(set(seen)) == 3
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""列表及报销详情接口查询次数预算：SQL 语句数不随记录数增长（没有 N+1 查询）"""
+
+from instrumentation import count_statements
+
+# (路径, 查询参数)
+LIST_REQUESTS = [
+    ('/api/expenses/', {'per_page': 20}),
+    ('/api/expenses/', {'per_page': 20, 'cursor': ''}),
+    ('/api/expenses/', {'per_page': 20, 'search': '出差午餐'}),
+    ('/api/reimbursements/', {'per_page': 20}),
+    ('/api/reimbursements/', {'per_page': 20, 'cursor': ''}),
+]
+
+# 单个列表请求允许的最多语句数（含条件请求的数据版本查询）
+STATEMENT_BUDGET = 4
+
+
+def _add_rows(client, user, count):
+    """添加 count 条可报销支出，每条各关联一个报销申请"""
+    for i in range(count):
+        response = client.post('/api/expenses/', json={
+            'account_id': user['account_id'], 'amount': 10 + i, 'category': 'food',
+            'description': f'出差午餐 {i}', 'is_reimbursable': True
+        }, headers=user['headers'])
+        expense_id = response.get_json()['expense']['id']
+        response = client.post('/api/reimbursements/', json={
+            'title': f'出差报销 {i}', 'expense_ids': [expense_id]
+        }, headers=user['headers'])
+        assert response.status_code == 201
+
+
+def _statement_count(app, client, user, path, params=None):
+    with app.app_context(), count_statements() as statements:
+        response = client.get(path, query_string=params, headers=user['headers'])
+    assert response.status_code == 200
+    return len(statements)
+
+
+def _statement_counts(app, client, user):
+    return [_statement_count(app, client, user, path, params) for path, params in LIST_REQUESTS]
+
+
+def test_list_endpoints_have_constant_statement_count(app, client, make_user):
+    user = make_user()
+    _add_rows(client, user, 2)
+    small = _statement_counts(app, client, user)
+
+    _add_rows(client, user, 30)
+    large = _statement_counts(app, client, user)
+
+    assert large == small
+    assert max(large) <= STATEMENT_BUDGET, large
+
+
+def _reimbursement_data(client, user, count):
+    """
+    在 count 个账户中各添加一笔关联到同一报销申请的支出和一笔未关联的可报销支出，
+    账户不同时逐条懒加载账户会产生 N+1 查询；返回报销申请ID
+    """
+    account_ids = [user['account_id']]
+    for i in range(1, count):
+        response = client.post('/api/accounts/', json={
+            'name': f'账户 {i}', 'account_type': 'bank', 'balance': 0
+        }, headers=user['headers'])
+        account_ids.append(response.get_json()['account']['id'])
+
+    linked = []
+    for account_id in account_ids:
+        for target in (linked, None):
+            response = client.post('/api/expenses/', json={
+                'account_id': account_id, 'amount': 10, 'category': 'food', 'is_reimbursable': True
+            }, headers=user['headers'])
+            if target is not None:
+                target.append(response.get_json()['expense']['id'])
+
+    response = client.post('/api/reimbursements/', json={
+        'title': '出差报销', 'expense_ids': linked
+    }, headers=user['headers'])
+    assert response.status_code == 201
+    return response.get_json()['reimbursement']['id']
+
+
+def test_reimbursement_detail_endpoints_have_constant_statement_count(app, client, make_user):
+    counts = []
+    for count in (1, 10):
+        user = make_user()
+        reimbursement_id = _reimbursement_data(client, user, count)
+        detail = client.get(f'/api/reimbursements/{reimbursement_id}', headers=user['headers'])
+        assert len(detail.get_json()['reimbursement']['expenses']) == count
+        available = client.get('/api/reimbursements/available-expenses', headers=user['headers'])
+        assert len(available.get_json()['expenses']) == count
+
+        counts.append([
+            _statement_count(app, client, user, f'/api/reimbursements/{reimbursement_id}'),
+            _statement_count(app, client, user, '/api/reimbursements/available-expenses')
+        ])
+
+    small, large = counts
+    assert large == small
+    assert max(large) <= STATEMENT_BUDGET, large
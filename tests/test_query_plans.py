@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""查询计划回归测试：列表查询应使用 models.py 中为其建立的索引"""
+
+import pytest
+
+from database import db
+from instrumentation import count_statements
+
+# (路径, 查询参数, 主表, 应使用的索引)
+PLAN_CASES = [
+    ('/api/expenses/', {'per_page': 20}, 'expenses', 'ix_expenses_user_date_created'),
+    ('/api/expenses/', {'per_page': 20, 'cursor': ''}, 'expenses', 'ix_expenses_user_date_created'),
+    ('/api/reimbursements/available-expenses', {}, 'expenses', 'ix_expenses_user_reimbursable_open'),
+    ('/api/reimbursements/', {'per_page': 20}, 'reimbursements', 'ix_reimbursements_user_created'),
+    ('/api/reimbursements/', {'per_page': 20, 'cursor': ''}, 'reimbursements', 'ix_reimbursements_user_created'),
+]
+
+
+def _query_plan(statement, parameters):
+    with db.engine.connect() as conn:
+        rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+    return '\n'.join(row[-1] for row in rows)
+
+
+@pytest.fixture
+def user_with_rows(client, make_user):
+    user = make_user()
+    for i in range(5):
+        response = client.post('/api/expenses/', json={
+            'account_id': user['account_id'], 'amount': 10 + i, 'category': 'food',
+            'is_reimbursable': True
+        }, headers=user['headers'])
+        if i < 2:
+            client.post('/api/reimbursements/', json={
+                'title': f'报销 {i}', 'expense_ids': [response.get_json()['expense']['id']]
+            }, headers=user['headers'])
+    return user
+
+
+@pytest.mark.parametrize('path, params, table, index', PLAN_CASES)
+def test_list_query_uses_index(app, client, user_with_rows, path, params, table, index):
+    with app.app_context(), count_statements() as statements:
+        response = client.get(path, query_string=params, headers=user_with_rows['headers'])
+    assert response.status_code == 200
+
+    with app.app_context():
+        plans = [
+            _query_plan(statement, parameters) for statement, parameters in statements
+            if statement.lstrip().upper().startswith('SELECT') and f'FROM {table}' in statement
+        ]
+    assert plans, f'{path} 没有查询 {table} 表'
+    assert any(index in plan for plan in plans), '\n\n'.join(plans)
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""统计接口测试"""
+
+from api.statistics import DASHBOARD_MAX_RECENT
+
+
+def test_dashboard_recent_is_clamped(client, make_user):
+    user = make_user()
+    for amount in range(1, DASHBOARD_MAX_RECENT + 6):
+        client.post('/api/expenses/', json={
+            'account_id': user['account_id'], 'amount': amount, 'category': 'food'
+        }, headers=user['headers'])
+
+    for recent, expected in ((-1, 1), (0, 1), (3, 3), (1000, DASHBOARD_MAX_RECENT)):
+        response = client.get('/api/statistics/dashboard', query_string={'recent': recent},
+                              headers=user['headers'])
+        assert response.status_code == 200
+        assert len(response.get_json()['recent_transactions']) == expected
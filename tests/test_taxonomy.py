@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""默认分类批量初始化测试"""
+
+from datetime import date
+
+from sqlalchemy import func, insert, select
+
+import taxonomy
+from database import db
+from instrumentation import count_statements
+from models import Category, Expense, User
+
+# 旧版本 SQLite（3.32 之前）单条语句最多 999 个绑定变量
+SQLITE_MAX_VARIABLES = 999
+
+
+def test_provision_full_chunk_stays_under_variable_limit(app, make_user):
+    user = make_user()
+    with app.app_context():
+        first_id = db.session.execute(select(func.max(User.id))).scalar() + 1
+        db.session.execute(insert(User), [
+            {'username': f'bulk{first_id + i}', 'email': f'bulk{first_id + i}@example.com',
+             'password_hash': 'x', 'name': 'bulk'}
+            for i in range(taxonomy.PROVISION_CHUNK_SIZE + 5)
+        ])
+        # 已使用分类值的历史记录应关联到新建的分类
+        db.session.execute(insert(Expense), [{
+            'user_id': first_id, 'account_id': user['account_id'], 'amount': 1,
+            'category': 'food', 'expense_date': date.today()
+        }])
+        db.session.commit()
+
+        with count_statements() as statements:
+            users, categories = taxonomy.provision_default_categories()
+
+        assert users == taxonomy.PROVISION_CHUNK_SIZE + 5
+        assert categories == users * len(taxonomy.DEFAULT_CATEGORIES)
+        assert max(len(parameters or ()) for _, parameters in statements) <= SQLITE_MAX_VARIABLES
+
+        linked = db.session.execute(
+            select(Category.value).join(Expense, Expense.category_id == Category.id)
+            .where(Expense.user_id == first_id)
+        ).scalar()
+        assert linked == 'food'
+        assert taxonomy.provision_default_categories() == (0, 0)
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+后台任务 worker：轮询 jobs 表并执行任务（重建汇总、大批量导入导出等）
+用法: python worker.py [--once]
+可启动多个进程并行执行；收到 SIGTERM / SIGINT 时在当前任务结束后退出
+"""
+
+import argparse
+import logging
+import os
+import signal
+import sys
+import threading
+from dotenv import load_dotenv
+
+# 加载环境变量
+load_dotenv()
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app
+from jobs import run_worker
+
+
+def main():
+    parser = argparse.ArgumentParser(description='后台任务 worker')
+    parser.add_argument('--once', action='store_true', help='执行完当前到期的任务后退出')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=os.getenv('LOG_LEVEL', 'INFO'),
+        format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+    )
+
+    stop_event = threading.Event()
+
+    def stop(signum, frame):
+        logging.getLogger(__name__).info('收到退出信号，当前任务结束后退出')
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    run_worker(app, once=args.once, stop_event=stop_event)
+
+if __name__ == '__main__':
+    main()